@@ -0,0 +1,101 @@
+"""
+Columnar results benchmark.
+
+Compares collecting N responses with `ColumnarResults` against the
+row-by-row approach it replaces, a list of dicts turned into NumPy
+columns afterwards: collection time, memory retained (tracemalloc) and
+the time of a "domains with category X above confidence Y" query.
+
+Usage::
+
+    pip install -e .[analytics]
+    python benchmarks/columnar_bench.py [--responses N] [--categories N]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+import numpy
+
+from websitecategorization import Client, ColumnarResults
+
+
+def responses(count: int, categories: int) -> list:
+    return [(
+        'domain{}.com'.format(i),
+        Client._parse_response(json.dumps({
+            'as': {'asn': 13335, 'name': 'CLOUDFLARENET'},
+            'domainName': 'domain{}.com'.format(i),
+            'categories': [{'confidence': (i * 7 + j) % 100 / 100,
+                            'id': (i + j * 13) % 400,
+                            'name': 'Category {}'.format((i + j * 13) % 400)}
+                           for j in range(categories)],
+            'createdDate': '2009-03-19T21:47:17+00:00',
+            'websiteResponded': True,
+        })))
+        for i in range(count)]
+
+
+def rows(results: list) -> list:
+    collected = []
+    for domain, response in results:
+        row = {'domain': domain,
+               'website_responded': response.website_responded,
+               'created_date': response.created_date,
+               'as_asn': response.as_field.asn,
+               'as_name': response.as_field.name}
+        for category in response.categories:
+            row['category_{}'.format(category.id)] = category.confidence
+        collected.append(row)
+    return collected
+
+
+def rows_query(collected: list, category: int, confidence: float):
+    column = numpy.array([row.get('category_{}'.format(category), 0.0)
+                          for row in collected])
+    domains = numpy.array([row['domain'] for row in collected], dtype=object)
+    return domains[column >= confidence]
+
+
+def columnar(results: list) -> ColumnarResults:
+    collected = ColumnarResults()
+    collected.extend(results)
+    return collected
+
+
+def measure(build, results: list) -> (float, float):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    collected = build(results)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return collected, elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--responses', type=int, default=100000)
+    parser.add_argument('--categories', type=int, default=4)
+    args = parser.parse_args()
+
+    results = responses(args.responses, args.categories)
+    for name, build, query in (
+            ('rows', rows, lambda c: rows_query(c, 13, 0.5)),
+            ('columnar', columnar, lambda c: c.domains_with(13, 0.5))):
+        collected, elapsed, retained = measure(build, results)
+        query(collected)
+        start = time.perf_counter()
+        found = query(collected)
+        queried = time.perf_counter() - start
+        print("{:<10} collect {:>7.3f} s  {:>7.1f} MiB  query {:>8.2f} ms"
+              "  ({} domains)".format(name, elapsed, retained / 2 ** 20,
+                                      queried * 1000, len(found)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Hedged requests benchmark.
+
+Compares lookup latency percentiles with and without a `HedgePolicy`
+against a local stub server where a share of the responses is slow.
+
+Usage::
+
+    pip install -e .
+    python benchmarks/hedging_bench.py [--requests N] [--tail-rate R]
+"""
+import argparse
+import time
+
+from websitecategorization import Client, HedgePolicy
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+def percentile(latencies: list, quantile: float) -> float:
+    return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+
+def run(server: StubApiServer, count: int, policy) -> list:
+    latencies = []
+    with Client(API_KEY, base_url=server.url, hedge_policy=policy) as client:
+        for i in range(count):
+            start = time.perf_counter()
+            client.data('d{}.com'.format(i))
+            latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--tail-rate', type=float, default=0.03)
+    parser.add_argument('--tail-latency', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with StubApiServer(api_key=API_KEY, latency=0.002,
+                       tail_rate=args.tail_rate,
+                       tail_latency=args.tail_latency, seed=1) as server:
+        for name, policy in (('plain', None), ('hedged', HedgePolicy())):
+            server.reset_counters()
+            latencies = run(server, args.requests, policy)
+            print("{:<8} p50 {:>7.1f} ms  p99 {:>7.1f} ms  max {:>7.1f} ms"
+                  "  {:>5} requests".format(
+                      name, percentile(latencies, 0.5) * 1000,
+                      percentile(latencies, 0.99) * 1000,
+                      latencies[-1] * 1000, server.request_count))
+
+
+if __name__ == '__main__':
+    main()
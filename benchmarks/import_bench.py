@@ -0,0 +1,84 @@
+"""
+Import time benchmark.
+
+Runs fresh interpreters with ``python -X importtime`` and reports the
+cumulative import time of the package for common entry points, best of
+N runs. With --max-ms, exits with status 1 when the bare package import
+exceeds the budget, to catch regressions of the lazy imports.
+
+Usage::
+
+    python benchmarks/import_bench.py [--runs N] [--max-ms MS]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import websitecategorization
+
+SCENARIOS = (
+    ('package', 'import websitecategorization'),
+    ('validation', 'from websitecategorization import validate_domains'),
+    ('models', 'from websitecategorization import Response, '
+               'ParameterError'),
+    ('client', 'from websitecategorization import Client'),
+    ('async client', 'from websitecategorization import AsyncClient'),
+    ('cli', 'import websitecategorization.cli'),
+)
+
+# Modules that only clients should load
+HEAVY = ('requests', 'urllib3', 'asyncio', 'numpy', 'sqlite3')
+
+
+def import_time(statement: str) -> (float, list):
+    """
+    :return: cumulative import time in milliseconds of the modules the
+        statement imports, and the heavy modules it loaded
+    """
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.dirname(websitecategorization.__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         statement + '\nimport sys\nprint(" ".join(sys.modules))'],
+        env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | name", top level
+        # entries are not indented
+        fields = line.split('|')
+        if len(fields) == 3 and not fields[2].startswith('  ') \
+                and fields[1].strip().isdigit():
+            total += int(fields[1])
+    loaded = set(result.stdout.split())
+    return total / 1000, [name for name in HEAVY if name in loaded]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help="Import time budget of the bare package")
+    args = parser.parse_args()
+
+    # The interpreter's own startup imports are measured as a baseline
+    baseline = min(import_time('pass')[0] for _ in range(args.runs))
+    print("{:<14} {:>9}  {}".format('entry point', 'ms', 'heavy modules'))
+    budget_exceeded = False
+    for name, statement in SCENARIOS:
+        elapsed, heavy = min(import_time(statement)
+                             for _ in range(args.runs))
+        elapsed -= baseline
+        print("{:<14} {:>9.1f}  {}".format(name, elapsed,
+                                           ', '.join(heavy) or '-'))
+        if name == 'package' and args.max_ms is not None \
+                and elapsed > args.max_ms:
+            budget_exceeded = True
+    if budget_exceeded:
+        print("Package import exceeds {} ms".format(args.max_ms))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
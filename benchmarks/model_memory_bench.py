@@ -0,0 +1,167 @@
+"""
+Response model memory benchmark.
+
+Builds N `Response` objects from parsed API responses and reports the
+memory they retain (tracemalloc) and the construction time from parsed
+JSON, for the previous ``__dict__``-based models and the current slotted
+ones, with categories left unmaterialized and materialized.
+
+Usage::
+
+    pip install -e .
+    python benchmarks/model_memory_bench.py [--responses N]
+        [--categories N]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from websitecategorization import Response
+
+
+# The models as they were before slots, for comparison
+
+
+class LegacyBaseModel:
+    def __init__(self):
+        pass
+
+
+def _legacy_string(values: dict, key: str) -> str:
+    if key in values and values[key]:
+        return str(values[key])
+    return ''
+
+
+def _legacy_float(values: dict, key: str) -> float:
+    if key in values and values[key]:
+        return float(values[key])
+    return 0.0
+
+
+def _legacy_int(values: dict, key: str) -> int:
+    if key in values and values[key]:
+        return int(values[key])
+    return 0
+
+
+def _legacy_bool(values: dict, key: str) -> bool:
+    if key in values and values[key]:
+        return bool(values[key])
+    return False
+
+
+def _legacy_list_of_objects(values: dict, key: str, classname: str) -> list:
+    r = []
+    if key in values and type(values[key]) is list:
+        r = [globals()[classname](x) for x in values[key]]
+    return r
+
+
+class LegacyCategory(LegacyBaseModel):
+    def __init__(self, values):
+        super().__init__()
+        self.confidence = 0.0
+        self.name = ""
+        self.id = 0
+
+        if values is not None:
+            self.confidence = _legacy_float(values, 'confidence')
+            self.id = _legacy_int(values, 'id')
+            self.name = _legacy_string(values, 'name')
+
+
+class LegacyAS(LegacyBaseModel):
+    def __init__(self, values):
+        super().__init__()
+        self.asn = 0
+        self.domain = ""
+        self.name = ""
+        self.route = ""
+        self.type = ""
+
+        if values is not None:
+            self.asn = _legacy_int(values, 'asn')
+            self.domain = _legacy_string(values, 'domain')
+            self.name = _legacy_string(values, 'name')
+            self.route = _legacy_string(values, 'route')
+            self.type = _legacy_string(values, 'type')
+
+
+class LegacyResponse(LegacyBaseModel):
+    def __init__(self, values):
+        super().__init__()
+
+        self.as_field = None
+        self.domain_name = ""
+        self.categories = []
+        self.created_date = None
+        self.website_responded = False
+
+        if values is not None:
+            if 'as' in values and values['as']:
+                self.as_field = LegacyAS(values['as'])
+            self.domain_name = _legacy_string(values, 'domainName')
+            self.categories = _legacy_list_of_objects(
+                values, 'categories', 'LegacyCategory')
+            self.created_date = _legacy_string(values, 'createdDate')
+            self.website_responded = _legacy_bool(values, 'websiteResponded')
+
+
+def payload(index: int, categories: int) -> str:
+    return json.dumps({
+        'as': {'asn': 13335, 'domain': 'https://www.cloudflare.com',
+               'name': 'CLOUDFLARENET', 'route': '172.67.64.0/20',
+               'type': 'Content'},
+        'domainName': 'domain{}.com'.format(index),
+        'categories': [{'confidence': 0.99 - i / 100, 'id': i,
+                        'name': 'Category {}'.format(i)}
+                       for i in range(categories)],
+        'createdDate': '2009-03-19T21:47:17+00:00',
+        'websiteResponded': True,
+    })
+
+
+def measure(raw: list, build) -> (float, float):
+    gc.collect()
+    tracemalloc.start()
+    models = [build(json.loads(text)) for text in raw]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del models
+
+    # Timed separately: tracemalloc slows allocations down
+    parsed = [json.loads(text) for text in raw]
+    start = time.perf_counter()
+    for values in parsed:
+        build(values)
+    return retained, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--responses', type=int, default=100000)
+    parser.add_argument('--categories', type=int, default=4)
+    args = parser.parse_args()
+
+    raw = [payload(i, args.categories) for i in range(args.responses)]
+
+    def materialized(values):
+        response = Response(values)
+        response.categories
+        return response
+
+    for name, build in (('legacy', LegacyResponse),
+                        ('slotted lazy', Response),
+                        ('slotted materialized', materialized)):
+        retained, elapsed = measure(raw, build)
+        print("{:<22} {:>8.1f} MiB  {:>6.0f} B/response  {:>6.2f} us/response"
+              .format(name, retained / 2 ** 20, retained / args.responses,
+                      elapsed * 1e6 / args.responses))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Domain normalization benchmark.
+
+Measures `DomainNormalizer.normalize` throughput over synthetic host names
+spread across common, multi-label and wildcard public suffixes, with and
+without collapsing to the registrable domain, and the number of distinct
+lookups left after normalization.
+
+Usage::
+
+    python benchmarks/normalization_bench.py [--hosts N]
+"""
+import argparse
+import random
+import time
+
+from websitecategorization import DomainNormalizer
+
+SUFFIXES = ('com', 'net', 'org', 'co.uk', 'com.au', 'de', 'github.io',
+            'city.kobe.jp', 'ck', 'xn--55qx5d.cn', 'unknowntld')
+PREFIXES = ('', 'www.', 'm.', 'api.', 'static.cdn.', 'WWW.')
+
+
+def hosts(count: int) -> list:
+    generator = random.Random(0)
+    return ['{}site{}.{}'.format(generator.choice(PREFIXES),
+                                 generator.randrange(count // 4 + 1),
+                                 generator.choice(SUFFIXES))
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--hosts', type=int, default=2000000)
+    args = parser.parse_args()
+
+    names = hosts(args.hosts)
+    print("Public Suffix List {}, {} host names, {} distinct".format(
+        DomainNormalizer.version(), len(names), len(set(names))))
+    for collapse in (False, True):
+        normalize = DomainNormalizer(collapse=collapse).normalize
+        start = time.perf_counter()
+        normalized = [normalize(name) for name in names]
+        elapsed = time.perf_counter() - start
+        print("collapse={!s:<6} {:>7.3f} s  {:>10,.0f} hosts/s  "
+              "{} distinct".format(collapse, elapsed, len(names) / elapsed,
+                                   len(set(normalized))))
+
+
+if __name__ == '__main__':
+    main()
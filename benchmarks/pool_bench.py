@@ -0,0 +1,57 @@
+"""
+Connection pooling benchmark.
+
+Compares `ApiRequester` (pooled keep-alive connections) with one-shot
+``requests.request`` calls sending ``Connection: close``, the way the
+requester worked before pooling, against a local stub server.
+
+Usage::
+
+    pip install -e .
+    python benchmarks/pool_bench.py [--requests N]
+"""
+import argparse
+import time
+
+from requests import request
+
+from websitecategorization import ApiRequester
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+PAYLOAD = {'apiKey': API_KEY, 'domainName': 'whoisxmlapi.com'}
+
+
+def one_shot(server: StubApiServer, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        request('GET', server.url, params=PAYLOAD,
+                headers={'Connection': 'close'}, timeout=(5, 30))
+    return time.perf_counter() - start
+
+
+def pooled(server: StubApiServer, count: int) -> float:
+    with ApiRequester(base_url=server.url) as requester:
+        start = time.perf_counter()
+        for _ in range(count):
+            requester.get(PAYLOAD)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    with StubApiServer(api_key=API_KEY) as server:
+        for name, bench in (('one-shot', one_shot), ('pooled', pooled)):
+            server.reset_counters()
+            elapsed = bench(server, args.requests)
+            print("{:<10} {:>8.1f} req/s  {:>7.3f} ms/req  {:>5} connections"
+                  .format(name, args.requests / elapsed,
+                          elapsed * 1000 / args.requests,
+                          server.connection_count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Refresh-ahead benchmark.
+
+Reads a few hot domains in a loop through a `MemoryCache` with a short
+TTL, against a local stub server with a response delay, with and without
+`RefreshAhead`, and prints read latency percentiles.
+
+Usage::
+
+    pip install -e .
+    python benchmarks/refresh_bench.py [--seconds S] [--ttl T]
+"""
+import argparse
+import time
+
+from websitecategorization import Client, MemoryCache, RefreshAhead
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+def percentile(latencies: list, quantile: float) -> float:
+    return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+
+def run(server: StubApiServer, seconds: float, ttl: float,
+        refresher) -> list:
+    domains = ['hot{}.com'.format(i) for i in range(10)]
+    latencies = []
+    with Client(API_KEY, base_url=server.url, cache=MemoryCache(ttl=ttl),
+                refresh_ahead=refresher) as client:
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            for domain in domains:
+                start = time.perf_counter()
+                client.data(domain)
+                latencies.append(time.perf_counter() - start)
+            time.sleep(0.001)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--ttl', type=float, default=0.5)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    with StubApiServer(api_key=API_KEY, latency=args.latency) as server:
+        for name, refresher in (
+                ('expiry', None),
+                ('refresh', RefreshAhead(refresh_before=args.ttl / 5,
+                                         grace=args.ttl))):
+            server.reset_counters()
+            latencies = run(server, args.seconds, args.ttl, refresher)
+            print("{:<8} p50 {:>7.3f} ms  p99 {:>7.3f} ms  max {:>7.1f} ms"
+                  "  {:>7} reads  {:>4} requests".format(
+                      name, percentile(latencies, 0.5) * 1000,
+                      percentile(latencies, 0.99) * 1000,
+                      latencies[-1] * 1000, len(latencies),
+                      server.request_count))
+            if refresher is not None:
+                print(refresher.as_dict())
+
+
+if __name__ == '__main__':
+    main()
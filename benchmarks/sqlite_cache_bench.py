@@ -0,0 +1,58 @@
+"""
+SQLite result cache benchmark.
+
+Measures lookups per second through `Client` with a `SqliteCache` for a
+cold cache (every lookup goes to a local stub server), a hot cache
+(single lookups) and a hot cache queried in bulk with `data_many`.
+
+Usage::
+
+    pip install -e .
+    python benchmarks/sqlite_cache_bench.py [--domains N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from websitecategorization import Client, SqliteCache
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--domains', type=int, default=2000)
+    args = parser.parse_args()
+
+    domains = ['domain{}.com'.format(i) for i in range(args.domains)]
+
+    with tempfile.TemporaryDirectory() as directory, \
+            StubApiServer(api_key=API_KEY) as server:
+        cache = SqliteCache(os.path.join(directory, 'cache.sqlite'))
+        client = Client(API_KEY, base_url=server.url, cache=cache)
+
+        def single():
+            for domain in domains:
+                client.data(domain)
+
+        def hot_bulk():
+            for _ in client.data_many(domains):
+                pass
+
+        for name, bench in (('cold', single), ('hot', single),
+                            ('hot bulk', hot_bulk)):
+            server.reset_counters()
+            start = time.perf_counter()
+            bench()
+            elapsed = time.perf_counter() - start
+            print("{:<10} {:>10.1f} lookups/s  {:>6} API calls".format(
+                name, len(domains) / elapsed, server.request_count))
+
+        client.close()
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
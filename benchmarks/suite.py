@@ -0,0 +1,193 @@
+"""
+Benchmark suite.
+
+Runs against a local stub server mimicking ``/api/v3`` and
+``/api/v3/categories`` and measures:
+
+- single-call latency percentiles of `Client.data` and
+  `Client.list_categories`
+- bulk throughput of `Client.data_many` and `AsyncClient`
+- CPU cost of JSON parsing and `Response` construction
+
+Results are printed as JSON, or written to --output, so that runs on
+different commits can be compared with --compare.
+
+Usage::
+
+    pip install -e .
+    python benchmarks/suite.py [--latency S] [--error-rate R]
+        [--payload-size N] [--output FILE] [--compare BASELINE]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from websitecategorization import Client, AsyncClient, Response
+from websitecategorization import decoding
+from websitecategorization.testing import StubApiServer, AsyncStubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+
+    def at(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        'p50_ms': round(at(0.50) * 1000, 3),
+        'p90_ms': round(at(0.90) * 1000, 3),
+        'p99_ms': round(at(0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def single_calls(client: Client, call, count: int) -> dict:
+    samples = []
+    errors = 0
+    for i in range(count):
+        start = time.perf_counter()
+        try:
+            call(i)
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - start)
+    result = percentiles(samples)
+    result['errors'] = errors
+    return result
+
+
+def bulk(client: Client, count: int, workers: int) -> dict:
+    domains = ['bulk{}.com'.format(i) for i in range(count)]
+    start = time.perf_counter()
+    errors = sum(1 for _, result in client.data_many(
+        domains, max_workers=workers) if not isinstance(result, Response))
+    elapsed = time.perf_counter() - start
+    return {'lookups_per_s': round(count / elapsed, 1), 'errors': errors}
+
+
+def async_bulk(args) -> dict:
+    async def run():
+        async with AsyncStubApiServer(
+                api_key=API_KEY, latency=args.latency,
+                error_rate=args.error_rate, payload_size=args.payload_size,
+                seed=1) as server:
+            async with AsyncClient(API_KEY, base_url=server.url,
+                                   max_concurrency=args.workers) as client:
+                start = time.perf_counter()
+                results = await asyncio.gather(
+                    *[client.data('async{}.com'.format(i))
+                      for i in range(args.bulk)], return_exceptions=True)
+                elapsed = time.perf_counter() - start
+        errors = sum(1 for r in results if not isinstance(r, Response))
+        return {'lookups_per_s': round(args.bulk / elapsed, 1),
+                'errors': errors}
+
+    return asyncio.run(run())
+
+
+def parsing(raw: str, count: int) -> dict:
+    def cpu_us(fn):
+        start = time.process_time()
+        for _ in range(count):
+            fn()
+        return round((time.process_time() - start) * 1e6 / count, 2)
+
+    parsed = json.loads(raw)
+    body = raw.encode('utf-8')
+    return {
+        'bytes': len(body),
+        'backend': decoding.BACKEND,
+        'json_loads_us': cpu_us(lambda: json.loads(raw)),
+        'backend_loads_us': cpu_us(lambda: decoding.loads(body)),
+        'model_us': cpu_us(lambda: Response(parsed)),
+        'parse_response_us': cpu_us(lambda: Client._parse_response(body)),
+    }
+
+
+def commit() -> str or None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, prefix + key + '.'))
+        elif isinstance(value, (int, float)):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict):
+    old = flatten(baseline['results'])
+    for key, value in flatten(current['results']).items():
+        if key in old and old[key]:
+            print("{:<40} {:>12} {:>12} {:>+8.1%}".format(
+                key, old[key], value, value / old[key] - 1),
+                file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--payload-size', type=int, default=None)
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--bulk', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=10)
+    parser.add_argument('--parse-iterations', type=int, default=20000)
+    parser.add_argument('--output', help='write results to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='print changes relative to a previous run')
+    args = parser.parse_args()
+
+    with StubApiServer(api_key=API_KEY, latency=args.latency,
+                       error_rate=args.error_rate,
+                       payload_size=args.payload_size, seed=1) as server:
+        with Client(API_KEY, base_url=server.url,
+                    pool_maxsize=args.workers) as client:
+            results = {
+                'data': single_calls(
+                    client, lambda i: client.data('single{}.com'.format(i)),
+                    args.calls),
+                'list_categories': single_calls(
+                    client, lambda i: client.list_categories(), args.calls),
+                'data_many': bulk(client, args.bulk, args.workers),
+            }
+            server.error_rate = 0.0
+            raw = client.raw_data('parse.com', 0.01)
+    results['async_client'] = async_bulk(args)
+    results['parsing'] = parsing(raw, args.parse_iterations)
+
+    report = {
+        'commit': commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': vars(args),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(report, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
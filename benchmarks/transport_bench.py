@@ -0,0 +1,54 @@
+"""
+Transport benchmark.
+
+Compares `ApiRequester` calls over the `requests` and `urllib3`
+transports against a local stub server, and over a `ReplayTransport`
+answering without network, which bounds the requester overhead.
+
+Usage::
+
+    pip install -e .
+    python benchmarks/transport_bench.py [--requests N]
+"""
+import argparse
+import time
+
+from websitecategorization import ApiRequester, RequestsTransport, \
+    Urllib3Transport, ReplayTransport
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+PAYLOAD = {'apiKey': API_KEY, 'domainName': 'whoisxmlapi.com'}
+
+
+def run(server: StubApiServer, transport, count: int) -> float:
+    with ApiRequester(base_url=server.url, transport=transport) as requester:
+        requester.get_bytes(dict(PAYLOAD))
+        start = time.perf_counter()
+        for _ in range(count):
+            requester.get_bytes(dict(PAYLOAD))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with StubApiServer(api_key=API_KEY) as server:
+        replay = ReplayTransport()
+        with ApiRequester(base_url=server.url) as requester:
+            replay.add('GET', server.url, PAYLOAD,
+                       content=requester.get_bytes(dict(PAYLOAD)))
+
+        for name, transport in (('requests', RequestsTransport()),
+                                ('urllib3', Urllib3Transport()),
+                                ('replay', replay)):
+            elapsed = run(server, transport, args.requests)
+            print("{:<10} {:>8.1f} req/s  {:>7.3f} ms/req".format(
+                name, args.requests / elapsed,
+                elapsed * 1000 / args.requests))
+
+
+if __name__ == '__main__':
+    main()
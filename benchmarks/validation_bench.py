@@ -0,0 +1,73 @@
+"""
+Domain validation benchmark.
+
+Compares `validate_domains` with validating names one call at a time
+with the regular expression, the path available before the batch API, on
+a synthetic list of mostly valid names with a share of invalid ones.
+
+Usage::
+
+    python benchmarks/validation_bench.py [--domains N] [--invalid RATIO]
+        [--repeat N]
+"""
+import argparse
+import random
+import time
+
+from websitecategorization import Client, ParameterError, \
+    validate_domains
+
+INVALID = ('bad domain.com', 'localhost', 'a..b.com', '-a.com', 'a.c',
+           'x' * 70 + '.com', 'exa$mple.org')
+
+
+def domains(count: int, invalid: float) -> list:
+    generator = random.Random(0)
+    return [generator.choice(INVALID) if generator.random() < invalid
+            else '{}site-{}.{}'.format(generator.choice(('', 'www.', 'api.')),
+                                       i, generator.choice(('com', 'co.uk')))
+            for i in range(count)]
+
+
+def validate_domain_name(value) -> str:
+    # Client._validate_domain_name before validate_domains
+    if Client._re_domain_name.search(str(value)) is not None:
+        return str(value)
+
+    raise ParameterError("Invalid domain name")
+
+
+def per_call(names: list) -> (list, list):
+    valid = []
+    invalid = []
+    for name in names:
+        try:
+            valid.append(validate_domain_name(name))
+        except ParameterError as error:
+            invalid.append((name, error.message))
+    return valid, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--domains', type=int, default=2000000)
+    parser.add_argument('--invalid', type=float, default=0.05)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Best of N runs")
+    args = parser.parse_args()
+
+    names = domains(args.domains, args.invalid)
+    for name, validate in (
+            ('per call', per_call),
+            ('validate_domains', validate_domains)):
+        elapsed = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            validate(names)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        print("{:<17} {:>7.3f} s  {:>11,.0f} domains/s".format(
+            name, elapsed, len(names) / elapsed))
+
+
+if __name__ == '__main__':
+    main()
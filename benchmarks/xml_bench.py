@@ -0,0 +1,104 @@
+"""
+XML parsing benchmark.
+
+Compares the CPU cost of building a `Response` from a JSON body, from an
+XML body with `websitecategorization.xmlreader` and, as a baseline, from
+an XML body parsed with xml.dom.minidom. Then measures `iterparse`
+throughput over a dump of concatenated XML responses against reading
+the equivalent JSON Lines.
+
+Usage::
+
+    pip install -e .
+    python benchmarks/xml_bench.py [--iterations N] [--responses N]
+        [--categories N]
+"""
+import argparse
+import io
+import json
+import time
+from xml.dom.minidom import parseString
+
+from websitecategorization import Client, Response
+from websitecategorization.testing.stub_server import _to_xml
+from websitecategorization.xmlreader import iterparse
+
+
+def body(index: int, categories: int) -> dict:
+    return {
+        'as': {'asn': 13335, 'domain': 'https://www.cloudflare.com',
+               'name': 'CLOUDFLARENET', 'route': '172.67.64.0/20',
+               'type': 'Content'},
+        'domainName': 'domain{}.com'.format(index),
+        'categories': [{'confidence': 0.99 - i / 100, 'id': i,
+                        'name': 'Category {}'.format(i)}
+                       for i in range(categories)],
+        'createdDate': '2009-03-19T21:47:17+00:00',
+        'websiteResponded': True,
+    }
+
+
+def minidom(document: bytes) -> Response:
+    """The full DOM alternative, converted the same way"""
+    def value(node):
+        children = [child for child in node.childNodes
+                    if child.nodeType == child.ELEMENT_NODE]
+        if node.tagName == 'categories':
+            return [value(child) for child in children]
+        if children:
+            return {child.tagName: value(child) for child in children}
+        text = ''.join(child.data for child in node.childNodes).strip()
+        if node.tagName == 'websiteResponded':
+            return text == 'true'
+        return text
+
+    return Response(value(parseString(document).documentElement))
+
+
+def cpu_us(fn, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) * 1e6 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--responses', type=int, default=50000)
+    parser.add_argument('--categories', type=int, default=4)
+    args = parser.parse_args()
+
+    single = body(0, args.categories)
+    as_json = json.dumps(single).encode('utf-8')
+    as_xml = _to_xml(single).encode('utf-8')
+    print("single response, {} categories".format(args.categories))
+    for name, fn in (
+            ('json', lambda: Client._parse_response(as_json)),
+            ('xml', lambda: Client._parse_response(
+                as_xml, Client.XML_FORMAT)),
+            ('xml minidom', lambda: minidom(as_xml))):
+        print("  {:<16} {:>8.2f} us".format(
+            name, cpu_us(fn, args.iterations)))
+
+    bodies = [body(i, args.categories) for i in range(args.responses)]
+    jsonl = ''.join(json.dumps(b) + '\n' for b in bodies).encode('utf-8')
+    dump = ''.join(_to_xml(b) + '\n' for b in bodies).encode('utf-8')
+
+    print("{} concatenated responses".format(args.responses))
+    start = time.process_time()
+    for line in io.BytesIO(jsonl):
+        Client._parse_response(line)
+    elapsed = time.process_time() - start
+    print("  {:<16} {:>8.0f} responses/s  {:>6.1f} MiB".format(
+        'json lines', args.responses / elapsed, len(jsonl) / 2 ** 20))
+
+    start = time.process_time()
+    count = sum(1 for _ in iterparse(io.BytesIO(dump)))
+    elapsed = time.process_time() - start
+    print("  {:<16} {:>8.0f} responses/s  {:>6.1f} MiB".format(
+        'xml iterparse', count / elapsed, len(dump) / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
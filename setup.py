@@ -65,10 +65,22 @@ setup(
         'api',
         'whoisxmlapi',
     ],
+    entry_points={
+        'console_scripts': [
+            'website-categorization = websitecategorization.cli:main',
+        ]
+    },
     install_requires=[
         'requests',
     ],
     extras_require={
+        'fast': [
+            'orjson',
+        ],
+        'analytics': [
+            'numpy',
+            'pyarrow',
+        ],
         'dev': [
             'tox',
             'flake8',
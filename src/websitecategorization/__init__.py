@@ -1,11 +1,79 @@
-__all__ = ['Client', 'ErrorMessage', 'WebsiteCategorizationApiError', 'ApiAuthError',
+__all__ = ['Client', 'AsyncClient', 'ErrorMessage',
+           'WebsiteCategorizationApiError', 'ApiAuthError',
            'HttpApiError', 'EmptyApiKeyError', 'ParameterError',
            'ResponseError', 'BadRequestError', 'UnparsableApiResponseError',
-           'ApiRequester', 'Category', 'Response']
-
-from .client import Client
-from .net.http import ApiRequester
-from .models.response import ErrorMessage, Category, Response
-from .exceptions.error import WebsiteCategorizationApiError, ParameterError, \
-    EmptyApiKeyError, ResponseError, UnparsableApiResponseError, \
-    ApiAuthError, BadRequestError, HttpApiError
+           'CircuitOpenError', 'RetryPolicy', 'CircuitBreaker',
+           'ApiRequester', 'AsyncApiRequester', 'RateLimiter', 'Category',
+           'Response', 'CacheBackend', 'CacheInfo', 'MemoryCache',
+           'SqliteCache', 'Pipeline', 'PipelineStats', 'Hooks',
+           'RequestInfo', 'MetricsCollector', 'CategoryTaxonomy',
+           'TaxonomyCategory', 'ColumnarResults', 'DomainNormalizer',
+           'ValidationResult', 'validate_domains', 'ShardedRunner',
+           'HedgePolicy', 'Transport', 'TransportResponse',
+           'RequestsTransport', 'Urllib3Transport', 'ReplayTransport',
+           'RecordingTransport', 'RefreshAhead']
+
+from importlib import import_module
+
+# Modules defining the public names. They are imported on first access,
+# so that e.g. validation does not load requests, asyncio or NumPy.
+_MODULES = {
+    'Client': '.client',
+    'AsyncClient': '.async_client',
+    'Pipeline': '.pipeline',
+    'PipelineStats': '.pipeline',
+    'ApiRequester': '.net.http',
+    'AsyncApiRequester': '.net.async_http',
+    'RateLimiter': '.net.ratelimit',
+    'RetryPolicy': '.net.retry',
+    'CircuitBreaker': '.net.retry',
+    'HedgePolicy': '.net.hedging',
+    'Transport': '.net.transport',
+    'TransportResponse': '.net.transport',
+    'RequestsTransport': '.net.transport',
+    'Urllib3Transport': '.net.transport',
+    'ReplayTransport': '.net.transport',
+    'RecordingTransport': '.net.transport',
+    'Hooks': '.net.hooks',
+    'RequestInfo': '.net.hooks',
+    'MetricsCollector': '.metrics',
+    'CategoryTaxonomy': '.taxonomy',
+    'ColumnarResults': '.columnar',
+    'DomainNormalizer': '.normalization',
+    'ValidationResult': '.validation',
+    'validate_domains': '.validation',
+    'ShardedRunner': '.sharding',
+    'CacheBackend': '.cache.base',
+    'CacheInfo': '.cache.base',
+    'MemoryCache': '.cache.memory',
+    'SqliteCache': '.cache.sqlite',
+    'RefreshAhead': '.cache.refresh',
+    'ErrorMessage': '.models.response',
+    'Category': '.models.response',
+    'Response': '.models.response',
+    'TaxonomyCategory': '.models.response',
+    'WebsiteCategorizationApiError': '.exceptions.error',
+    'ParameterError': '.exceptions.error',
+    'EmptyApiKeyError': '.exceptions.error',
+    'ResponseError': '.exceptions.error',
+    'UnparsableApiResponseError': '.exceptions.error',
+    'ApiAuthError': '.exceptions.error',
+    'BadRequestError': '.exceptions.error',
+    'HttpApiError': '.exceptions.error',
+    'CircuitOpenError': '.exceptions.error',
+}
+
+
+def __getattr__(name: str):
+    try:
+        module = _MODULES[name]
+    except KeyError:
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name)) from None
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
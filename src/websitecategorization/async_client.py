@@ -0,0 +1,289 @@
+import asyncio
+
+from .client import Client
+from .net.async_http import AsyncApiRequester
+from .net.singleflight import AsyncSingleFlight
+from .normalization import DomainNormalizer
+from .models.response import Response
+from .exceptions.error import ParameterError, EmptyApiKeyError
+
+
+class AsyncClient:
+    """
+    asyncio counterpart of `Client` with awaitable methods.
+
+    At most `max_concurrency` API calls are in flight at a time; further
+    calls wait for a free slot.
+
+    Requests go through the http:// proxies of the HTTP_PROXY,
+    HTTPS_PROXY and NO_PROXY environment variables. Unlike `Client`,
+    redirects are not followed: a 3xx response raises `HttpApiError`.
+    """
+    __default_url = "https://website-categorization.whoisxmlapi.com/api/v3"
+    _api_requester: AsyncApiRequester or None
+    _api_key: str
+    _max_concurrency: int
+
+    JSON_FORMAT = Client.JSON_FORMAT
+    XML_FORMAT = Client.XML_FORMAT
+
+    def __init__(self, api_key: str, **kwargs):
+        """
+        :param api_key: str: Your API key.
+        :key base_url: str: (optional) API endpoint URL.
+        :key timeout: float: (optional) API call timeout in seconds
+        :key max_concurrency: int: (optional) Maximum number of API calls
+            in flight at a time
+        :key coalesce_requests: bool: (optional) If True, concurrent
+            identical lookups share a single API call. On by default
+        :key pool_maxsize: int: (optional) Maximum number of idle
+            connections kept open per host
+        :key keep_alive: float: (optional) Idle time in seconds after which
+            pooled connections are dropped
+        :key max_response_size: int: (optional) Size in bytes above which
+            a response body raises HttpApiError, 32 MiB by default
+        :key rate_limit: float: (optional) Maximum number of requests per
+            second, adapted down on HTTP 429/503
+        :key burst: int: (optional) Number of requests that may be sent at
+            once when rate_limit is set
+        :key rate_limiter: RateLimiter: (optional) Limiter to use instead
+            of rate_limit/burst, e.g. one shared with other clients
+        :key retry_policy: RetryPolicy: (optional) Retry policy for failed
+            calls; calls are not retried by default
+        :key circuit_breaker: CircuitBreaker: (optional) Fail fast while
+            the endpoint is unhealthy
+        :key hedge_policy: HedgePolicy: (optional) Send a second request
+            when a call is slow, to cut tail latency. Off by default
+        :key hooks: Hooks: (optional) Instrumentation callbacks, see
+            `add_hook`
+        :key normalizer: DomainNormalizer: (optional) Normalization of
+            domain names before validation, e.g. collapsing subdomains to
+            their registrable domain. Off by default
+        """
+
+        self._api_key = ''
+        self._semaphore = None
+
+        self.api_key = api_key
+        self.max_concurrency = kwargs.pop('max_concurrency', 10)
+        self.coalesce_requests = kwargs.pop('coalesce_requests', True)
+        self.normalizer = kwargs.pop('normalizer', None)
+        self._flights = AsyncSingleFlight()
+
+        if 'base_url' not in kwargs:
+            kwargs['base_url'] = AsyncClient.__default_url
+
+        self.api_requester = AsyncApiRequester(**kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Release pooled HTTP connections held by the underlying requester.
+        """
+        if self._api_requester is not None:
+            await self._api_requester.close()
+
+    @property
+    def api_key(self) -> str:
+        return self._api_key
+
+    @api_key.setter
+    def api_key(self, value: str):
+        self._api_key = Client._validate_api_key(value)
+
+    @property
+    def api_requester(self) -> AsyncApiRequester or None:
+        return self._api_requester
+
+    @api_requester.setter
+    def api_requester(self, value: AsyncApiRequester):
+        self._api_requester = value
+
+    @property
+    def base_url(self) -> str:
+        return self._api_requester.base_url
+
+    @base_url.setter
+    def base_url(self, value: str or None):
+        if value is None:
+            self._api_requester.base_url = AsyncClient.__default_url
+        else:
+            self._api_requester.base_url = value
+
+    @property
+    def timeout(self) -> float:
+        return self._api_requester.timeout
+
+    @timeout.setter
+    def timeout(self, value: float):
+        self._api_requester.timeout = value
+
+    @property
+    def max_concurrency(self) -> int:
+        """Maximum number of API calls in flight at a time"""
+        return self._max_concurrency
+
+    @max_concurrency.setter
+    def max_concurrency(self, value: int):
+        if type(value) is int and value >= 1:
+            self._max_concurrency = value
+            # Created lazily so that it binds to the running event loop
+            self._semaphore = None
+        else:
+            raise ParameterError("max_concurrency should be a positive int")
+
+    @property
+    def coalesce_requests(self) -> bool:
+        return self._coalesce_requests
+
+    @coalesce_requests.setter
+    def coalesce_requests(self, value: bool):
+        self._coalesce_requests = bool(value)
+
+    @property
+    def normalizer(self) -> DomainNormalizer or None:
+        return self._normalizer
+
+    @normalizer.setter
+    def normalizer(self, value: DomainNormalizer or None):
+        self._normalizer = value
+
+    def add_hook(self, event: str, callback):
+        """
+        Register an instrumentation callback, see `Hooks`.
+
+        :param event: Use Hooks.BEFORE_REQUEST, Hooks.AFTER_RESPONSE,
+            Hooks.ON_ERROR constants
+        :param callback: callable receiving a `RequestInfo`
+        """
+        self._api_requester.add_hook(event, callback)
+
+    def remove_hook(self, event: str, callback):
+        self._api_requester.remove_hook(event, callback)
+
+    async def list_categories(self, order: str or None = None,
+                              output_format: str or None = None) -> str:
+        """
+        Get all available categories.
+
+        :return: str
+        :raises ConnectionError:
+        :raises asyncio.TimeoutError:
+        :raises WebsiteCategorizationApiError: Base class for all errors below
+        :raises ResponseError: response contains an error message
+        :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code
+        :raises BadRequestError: Server returned 400 or 422 HTTP code
+        :raises HttpApiError: HTTP code >= 300 and not equal to above codes
+        :raises CircuitOpenError: circuit breaker is open
+        """
+
+        _order = Client._validate_order(order) \
+            if order is not None else None
+
+        _output_format = Client._validate_output_format(output_format) \
+            if output_format is not None else None
+
+        async with self._slot():
+            return await self._api_requester.get_categories(
+                Client._build_categories_list_payload(
+                    _order,
+                    _output_format
+                )
+            )
+
+    async def data(self, domain: str,
+                   min_confidence: float or None = None,
+                   output_format: str or None = None) -> Response:
+        """
+        Get parsed API response as a `Response` instance.
+
+        :param domain: Domain name, string
+        :param min_confidence: Minimal confidence value. The higher this
+            value the fewer false-positive results will be returned, float
+        :param output_format: Format requested from the API, use
+            AsyncClient.JSON_FORMAT (default), AsyncClient.XML_FORMAT
+            constants. The result is the same
+        :return: `Response` instance
+        :raises ConnectionError:
+        :raises asyncio.TimeoutError:
+        :raises WebsiteCategorizationApiError: Base class for all errors below
+        :raises ResponseError: response contains an error message
+        :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code
+        :raises BadRequestError: Server returned 400 or 422 HTTP code
+        :raises HttpApiError: HTTP code >= 300 and not equal to above codes
+        :raises CircuitOpenError: circuit breaker is open
+        :raises ParameterError: invalid parameter's value
+        """
+
+        _output_format = Client._validate_output_format(output_format) \
+            if output_format is not None else Client._PARSABLE_FORMAT
+
+        # Parsed straight from the response bytes
+        response = await self._fetch(domain, min_confidence,
+                                     _output_format, False)
+        return Client._parse_response(response, _output_format)
+
+    async def raw_data(self, domain: str,
+                       min_confidence: float or None = None,
+                       output_format: str or None = None) -> str:
+        """
+        Get raw API response.
+
+        :param domain: Domain name, string
+        :param min_confidence: Minimal confidence value. The higher this
+            value the fewer false-positive results will be returned, float
+        :param output_format: Use AsyncClient.JSON_FORMAT,
+            AsyncClient.XML_FORMAT constants
+        :return: str
+        :raises ConnectionError:
+        :raises asyncio.TimeoutError:
+        :raises WebsiteCategorizationApiError: Base class for all errors below
+        :raises ResponseError: response contains an error message
+        :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code
+        :raises BadRequestError: Server returned 400 or 422 HTTP code
+        :raises HttpApiError: HTTP code >= 300 and not equal to above codes
+        :raises CircuitOpenError: circuit breaker is open
+        :raises ParameterError: invalid parameter's value
+        """
+
+        return await self._fetch(domain, min_confidence, output_format, True)
+
+    async def _fetch(self, domain: str, min_confidence: float or None,
+                     output_format: str or None,
+                     decode: bool) -> str or bytes:
+        if self.api_key == '':
+            raise EmptyApiKeyError('')
+
+        _domain = Client._validate_domain(domain, self._normalizer)
+        _confidence = Client._validate_confidence(min_confidence) \
+            if min_confidence is not None else None
+        _output_format = Client._validate_output_format(output_format) \
+            if output_format is not None else None
+
+        payload = Client._build_payload(
+            self.api_key,
+            _domain,
+            _confidence,
+            _output_format
+        )
+
+        async def fetch():
+            async with self._slot():
+                if decode:
+                    return await self._api_requester.get(payload)
+                return await self._api_requester.get_bytes(payload)
+
+        if self._coalesce_requests:
+            return await self._flights.do(
+                (Client._flight_key(payload), decode), fetch)
+        return await fetch()
+
+    def _slot(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self._semaphore
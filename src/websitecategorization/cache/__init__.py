@@ -0,0 +1,28 @@
+__all__ = ['CacheBackend', 'CacheInfo', 'MemoryCache', 'SqliteCache',
+           'RefreshAhead']
+
+from importlib import import_module
+
+# Imported on first access, so that sqlite3 is only loaded when used
+_MODULES = {
+    'CacheBackend': '.base',
+    'CacheInfo': '.base',
+    'MemoryCache': '.memory',
+    'SqliteCache': '.sqlite',
+    'RefreshAhead': '.refresh',
+}
+
+
+def __getattr__(name: str):
+    try:
+        module = _MODULES[name]
+    except KeyError:
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name)) from None
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
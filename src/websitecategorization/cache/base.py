@@ -0,0 +1,101 @@
+from collections import namedtuple
+from typing import Iterable
+
+
+CacheInfo = namedtuple('CacheInfo', [
+    'hits', 'misses', 'evictions', 'maxsize', 'currsize', 'maxbytes',
+    'currbytes'
+])
+
+
+class CacheBackend:
+    """
+    Base class for `Client` result caches.
+
+    Keys are tuples built by the client, values are raw API responses.
+    Subclasses must be safe to use from several threads at once.
+    """
+    _ttl: float
+    _unresponsive_ttl: float
+
+    def __init__(self, **kwargs):
+        """
+
+        :key ttl: float: (optional) Lifetime of successful results in
+            seconds, one hour by default
+        :key unresponsive_ttl: float: (optional) Lifetime of results with
+            website_responded=False in seconds, 5 minutes by default
+        """
+        self.ttl = kwargs.get('ttl', 3600)
+        self.unresponsive_ttl = kwargs.get('unresponsive_ttl', 300)
+
+    @property
+    def ttl(self) -> float:
+        """Lifetime of successful results in seconds"""
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, value: float):
+        self._ttl = CacheBackend._validate_ttl(value)
+
+    @property
+    def unresponsive_ttl(self) -> float:
+        """Lifetime of results with website_responded=False in seconds"""
+        return self._unresponsive_ttl
+
+    @unresponsive_ttl.setter
+    def unresponsive_ttl(self, value: float):
+        self._unresponsive_ttl = CacheBackend._validate_ttl(value)
+
+    def get(self, key: tuple) -> str or None:
+        """
+        :return: cached value or None if it is missing or expired
+        """
+        raise NotImplementedError
+
+    def get_many(self, keys: Iterable[tuple]) -> dict:
+        """
+        :return: dict of the keys found in the cache and their values
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def get_entries(self, keys: Iterable[tuple], grace: float = 0) -> dict:
+        """
+        Like `get_many`, with the time left before each entry expires.
+
+        :param grace: Also return entries expired less than `grace`
+            seconds ago
+        :return: dict of the keys found in the cache and (value, seconds
+            until expiry) pairs. The time is negative for expired entries,
+            None if the backend does not track it
+        """
+        return {key: (value, None)
+                for key, value in self.get_many(keys).items()}
+
+    def set(self, key: tuple, value: str, ttl: float or None = None):
+        """
+        :param ttl: Entry lifetime in seconds, `ttl` by default
+        """
+        raise NotImplementedError
+
+    def info(self) -> CacheInfo:
+        raise NotImplementedError
+
+    def clear(self):
+        """Drop all entries and reset the statistics"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release resources held by the cache"""
+        pass
+
+    @staticmethod
+    def _validate_ttl(value: float) -> float:
+        if value is not None and value >= 0:
+            return value
+        raise ValueError("TTL should be a non-negative number of seconds")
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from typing import Iterable
+from .base import CacheBackend, CacheInfo
+import sys
+import threading
+import time
+
+
+class MemoryCache(CacheBackend):
+    """
+    Thread-safe in-process cache of raw API responses.
+
+    Entries expire after their TTL; when `maxsize` entries or `maxbytes`
+    bytes are exceeded the least recently used entries are evicted.
+    """
+    _maxsize: int
+    _maxbytes: int or None
+
+    def __init__(self, **kwargs):
+        """
+
+        :key maxsize: int: (optional) Maximum number of entries, 1024 by
+            default
+        :key maxbytes: int: (optional) Maximum total size of stored
+            responses in bytes, unbounded by default
+        :key ttl: float: (optional) Lifetime of successful results in
+            seconds, one hour by default
+        :key unresponsive_ttl: float: (optional) Lifetime of results with
+            website_responded=False in seconds, 5 minutes by default
+        """
+        super().__init__(**kwargs)
+        self.maxsize = kwargs.get('maxsize', 1024)
+        self.maxbytes = kwargs.get('maxbytes', None)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: int):
+        if type(value) is int and value >= 1:
+            self._maxsize = value
+        else:
+            raise ValueError("maxsize should be a positive int")
+
+    @property
+    def maxbytes(self) -> int or None:
+        return self._maxbytes
+
+    @maxbytes.setter
+    def maxbytes(self, value: int or None):
+        if value is None or (type(value) is int and value >= 1):
+            self._maxbytes = value
+        else:
+            raise ValueError("maxbytes should be None or a positive int")
+
+    def get(self, key: tuple) -> str or None:
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+        return entry[1] if entry is not None else None
+
+    def get_many(self, keys: Iterable[tuple]) -> dict:
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._lookup(key, now)
+                if entry is not None:
+                    found[key] = entry[1]
+        return found
+
+    def get_entries(self, keys: Iterable[tuple], grace: float = 0) -> dict:
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._lookup(key, now, grace)
+                if entry is not None:
+                    found[key] = (entry[1], entry[0] - now)
+        return found
+
+    def set(self, key: tuple, value: str, ttl: float or None = None):
+        size = sys.getsizeof(value)
+        if self._maxbytes is not None and size > self._maxbytes:
+            return
+        expires = time.monotonic() + (self._ttl if ttl is None else ttl)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, value, size)
+            self._bytes += size
+            while len(self._entries) > self._maxsize or (
+                    self._maxbytes is not None
+                    and self._bytes > self._maxbytes):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self._maxsize, len(self._entries),
+                             self._maxbytes, self._bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def _lookup(self, key: tuple, now: float, grace: float = 0) \
+            -> tuple or None:
+        """
+        :return: (expires, value, size) entry, or None if it is missing or
+            expired for `grace` seconds or more
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] + grace > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+            self._remove(key)
+        self._misses += 1
+        return None
+
+    def _remove(self, key: tuple):
+        self._bytes -= self._entries.pop(key)[2]
@@ -0,0 +1,227 @@
+from heapq import heappush, heappop, heapify
+from typing import Callable
+import itertools
+import logging
+import threading
+
+
+class RefreshAhead:
+    """
+    Refreshes cached `Client` results in the background around their
+    expiry, so that readers of hot domains do not wait for the API.
+
+    A cached result read less than `refresh_before` seconds before it
+    expires is returned and queued for a refresh. A result expired less
+    than `grace` seconds ago is still returned (a stale serve) and queued
+    as well. `max_workers` background threads run the queued refreshes,
+    the most read keys first. At most `max_queue` keys wait; further
+    refreshes are dropped and those results expire as usual.
+
+    Usage::
+
+        refresher = RefreshAhead(refresh_before=60, grace=300)
+        client = Client('Your API key', cache=MemoryCache(),
+                        refresh_ahead=refresher)
+        print(refresher.as_dict())
+
+    One instance may be shared by clients; its counters then cover all
+    of them.
+    """
+    __logger = logging.getLogger("refresh-ahead")
+
+    def __init__(self, **kwargs):
+        """
+
+        :key refresh_before: float: (optional) Seconds before expiry from
+            which reads queue a refresh, 60 by default
+        :key grace: float: (optional) Seconds after expiry during which
+            the stale result is returned while it is refreshed, 300 by
+            default
+        :key max_workers: int: (optional) Number of background threads,
+            2 by default
+        :key max_queue: int: (optional) Maximum number of queued
+            refreshes, 1000 by default
+        """
+        self.refresh_before = kwargs.get('refresh_before', 60)
+        self.grace = kwargs.get('grace', 300)
+        self.max_workers = kwargs.get('max_workers', 2)
+        self.max_queue = kwargs.get('max_queue', 1000)
+
+        if self.refresh_before is None or self.refresh_before < 0:
+            raise ValueError("refresh_before should be a non-negative "
+                             "number")
+        if self.grace is None or self.grace < 0:
+            raise ValueError("grace should be a non-negative number")
+        if type(self.max_workers) is not int or self.max_workers < 1:
+            raise ValueError("max_workers should be a positive int")
+        if type(self.max_queue) is not int or self.max_queue < 1:
+            raise ValueError("max_queue should be a positive int")
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # key -> [reads, refresh] of the queued refreshes
+        self._queued = {}
+        # (-reads, sequence, key); entries with outdated reads are skipped
+        self._heap = []
+        self._sequence = itertools.count()
+        self._running = set()
+        self._workers = []
+        # Workers of an older generation exit, see `close`
+        self._generation = 0
+        self.reset()
+
+    def reset(self):
+        """Reset the counters"""
+        with self._lock:
+            self._stale_serves = 0
+            self._refreshes = 0
+            self._refresh_errors = 0
+            self._dropped = 0
+
+    @property
+    def stale_serves(self) -> int:
+        """Number of expired results returned"""
+        return self._stale_serves
+
+    @property
+    def refreshes(self) -> int:
+        """Number of successful background refreshes"""
+        return self._refreshes
+
+    @property
+    def refresh_errors(self) -> int:
+        """Number of background refreshes that raised"""
+        return self._refresh_errors
+
+    @property
+    def dropped(self) -> int:
+        """Number of refreshes not queued because the queue was full"""
+        return self._dropped
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of queued refreshes"""
+        return len(self._queued)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {'stale_serves': self._stale_serves,
+                    'refreshes': self._refreshes,
+                    'refresh_errors': self._refresh_errors,
+                    'dropped': self._dropped,
+                    'queue_depth': len(self._queued)}
+
+    def observe(self, key: tuple, expires_in: float or None,
+                refresh: Callable[[tuple], object]) -> bool:
+        """
+        Note a read of a cached result, and queue its refresh if it is
+        about to expire.
+
+        :param key: Cache key
+        :param expires_in: Seconds until the result expires, negative if
+            it has expired, None if unknown
+        :param refresh: Callable fetching the result of a key again and
+            storing it in the cache
+        :return: whether the result has expired
+        """
+        if expires_in is None or expires_in > self.refresh_before:
+            return False
+
+        stale = expires_in <= 0
+        with self._lock:
+            if stale:
+                self._stale_serves += 1
+            task = self._queued.get(key)
+            if task is not None:
+                task[0] += 1
+                self._push(task[0], key)
+            elif key in self._running:
+                pass
+            elif len(self._queued) >= self.max_queue:
+                self._dropped += 1
+            else:
+                self._queued[key] = [1, refresh]
+                self._push(1, key)
+                self._start_worker()
+                self._wakeup.notify()
+        return stale
+
+    def discard(self, refresh: Callable[[tuple], object]) -> int:
+        """
+        Drop the queued refreshes of one client, e.g. when it is closed.
+
+        :param refresh: Callable passed to `observe`
+        :return: number of refreshes dropped
+        """
+        with self._lock:
+            keys = [key for key, task in self._queued.items()
+                    if task[1] == refresh]
+            for key in keys:
+                del self._queued[key]
+        return len(keys)
+
+    def close(self):
+        """
+        Drop the queued refreshes and stop the background threads once
+        their current refresh is done.
+
+        The refresher stays usable: new threads start on the next queued
+        refresh.
+        """
+        with self._lock:
+            self._generation += 1
+            self._workers = []
+            self._queued.clear()
+            self._heap = []
+            self._wakeup.notify_all()
+
+    def _push(self, reads: int, key: tuple):
+        heappush(self._heap, (-reads, next(self._sequence), key))
+        if len(self._heap) > 4 * self.max_queue:
+            # Drop the entries with outdated reads
+            self._heap = [(-task[0], next(self._sequence), queued)
+                          for queued, task in self._queued.items()]
+            heapify(self._heap)
+
+    def _start_worker(self):
+        self._workers = [worker for worker in self._workers
+                         if worker.is_alive()]
+        busy = len(self._running) + len(self._queued)
+        if len(self._workers) < min(self.max_workers, busy):
+            worker = threading.Thread(target=self._work,
+                                      args=(self._generation,),
+                                      name='refresh-ahead', daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _work(self, generation: int):
+        while True:
+            with self._lock:
+                task = None
+                while task is None:
+                    if generation != self._generation:
+                        return
+                    if not self._heap:
+                        self._wakeup.wait()
+                        continue
+                    reads, _, key = heappop(self._heap)
+                    task = self._queued.get(key)
+                    if task is not None and task[0] != -reads:
+                        task = None
+                del self._queued[key]
+                self._running.add(key)
+
+            try:
+                task[1](key)
+                succeeded = True
+            except Exception as error:
+                RefreshAhead.__logger.debug("Refresh of %s failed: %s",
+                                            key, error)
+                succeeded = False
+
+            with self._lock:
+                self._running.discard(key)
+                if succeeded:
+                    self._refreshes += 1
+                else:
+                    self._refresh_errors += 1
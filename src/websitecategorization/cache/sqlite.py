@@ -0,0 +1,191 @@
+from typing import Iterable
+from .base import CacheBackend, CacheInfo
+import os
+import sqlite3
+import threading
+import time
+
+
+class SqliteCache(CacheBackend):
+    """
+    Persistent cache of raw API responses in an SQLite database.
+
+    The database runs in WAL mode, so any number of threads and processes
+    on the host may read and write the same file concurrently. Every
+    thread gets its own connection.
+
+    Expired rows are ignored on read and deleted in batches of
+    `purge_batch` rows every `purge_interval` writes, or explicitly with
+    `purge_expired`. Rows within the largest `grace` passed to
+    `get_entries` are kept.
+    """
+    _SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS responses ('
+        ' key TEXT PRIMARY KEY,'
+        ' value TEXT NOT NULL,'
+        ' created REAL NOT NULL,'
+        ' expires REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires)',
+    )
+    # Stay well below SQLITE_MAX_VARIABLE_NUMBER of older SQLite builds
+    _MAX_VARIABLES = 500
+
+    def __init__(self, path: str, **kwargs):
+        """
+        :param path: Database file path
+        :key ttl: float: (optional) Lifetime of successful results in
+            seconds, one hour by default
+        :key unresponsive_ttl: float: (optional) Lifetime of results with
+            website_responded=False in seconds, 5 minutes by default
+        :key timeout: float: (optional) How long to wait for a lock held by
+            another connection, seconds
+        :key purge_interval: int: (optional) Number of writes between
+            automatic purges of expired rows
+        :key purge_batch: int: (optional) Maximum number of expired rows
+            deleted by a single statement
+        """
+        super().__init__(**kwargs)
+        self._path = path
+        self._timeout = kwargs.get('timeout', 30.0)
+        self._purge_interval = kwargs.get('purge_interval', 1000)
+        self._purge_batch = kwargs.get('purge_batch', 500)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._pid = os.getpid()
+        self._writes = 0
+        # Seconds expired rows are kept for stale reads
+        self._retain = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self._connection()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def get(self, key: tuple) -> str or None:
+        row = self._connection().execute(
+            'SELECT value FROM responses WHERE key = ? AND expires > ?',
+            (SqliteCache._encode_key(key), time.time())).fetchone()
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return row[0]
+
+    def get_many(self, keys: Iterable[tuple]) -> dict:
+        return {key: value for key, (value, _)
+                in self.get_entries(keys).items()}
+
+    def get_entries(self, keys: Iterable[tuple], grace: float = 0) -> dict:
+        if grace > self._retain:
+            self._retain = grace
+        encoded = {SqliteCache._encode_key(key): key for key in keys}
+        names = list(encoded)
+        found = {}
+        connection = self._connection()
+        now = time.time()
+        for start in range(0, len(names), SqliteCache._MAX_VARIABLES):
+            chunk = names[start:start + SqliteCache._MAX_VARIABLES]
+            rows = connection.execute(
+                'SELECT key, value, expires FROM responses WHERE expires > ? '
+                'AND key IN ({})'.format(','.join('?' * len(chunk))),
+                [now - grace] + chunk)
+            for name, value, expires in rows:
+                found[encoded[name]] = (value, expires - now)
+        with self._lock:
+            self._hits += len(found)
+            self._misses += len(encoded) - len(found)
+        return found
+
+    def set(self, key: tuple, value: str, ttl: float or None = None):
+        now = time.time()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO responses (key, value, created, expires) '
+            'VALUES (?, ?, ?, ?)',
+            (SqliteCache._encode_key(key), value, now,
+             now + (self._ttl if ttl is None else ttl)))
+
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self._purge_interval == 0
+        if purge:
+            self._purge_batch_of_rows(now)
+
+    def purge_expired(self) -> int:
+        """
+        Delete all expired rows, except those kept for stale reads,
+        `purge_batch` rows per statement so that other writers are never
+        blocked for long.
+
+        :return: number of deleted rows
+        """
+        now = time.time()
+        total = 0
+        while True:
+            deleted = self._purge_batch_of_rows(now)
+            total += deleted
+            if deleted < self._purge_batch:
+                return total
+
+    def info(self) -> CacheInfo:
+        count, size = self._connection().execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(value AS BLOB))), 0) '
+            'FROM responses').fetchone()
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             None, count, None, size)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM responses')
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _purge_batch_of_rows(self, now: float) -> int:
+        deleted = self._connection().execute(
+            'DELETE FROM responses WHERE rowid IN ('
+            'SELECT rowid FROM responses WHERE expires <= ? LIMIT ?)',
+            (now - self._retain, self._purge_batch)).rowcount
+        with self._lock:
+            self._evictions += deleted
+        return deleted
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # Connections must not cross fork(); start over in the child
+            self._pid = os.getpid()
+            self._connections = []
+            self._local = threading.local()
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=self._timeout, isolation_level=None,
+                check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SqliteCache._SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    @staticmethod
+    def _encode_key(key: tuple) -> str:
+        return '\t'.join('' if k is None else repr(k) if type(k) is float
+                         else str(k) for k in key)
@@ -0,0 +1,326 @@
+"""
+Command-line bulk categorizer.
+
+Reads domain names, one per line, from a file or stdin and writes the
+API responses as JSON Lines, CSV or raw XML. Throughput and error counts
+are shown on stderr while running.
+
+Heavy modules are imported only once the arguments are parsed, so that
+``--help`` and argument errors stay fast.
+"""
+import argparse
+import os
+import sys
+import time
+
+API_KEY_ENV = 'WEBSITE_CATEGORIZATION_API_KEY'
+
+_BENCH_API_KEY = 'at_' + '0' * 29
+
+
+class _Progress:
+    """Live throughput and error counts on stderr"""
+
+    def __init__(self, stream, interval: float = 0.5):
+        self._stream = stream
+        self._interval = interval
+        self._started = time.monotonic()
+        self._shown = 0.0
+        self.done = 0
+        self.errors = 0
+
+    def __call__(self, domain: str, result):
+        self.done += 1
+        if not isinstance(result, str):
+            self.errors += 1
+        now = time.monotonic()
+        if now - self._shown >= self._interval:
+            self._shown = now
+            self._show(now, '\r')
+
+    def finish(self):
+        self._show(time.monotonic(), '\r')
+        self._stream.write('\n')
+        self._stream.flush()
+
+    def _show(self, now: float, prefix: str):
+        elapsed = max(now - self._started, 1e-9)
+        self._stream.write('{}{} done  {:.1f}/s  {} errors'.format(
+            prefix, self.done, self.done / elapsed, self.errors))
+        self._stream.flush()
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='website-categorization',
+        description='Categorize domain names with the Website '
+                    'Categorization API.')
+    parser.add_argument(
+        'input', nargs='?', default='-',
+        help="file with one domain per line, '-' for stdin (default)")
+    parser.add_argument(
+        '-k', '--api-key', default=os.environ.get(API_KEY_ENV),
+        help='API key, ${} by default'.format(API_KEY_ENV))
+    parser.add_argument(
+        '-o', '--output',
+        help='output file, stdout by default. A rerun with the same '
+             'output file resumes an interrupted run')
+    parser.add_argument(
+        '-f', '--format', choices=('jsonl', 'csv', 'xml'), default='jsonl',
+        help='output format (default: %(default)s)')
+    parser.add_argument(
+        '-w', '--workers', type=_positive_int, default=10,
+        help='concurrent lookups (default: %(default)s)')
+    parser.add_argument(
+        '-r', '--rate-limit', type=_positive,
+        help='maximum requests per second')
+    parser.add_argument(
+        '-c', '--cache', metavar='PATH',
+        help='SQLite cache file shared between runs')
+    parser.add_argument(
+        '-m', '--min-confidence', type=_confidence,
+        help='minimal confidence of returned categories')
+    parser.add_argument(
+        '--collapse-subdomains', action='store_true',
+        help='look up registrable domains only, e.g. example.co.uk for '
+             'www.example.co.uk, and treat other subdomains as duplicates')
+    parser.add_argument(
+        '-p', '--processes', type=_positive_int, default=1,
+        help='worker processes, each running --workers concurrent lookups '
+             'and a share of --rate-limit (default: %(default)s)')
+    parser.add_argument(
+        '--shard', type=_shard, metavar='I/N',
+        help='process only shard I of N (0 <= I < N), by a stable hash of '
+             'the domain, to split one input across machines')
+    parser.add_argument(
+        '--retries', type=_non_negative_int, default=2,
+        help='retries of failed lookups (default: %(default)s)')
+    parser.add_argument(
+        '--timeout', type=_timeout,
+        help='API call timeout in seconds, from 1 to 60')
+    parser.add_argument(
+        '--transport', choices=('requests', 'urllib3'), default='requests',
+        help='HTTP library sending the requests (default: %(default)s)')
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument(
+        '--record', metavar='PATH',
+        help='append the API responses to a JSON Lines file for --replay')
+    replay.add_argument(
+        '--replay', metavar='PATH',
+        help='answer from responses recorded with --record instead of the '
+             'API; no API key is needed')
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument(
+        '-q', '--quiet', action='store_true', help='hide progress')
+    parser.add_argument(
+        '--bench', type=_positive_int, metavar='N', nargs='?', const=10000,
+        help='look up N synthetic domains (default: 10000) against a '
+             'local stub server and print a JSON summary')
+    parser.add_argument(
+        '--bench-latency', type=_non_negative, default=0.0, metavar='SECONDS',
+        help='stub server response delay in --bench mode')
+    return parser
+
+
+def _shard(value: str) -> tuple:
+    from .sharding import parse_shard
+    from .exceptions.error import ParameterError
+
+    try:
+        return parse_shard(value)
+    except ParameterError as error:
+        raise argparse.ArgumentTypeError(error.message)
+
+
+# Numeric options are checked here rather than by the client, for usage
+# errors instead of tracebacks
+
+def _positive_int(value: str) -> int:
+    number = _number(value, int)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            "should be a positive integer: {!r}".format(value))
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    number = _number(value, int)
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            "should be a non-negative integer: {!r}".format(value))
+    return number
+
+
+def _positive(value: str) -> float:
+    number = _number(value, float)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(
+            "should be a positive number: {!r}".format(value))
+    return number
+
+
+def _non_negative(value: str) -> float:
+    number = _number(value, float)
+    if not number >= 0:
+        raise argparse.ArgumentTypeError(
+            "should be a non-negative number: {!r}".format(value))
+    return number
+
+
+def _confidence(value: str) -> float:
+    number = _number(value, float)
+    if not 0 < number <= 1:
+        raise argparse.ArgumentTypeError(
+            "should be in (0, 1]: {!r}".format(value))
+    return number
+
+
+def _timeout(value: str) -> float:
+    number = _number(value, float)
+    if not 1 <= number <= 60:
+        raise argparse.ArgumentTypeError(
+            "should be in [1, 60]: {!r}".format(value))
+    return number
+
+
+def _number(value: str, kind: type):
+    try:
+        return kind(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "invalid {}: {!r}".format(
+                'integer' if kind is int else 'number', value)) from None
+
+
+def main(argv: list or None = None) -> int:
+    args = _parser().parse_args(argv)
+    if args.bench is not None:
+        return _bench(args)
+    if not args.api_key and args.replay:
+        args.api_key = _BENCH_API_KEY
+    if not args.api_key:
+        sys.stderr.write('error: no API key, use --api-key or set ${}\n'
+                         .format(API_KEY_ENV))
+        return 2
+    return _categorize(args, args.input)
+
+
+def _categorize(args, domains, output=None) -> int:
+    from .pipeline import Pipeline
+    from .exceptions.error import WebsiteCategorizationApiError
+
+    progress = None
+    runner = None
+    if args.processes > 1:
+        from functools import partial
+        from .sharding import ShardedRunner
+        runner = ShardedRunner(partial(_client, args, args.processes),
+                               processes=args.processes,
+                               max_workers=args.workers)
+    try:
+        with _client(args) as client:
+            if not args.quiet:
+                progress = _Progress(sys.stderr)
+            if output is None:
+                output = args.output or sys.stdout.buffer
+            pipeline = Pipeline(
+                client, output,
+                output_format=args.format,
+                min_confidence=args.min_confidence,
+                max_workers=args.workers,
+                on_result=progress,
+                shard=args.shard,
+                runner=runner)
+            if domains == '-':
+                domains = sys.stdin
+            stats = pipeline.run(domains)
+    except (WebsiteCategorizationApiError, OSError) as error:
+        if progress is not None:
+            progress.finish()
+        sys.stderr.write('error: {}\n'.format(
+            getattr(error, 'message', None) or error))
+        return 1
+    except KeyboardInterrupt:
+        if progress is not None:
+            progress.finish()
+        return 130
+
+    if progress is not None:
+        progress.finish()
+        sys.stderr.write(
+            '{} read, {} resumed, {} duplicates, {} invalid, '
+            '{} succeeded, {} failed\n'.format(
+                stats.read, stats.resumed, stats.duplicates, stats.invalid,
+                stats.succeeded, stats.failed))
+    return 0
+
+
+def _client(args, processes: int = 1):
+    """
+    :param processes: Number of processes sharing the rate limit
+    """
+    from .client import Client
+
+    kwargs = {'pool_maxsize': args.workers}
+    if args.base_url:
+        kwargs['base_url'] = args.base_url
+    if args.timeout is not None:
+        kwargs['timeout'] = args.timeout
+    if args.rate_limit is not None:
+        kwargs['rate_limit'] = args.rate_limit / processes
+    if args.cache:
+        from .cache.sqlite import SqliteCache
+        kwargs['cache'] = SqliteCache(args.cache)
+    if args.collapse_subdomains:
+        from .normalization import DomainNormalizer
+        kwargs['normalizer'] = DomainNormalizer()
+    if args.retries > 0:
+        from .net.retry import RetryPolicy
+        kwargs['retry_policy'] = RetryPolicy(max_attempts=args.retries + 1)
+    if args.replay:
+        from .net.transport import ReplayTransport
+        kwargs['transport'] = ReplayTransport(args.replay)
+    elif args.transport == 'urllib3' or args.record:
+        from .net.transport import RequestsTransport, Urllib3Transport, \
+            RecordingTransport
+        transport = (Urllib3Transport if args.transport == 'urllib3'
+                     else RequestsTransport)(
+            pool_maxsize=kwargs['pool_maxsize'])
+        if args.record:
+            transport = RecordingTransport(args.record, transport)
+        kwargs['transport'] = transport
+    return Client(args.api_key, **kwargs)
+
+
+def _bench(args) -> int:
+    import json
+    from .testing import StubApiServer
+
+    with StubApiServer(api_key=_BENCH_API_KEY,
+                       latency=args.bench_latency) as server:
+        args.api_key = _BENCH_API_KEY
+        args.base_url = server.url
+        domains = ('bench{}.com'.format(i) for i in range(args.bench))
+
+        # Written from scratch on every run, never resumed
+        with open(args.output or os.devnull, 'wb') as output:
+            started = time.perf_counter()
+            code = _categorize(args, domains, output)
+            elapsed = time.perf_counter() - started
+
+        print(json.dumps({
+            'domains': args.bench,
+            'processes': args.processes,
+            'workers': args.workers,
+            'format': args.format,
+            'latency': args.bench_latency,
+            'seconds': round(elapsed, 4),
+            'domains_per_second': round(args.bench / elapsed, 1),
+            'requests': server.request_count,
+            'connections': server.connection_count,
+        }))
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,33 @@
-from json import loads, JSONDecodeError
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterable, Iterator, Tuple
 import re
 
+from .cache.base import CacheBackend, CacheInfo
+from .cache.refresh import RefreshAhead
+from .decoding import loads
+from . import xmlreader
+from .net.hooks import Hooks, RequestInfo
 from .net.http import ApiRequester
+from .net.singleflight import SingleFlight
+from .normalization import DomainNormalizer
+from .validation import problem
 from .models.response import Response
 from .exceptions.error import ParameterError, EmptyApiKeyError, \
-    UnparsableApiResponseError
+    UnparsableApiResponseError, ApiAuthError
 
 
 class Client:
     __default_url = "https://website-categorization.whoisxmlapi.com/api/v3"
     _api_requester: ApiRequester or None
     _api_key: str
+    _cache: CacheBackend or None
 
+    _re_not_responded = re.compile(
+        r'websiteResponded"?\s*[:>]\s*false', re.IGNORECASE)
     _re_api_key = re.compile(r'^at_[a-z0-9]{29}$', re.IGNORECASE)
+    # Definition of valid domain names. Validation runs the equivalent
+    # validation.problem, which does not backtrack
     _re_domain_name = re.compile(
         r'^(?:[0-9a-z_](?:[0-9a-z-_]{0,62}(?<=[0-9a-z-_])[0-9a-z_])?\.)+'
         + r'[0-9a-z][0-9a-z-]{0,62}[a-z0-9]$', re.IGNORECASE)
@@ -20,6 +35,12 @@ class Client:
 
     _PARSABLE_FORMAT = 'json'
 
+    # Threshold requested from the API when filtering confidence locally
+    _LOCAL_FILTER_FLOOR = 0.01
+
+    # Threshold the API applies when minConfidence is omitted
+    DEFAULT_MIN_CONFIDENCE = 0.55
+
     JSON_FORMAT = 'json'
     XML_FORMAT = 'xml'
 
@@ -31,17 +52,86 @@ class Client:
         :param api_key: str: Your API key.
         :key base_url: str: (optional) API endpoint URL.
         :key timeout: float: (optional) API call timeout in seconds
+        :key pool_connections: int: (optional) Number of per-host
+            connection pools to keep
+        :key pool_maxsize: int: (optional) Maximum number of connections
+            kept open per host
+        :key keep_alive: float: (optional) Idle time in seconds after which
+            pooled connections are dropped
+        :key rate_limit: float: (optional) Maximum number of requests per
+            second, adapted down on HTTP 429/503
+        :key burst: int: (optional) Number of requests that may be sent at
+            once when rate_limit is set
+        :key rate_limiter: RateLimiter: (optional) Limiter to use instead
+            of rate_limit/burst, e.g. one shared with other clients
+        :key retry_policy: RetryPolicy: (optional) Retry policy for failed
+            calls; calls are not retried by default
+        :key circuit_breaker: CircuitBreaker: (optional) Fail fast while
+            the endpoint is unhealthy
+        :key hedge_policy: HedgePolicy: (optional) Send a second request
+            when a call is slow, to cut tail latency. Off by default
+        :key hooks: Hooks: (optional) Instrumentation callbacks, see
+            `add_hook`
+        :key transport: Transport: (optional) HTTP transport, e.g.
+            `Urllib3Transport`, or `ReplayTransport` to answer from
+            recorded responses. Pooled `requests` by default
+        :key cache: CacheBackend: (optional) Cache for `data`/`raw_data`
+            results, e.g. `MemoryCache` or `SqliteCache`. Caching is
+            disabled by default
+        :key refresh_ahead: RefreshAhead: (optional) Refresh cached
+            results in the background before they expire, and return
+            expired ones within a grace window meanwhile. Off by default.
+            It may be shared by clients and stays the caller's: `close`
+            drops this client's queued refreshes only
+        :key local_confidence_filter: bool: (optional) If True, `data` and
+            `data_many` fetch every category once and apply
+            min_confidence locally, so one cached result serves any
+            threshold. Off by default
+        :key coalesce_requests: bool: (optional) If True, concurrent
+            identical lookups share a single API call. On by default
+        :key normalizer: DomainNormalizer: (optional) Normalization of
+            domain names before validation, e.g. collapsing subdomains to
+            their registrable domain. Off by default
         """
 
         self._api_key = ''
 
         self.api_key = api_key
+        self.cache = kwargs.pop('cache', None)
+        self.refresh_ahead = kwargs.pop('refresh_ahead', None)
+        self.local_confidence_filter = kwargs.pop(
+            'local_confidence_filter', False)
+        self.coalesce_requests = kwargs.pop('coalesce_requests', True)
+        self.normalizer = kwargs.pop('normalizer', None)
+        self._flights = SingleFlight()
+        # Shared with the requester, which reports the API calls
+        self._hooks = kwargs.get('hooks', None) or Hooks()
+        kwargs['hooks'] = self._hooks
 
         if 'base_url' not in kwargs:
             kwargs['base_url'] = Client.__default_url
 
         self.api_requester = ApiRequester(**kwargs)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Release pooled HTTP connections held by the underlying requester
+        and drop the queued background refreshes of this client.
+
+        The `RefreshAhead` itself keeps running for the other clients
+        sharing it; close it once they are all closed.
+        """
+        if self._refresh_ahead is not None:
+            self._refresh_ahead.discard(self._refresh)
+        if self._api_requester is not None:
+            self._api_requester.close()
+
     @property
     def api_key(self) -> str:
         return self._api_key
@@ -58,6 +148,83 @@ class Client:
     def api_requester(self, value: ApiRequester):
         self._api_requester = value
 
+    @property
+    def cache(self) -> CacheBackend or None:
+        return self._cache
+
+    @cache.setter
+    def cache(self, value: CacheBackend or None):
+        self._cache = value
+
+    @property
+    def refresh_ahead(self) -> RefreshAhead or None:
+        return self._refresh_ahead
+
+    @refresh_ahead.setter
+    def refresh_ahead(self, value: RefreshAhead or None):
+        self._refresh_ahead = value
+
+    @property
+    def local_confidence_filter(self) -> bool:
+        return self._local_confidence_filter
+
+    @local_confidence_filter.setter
+    def local_confidence_filter(self, value: bool):
+        self._local_confidence_filter = bool(value)
+
+    @property
+    def coalesce_requests(self) -> bool:
+        return self._coalesce_requests
+
+    @coalesce_requests.setter
+    def coalesce_requests(self, value: bool):
+        self._coalesce_requests = bool(value)
+
+    @property
+    def normalizer(self) -> DomainNormalizer or None:
+        return self._normalizer
+
+    @normalizer.setter
+    def normalizer(self, value: DomainNormalizer or None):
+        self._normalizer = value
+
+    def add_hook(self, event: str, callback):
+        """
+        Register an instrumentation callback, see `Hooks`.
+
+        Cache hits fire Hooks.AFTER_RESPONSE with `RequestInfo.cache` set
+        to 'hit', or 'stale' for expired results returned by
+        `RefreshAhead`, and no status code; API calls made on cache
+        misses report 'miss', background refreshes 'refresh'.
+
+        :param event: Use Hooks.BEFORE_REQUEST, Hooks.AFTER_RESPONSE,
+            Hooks.ON_ERROR constants
+        :param callback: callable receiving a `RequestInfo`
+        """
+        self._hooks.add(event, callback)
+
+    def remove_hook(self, event: str, callback):
+        self._hooks.remove(event, callback)
+
+    @property
+    def hooks(self) -> Hooks:
+        return self._hooks
+
+    def cache_info(self) -> CacheInfo or None:
+        """
+        Get cache statistics.
+
+        :return: `CacheInfo` or None if caching is disabled
+        """
+        return self._cache.info() if self._cache is not None else None
+
+    def cache_clear(self):
+        """
+        Drop all cached results.
+        """
+        if self._cache is not None:
+            self._cache.clear()
+
     @property
     def base_url(self) -> str:
         return self._api_requester.base_url
@@ -88,6 +255,7 @@ class Client:
         :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code
         :raises BadRequestError: Server returned 400 or 422 HTTP code
         :raises HttpApiError: HTTP code >= 300 and not equal to above codes
+        :raises CircuitOpenError: circuit breaker is open
         """
 
         _order = Client._validate_order(order) \
@@ -104,13 +272,17 @@ class Client:
         )
 
     def data(self, domain: str,
-             min_confidence: float or None = None) -> Response:
+             min_confidence: float or None = None,
+             output_format: str or None = None) -> Response:
         """
         Get parsed API response as a `Response` instance.
 
         :param domain: Domain name, string
         :param min_confidence: Minimal confidence value. The higher this
             value the fewer false-positive results will be returned, float
+        :param output_format: Format requested from the API, use
+            Client.JSON_FORMAT (default), Client.XML_FORMAT constants. The
+            result is the same
         :return: `Response` instance
         :raises ConnectionError:
         :raises WebsiteCategorizationApiError: Base class for all errors below
@@ -118,21 +290,74 @@ class Client:
         :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code
         :raises BadRequestError: Server returned 400 or 422 HTTP code
         :raises HttpApiError: HTTP code >= 300 and not equal to above codes
+        :raises CircuitOpenError: circuit breaker is open
         :raises ParameterError: invalid parameter's value
         """
 
-        output_format = Client._PARSABLE_FORMAT
+        if self.api_key == '':
+            raise EmptyApiKeyError('')
+
+        _domain = Client._validate_domain(domain, self._normalizer)
+        _confidence = Client._validate_confidence(min_confidence) \
+            if min_confidence is not None else None
+        _output_format = Client._validate_output_format(output_format) \
+            if output_format is not None else Client._PARSABLE_FORMAT
+        fetch_confidence, threshold = self._confidence_plan(_confidence)
 
-        response = self.raw_data(domain, min_confidence, output_format)
-        try:
-            parsed = loads(str(response))
-            if 'domainName' in parsed:
-                return Response(parsed)
-            raise UnparsableApiResponseError(
-                "Could not find the correct root element.", None)
-        except JSONDecodeError as error:
-            raise UnparsableApiResponseError(
-                "Could not parse API response", error) from error
+        # Parsed straight from the response bytes on cache misses
+        response = self._lookup(_domain, fetch_confidence, _output_format)
+        return Client._finish(response, threshold, _output_format)
+
+    def data_many(self, domains: Iterable[str],
+                  min_confidence: float or None = None,
+                  max_workers: int or None = None,
+                  ordered: bool = True) -> Iterator[Tuple[str, object]]:
+        """
+        Get parsed API responses for many domains concurrently.
+
+        Lookups run on a bounded thread pool sharing this client's
+        `ApiRequester`. Domain names are validated before submission, so
+        invalid ones never occupy a worker. If caching is enabled, domains
+        are looked up in the cache in batches before any network call.
+        A failed lookup does not abort the batch: its exception is yielded
+        in place of the response.
+
+        :param domains: Domain names, iterable of strings. Consumed lazily
+        :param min_confidence: Minimal confidence value, float
+        :param max_workers: Number of concurrent lookups, int. Defaults to
+            the requester's `pool_maxsize`
+        :param ordered: Yield results in input order if True, in
+            completion order otherwise
+        :return: iterator of (domain, `Response` or exception) pairs
+        :raises EmptyApiKeyError:
+        :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code.
+            Aborts the batch since no other lookup can succeed
+        :raises ParameterError: invalid min_confidence or max_workers
+        """
+
+        if self.api_key == '':
+            raise EmptyApiKeyError('')
+
+        _confidence = Client._validate_confidence(min_confidence) \
+            if min_confidence is not None else None
+        _workers = Client._validate_max_workers(max_workers) \
+            if max_workers is not None else self._api_requester.pool_maxsize
+
+        fetch_confidence, threshold = self._confidence_plan(_confidence)
+
+        def lookup(domain):
+            return Client._finish(
+                self._fetch(domain, fetch_confidence,
+                            Client._PARSABLE_FORMAT),
+                threshold)
+
+        with ThreadPoolExecutor(max_workers=_workers) as executor:
+            collect = Client._collect_ordered if ordered \
+                else Client._collect_unordered
+            yield from collect(
+                executor, lookup,
+                self._prepare(domains, fetch_confidence, threshold),
+                2 * _workers)
 
     def raw_data(self, domain: str, min_confidence: float or None = None,
                  output_format: str or None = None) -> str:
@@ -150,24 +375,90 @@ class Client:
         :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code
         :raises BadRequestError: Server returned 400 or 422 HTTP code
         :raises HttpApiError: HTTP code >= 300 and not equal to above codes
+        :raises CircuitOpenError: circuit breaker is open
         :raises ParameterError: invalid parameter's value
         """
 
         if self.api_key == '':
             raise EmptyApiKeyError('')
 
-        _domain = Client._validate_domain_name(domain)
+        _domain = Client._validate_domain(domain, self._normalizer)
         _confidence = Client._validate_confidence(min_confidence) \
             if min_confidence is not None else None
         _output_format = Client._validate_output_format(output_format) \
             if output_format is not None else None
 
-        return self._api_requester.get(self._build_payload(
+        response = self._lookup(_domain, _confidence, _output_format)
+        return response if isinstance(response, str) \
+            else response.decode('UTF-8')
+
+    def _lookup(self, domain: str, min_confidence: float or None,
+                output_format: str or None) -> bytes or str:
+        if self._cache is not None:
+            key = Client._cache_key(domain, min_confidence, output_format)
+            if self._refresh_ahead is None:
+                response, status = self._cache.get(key), 'hit'
+            else:
+                response, status = self._cached((key,)).get(
+                    key, (None, None))
+            if response is not None:
+                self._report_hit(response, status)
+                return response
+
+        return self._fetch(domain, min_confidence, output_format)
+
+    def _cached(self, keys: Iterable[tuple]) -> dict:
+        """
+        Cache lookup through the refresher, which queues the refreshes.
+
+        :return: dict of the keys found in the cache and (value, 'hit' or
+            'stale') pairs
+        """
+        refresher = self._refresh_ahead
+        found = {}
+        for key, (value, expires_in) in self._cache.get_entries(
+                keys, refresher.grace).items():
+            stale = refresher.observe(key, expires_in, self._refresh)
+            found[key] = (value, 'stale' if stale else 'hit')
+        return found
+
+    def _refresh(self, key: tuple):
+        domain, min_confidence, output_format = key
+        self._fetch(domain, min_confidence, output_format, 'refresh')
+
+    def _fetch(self, domain: str, min_confidence: float or None,
+               output_format: str or None,
+               cache_status: str = 'miss') -> bytes or str:
+        """
+        :param cache_status: Reported to hooks when the client has a cache
+        :return: undecoded body, or str if the client has a cache, since
+            it stores str
+        """
+        payload = self._build_payload(
             self.api_key,
-            _domain,
-            _confidence,
-            _output_format
-        ))
+            domain,
+            min_confidence,
+            output_format
+        )
+
+        def fetch():
+            if self._cache is None:
+                return self._api_requester.get_bytes(payload)
+
+            response = self._api_requester.get_bytes(
+                payload, cache_status).decode('UTF-8')
+            self._cache.set(
+                Client._cache_key(domain, min_confidence, output_format),
+                response,
+                self._cache.unresponsive_ttl
+                if Client._re_not_responded.search(response)
+                else self._cache.ttl)
+
+            return response
+
+        if self._coalesce_requests:
+            return self._flights.do(Client._flight_key(payload), fetch)
+        return fetch()
 
     @staticmethod
     def _validate_api_key(api_key) -> str:
@@ -180,11 +471,25 @@ class Client:
 
     @staticmethod
     def _validate_domain_name(value) -> str:
-        if Client._re_domain_name.search(str(value)) is not None:
-            return str(value)
+        name = str(value)
+        if problem(name) is None:
+            return name
 
         raise ParameterError("Invalid domain name")
 
+    @staticmethod
+    def _validate_domain(value, normalizer: DomainNormalizer or None) -> str:
+        if normalizer is not None:
+            value = normalizer.normalize(value)
+        return Client._validate_domain_name(value)
+
+    @staticmethod
+    def _validate_max_workers(value: int):
+        if type(value) is int and value >= 1:
+            return value
+
+        raise ParameterError("max_workers should be a positive int")
+
     @staticmethod
     def _validate_output_format(value: str):
         if value.lower() in {Client.JSON_FORMAT,
@@ -210,6 +515,52 @@ class Client:
 
         raise ParameterError("order should be 'ABC' or 'ID'")
 
+    @staticmethod
+    def _parse_response(response: bytes or str,
+                        output_format: str or None = None) -> Response:
+        if output_format == Client.XML_FORMAT:
+            parsed = xmlreader.loads(response)
+        else:
+            try:
+                parsed = loads(response)
+            except ValueError as error:
+                raise UnparsableApiResponseError(
+                    "Could not parse API response", error) from error
+        if isinstance(parsed, dict) and 'domainName' in parsed:
+            return Response(parsed)
+        raise UnparsableApiResponseError(
+            "Could not find the correct root element.", None)
+
+    def _confidence_plan(self, min_confidence: float or None) \
+            -> (float or None, float or None):
+        """
+        :return: threshold to send to the API and threshold to apply
+            locally, or None if the API does the filtering
+        """
+        if not self._local_confidence_filter:
+            return min_confidence, None
+
+        threshold = min_confidence if min_confidence is not None \
+            else Client.DEFAULT_MIN_CONFIDENCE
+        if threshold < Client._LOCAL_FILTER_FLOOR:
+            return min_confidence, None
+        return Client._LOCAL_FILTER_FLOOR, threshold
+
+    @staticmethod
+    def _finish(response: bytes or str, threshold: float or None,
+                output_format: str or None = None) -> Response:
+        parsed = Client._parse_response(response, output_format)
+        return parsed if threshold is None else parsed.filtered(threshold)
+
+    @staticmethod
+    def _flight_key(payload: dict) -> tuple:
+        return tuple(sorted(payload.items()))
+
+    @staticmethod
+    def _cache_key(domain, min_confidence, output_format) -> tuple:
+        return (domain.lower(), min_confidence,
+                output_format or Client.JSON_FORMAT)
+
     @staticmethod
     def _build_payload(
             api_key,
@@ -237,3 +588,113 @@ class Client:
         }
 
         return {k: v for (k, v) in tmp.items() if v is not None}
+
+    _PREPARE_BATCH = 256
+
+    def _prepare(self, domains: Iterable[str], min_confidence: float or None,
+                 threshold: float or None) -> Iterator[tuple]:
+        """
+        Validate domains and answer what the cache can.
+
+        :return: iterator of (domain, validated domain, result) tuples.
+            Result is an exception or a `Response` if no lookup is needed
+        """
+        batch = []
+        for domain in domains:
+            try:
+                batch.append((domain, Client._validate_domain(
+                    domain, self._normalizer), None))
+            except ParameterError as error:
+                batch.append((domain, None, error))
+            if len(batch) >= Client._PREPARE_BATCH:
+                yield from self._resolve_cached(
+                    batch, min_confidence, threshold)
+                batch = []
+        yield from self._resolve_cached(batch, min_confidence, threshold)
+
+    def _resolve_cached(self, batch: list, min_confidence: float or None,
+                        threshold: float or None) -> list:
+        if self._cache is None:
+            return batch
+
+        keys = {valid: Client._cache_key(valid, min_confidence, None)
+                for _, valid, error in batch if error is None}
+        if self._refresh_ahead is None:
+            hits = {key: (value, 'hit') for key, value
+                    in self._cache.get_many(keys.values()).items()}
+        else:
+            hits = self._cached(keys.values())
+        if not hits:
+            return batch
+
+        resolved = []
+        for domain, valid, result in batch:
+            if result is None and keys[valid] in hits:
+                value, status = hits[keys[valid]]
+                self._report_hit(value, status)
+                try:
+                    result = Client._finish(value, threshold)
+                except UnparsableApiResponseError as error:
+                    result = error
+                valid = None
+            resolved.append((domain, valid, result))
+        return resolved
+
+    def _report_hit(self, response: str, status: str = 'hit'):
+        if self._hooks.enabled:
+            info = RequestInfo('GET', None, cache=status)
+            info.response_size = len(response)
+            self._hooks.fire(Hooks.AFTER_RESPONSE, info)
+
+    @staticmethod
+    def _outcome(future):
+        try:
+            return future.result()
+        except ApiAuthError:
+            raise
+        except Exception as error:
+            return error
+
+    @staticmethod
+    def _collect_ordered(executor, lookup, items, window) -> Iterator[tuple]:
+        pending = deque()
+        try:
+            for domain, valid, result in items:
+                future = executor.submit(lookup, valid) if result is None \
+                    else None
+                pending.append((domain, future, result))
+                while len(pending) >= window or \
+                        (pending and pending[0][1] is None):
+                    domain, future, result = pending.popleft()
+                    yield domain, result if future is None \
+                        else Client._outcome(future)
+            while pending:
+                domain, future, result = pending.popleft()
+                yield domain, result if future is None \
+                    else Client._outcome(future)
+        finally:
+            for _, future, _ in pending:
+                if future is not None:
+                    future.cancel()
+
+    @staticmethod
+    def _collect_unordered(executor, lookup, items,
+                           window) -> Iterator[tuple]:
+        running = {}
+        try:
+            for domain, valid, result in items:
+                if result is not None:
+                    yield domain, result
+                    continue
+                while len(running) >= window:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield running.pop(future), Client._outcome(future)
+                running[executor.submit(lookup, valid)] = domain
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield running.pop(future), Client._outcome(future)
+        finally:
+            for future in running:
+                future.cancel()
@@ -0,0 +1,276 @@
+"""
+Column-oriented accumulation of bulk results.
+
+Columns are kept in typed stdlib arrays and lists while results arrive,
+so NumPy is only needed for exporting and querying
+(``pip install website-categorization[analytics]``).
+"""
+from array import array
+from typing import Iterable, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .exceptions.error import ParameterError
+from .models.response import Response
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("NumPy is required, install it with "
+                          "pip install website-categorization[analytics]")
+
+
+class ColumnarResults:
+    """
+    Bulk lookup results stored column by column.
+
+    Usage::
+
+        results = ColumnarResults(taxonomy=taxonomy)
+        results.extend(client.data_many(domains))
+        news = results.domains_with('News', min_confidence=0.6)
+        results.to_parquet('results.parquet')
+
+    Each result is one row of the domain, website_responded,
+    created_date, error and as_* columns. Categories form a sparse
+    domain x category matrix of confidences, stored as (row, category id,
+    confidence) triplets.
+
+    Failed lookups are rows with the exception type in the error column
+    and no categories. Appending is not thread-safe.
+    """
+    COLUMNS = ('domain', 'website_responded', 'created_date', 'error',
+               'as_asn', 'as_domain', 'as_name', 'as_route', 'as_type')
+
+    def __init__(self, **kwargs):
+        """
+
+        :key taxonomy: CategoryTaxonomy: (optional) Taxonomy whose ids are
+            the columns of `category_matrix`, and which resolves category
+            names in queries. By default the columns are the category ids
+            seen in results
+        """
+        self._taxonomy = kwargs.get('taxonomy', None)
+
+        self._domain = []
+        self._website_responded = array('b')
+        self._created_date = []
+        self._error = []
+        self._as_asn = array('q')
+        self._as_domain = []
+        self._as_name = []
+        self._as_route = []
+        self._as_type = []
+
+        self._category_row = array('q')
+        self._category_id = array('q')
+        self._confidence = array('d')
+
+        # NumPy copies of the columns, valid while no rows are added
+        self._exported = None
+
+    def __len__(self) -> int:
+        return len(self._domain)
+
+    def append(self, domain: str, result):
+        """
+        :param domain: Domain name, str
+        :param result: `Response` or the exception the lookup raised
+        """
+        row = len(self._domain)
+        self._exported = None
+        self._domain.append(domain)
+
+        if not isinstance(result, Response):
+            self._website_responded.append(0)
+            self._created_date.append('')
+            self._error.append(type(result).__name__)
+            self._append_as(None)
+            return
+
+        self._website_responded.append(1 if result.website_responded else 0)
+        self._created_date.append(result.created_date or '')
+        self._error.append('')
+        self._append_as(result.as_field)
+
+        # Packed (confidence, id, name) tuples unless the Category
+        # objects were already built
+        if result._categories is None:
+            packed = result._raw_categories or ()
+            for confidence, category_id, _ in packed:
+                self._category_row.append(row)
+                self._category_id.append(category_id)
+                self._confidence.append(confidence)
+        else:
+            for category in result._categories:
+                self._category_row.append(row)
+                self._category_id.append(category.id)
+                self._confidence.append(category.confidence)
+
+    def extend(self, results: Iterable[Tuple[str, object]]):
+        """
+        :param results: iterable of (domain, `Response` or exception)
+            pairs, such as `Client.data_many` or `xmlreader.iterparse`
+            output
+        """
+        for domain, result in results:
+            self.append(domain, result)
+
+    def to_numpy(self) -> dict:
+        """
+        :return: dict of column name to NumPy array, one element per
+            row. String columns are object arrays. The arrays are reused
+            by later calls until rows are added, do not modify them
+        :raises ImportError: NumPy is not installed
+        """
+        return dict(self._numpy()[0])
+
+    def categories(self) -> dict:
+        """
+        :return: the category matrix as 'row', 'category_id' and
+            'confidence' NumPy arrays, one element per (row, category)
+            pair, sorted by row
+        :raises ImportError: NumPy is not installed
+        """
+        return dict(self._numpy()[1])
+
+    def category_ids(self):
+        """
+        :return: NumPy array of the category ids that are the columns of
+            `category_matrix`, sorted
+        :raises ImportError: NumPy is not installed
+        """
+        _require_numpy()
+        if self._taxonomy is not None:
+            return numpy.array(sorted(c.id for c in self._taxonomy),
+                               dtype=numpy.int64)
+        return numpy.unique(self._numpy()[1]['category_id'])
+
+    def category_matrix(self):
+        """
+        Dense: for many rows and categories, `categories` holds the same
+        values in coordinate form, e.g. for ``scipy.sparse.coo_matrix``.
+
+        :return: NumPy float64 array of confidences, one row per result
+            and one column per `category_ids` element, 0 where the result
+            does not have the category
+        :raises ImportError: NumPy is not installed
+        """
+        triplets = self._numpy()[1]
+        ids = self.category_ids()
+        known = numpy.isin(triplets['category_id'], ids)
+        matrix = numpy.zeros((len(self), len(ids)), dtype=numpy.float64)
+        matrix[triplets['row'][known],
+               numpy.searchsorted(ids, triplets['category_id'][known])] = \
+            triplets['confidence'][known]
+        return matrix
+
+    def domains_with(self, category: int or str,
+                     min_confidence: float = 0.0):
+        """
+        Vectorized query of the category matrix.
+
+        :param category: Category id, int, or name, str, if the results
+            have a taxonomy
+        :param min_confidence: Minimal confidence, float
+        :return: NumPy array of domain names, in row order
+        :raises ImportError: NumPy is not installed
+        :raises ParameterError: unknown category name
+        """
+        columns, triplets = self._numpy()
+        if type(category) is not int:
+            entry = self._taxonomy.get(category) \
+                if self._taxonomy is not None else None
+            if entry is None:
+                raise ParameterError(
+                    "Unknown category {!r}".format(category))
+            category = entry.id
+
+        rows = triplets['row'][(triplets['category_id'] == category)
+                               & (triplets['confidence'] >= min_confidence)]
+        return columns['domain'][rows]
+
+    def to_arrow(self):
+        """
+        :return: pyarrow Table with one row per result and the categories
+            as a list<struct<id, confidence>> column
+        :raises ImportError: NumPy or pyarrow is not installed
+        """
+        columns, triplets = self._numpy()
+        import pyarrow
+
+        fields = {
+            'domain': pyarrow.array(columns['domain'], pyarrow.string()),
+            'website_responded': pyarrow.array(columns['website_responded']),
+            'created_date': pyarrow.array(columns['created_date'],
+                                          pyarrow.string()),
+            'error': pyarrow.array(columns['error'], pyarrow.string()),
+            'as_asn': pyarrow.array(columns['as_asn']),
+        }
+        for name in ('as_domain', 'as_name', 'as_route', 'as_type'):
+            fields[name] = pyarrow.array(columns[name], pyarrow.string())
+
+        # Rows are appended in order, so each row's categories are a
+        # contiguous slice of the triplets
+        offsets = numpy.searchsorted(
+            triplets['row'], numpy.arange(len(self) + 1)).astype(numpy.int32)
+        fields['categories'] = pyarrow.ListArray.from_arrays(
+            pyarrow.array(offsets),
+            pyarrow.StructArray.from_arrays(
+                [pyarrow.array(triplets['category_id']),
+                 pyarrow.array(triplets['confidence'])],
+                names=['id', 'confidence']))
+        return pyarrow.table(fields)
+
+    def to_parquet(self, path: str, **kwargs):
+        """
+        :param path: Path of the Parquet file to write
+        :param kwargs: passed to pyarrow.parquet.write_table
+        :raises ImportError: NumPy or pyarrow is not installed
+        """
+        table = self.to_arrow()
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(table, path, **kwargs)
+
+    def _append_as(self, as_field):
+        if as_field is None:
+            self._as_asn.append(0)
+            self._as_domain.append('')
+            self._as_name.append('')
+            self._as_route.append('')
+            self._as_type.append('')
+        else:
+            self._as_asn.append(as_field.asn)
+            self._as_domain.append(as_field.domain)
+            self._as_name.append(as_field.name)
+            self._as_route.append(as_field.route)
+            self._as_type.append(as_field.type)
+
+    def _numpy(self) -> (dict, dict):
+        _require_numpy()
+        if self._exported is None:
+            columns = {
+                'website_responded': numpy.frombuffer(
+                    self._website_responded, numpy.int8).astype(bool),
+                'as_asn': numpy.frombuffer(self._as_asn, numpy.int64).copy(),
+            }
+            for name in ('domain', 'created_date', 'error', 'as_domain',
+                         'as_name', 'as_route', 'as_type'):
+                column = numpy.empty(len(self), dtype=object)
+                column[:] = getattr(self, '_' + name)
+                columns[name] = column
+            triplets = {
+                'row': numpy.frombuffer(
+                    self._category_row, numpy.int64).copy(),
+                'category_id': numpy.frombuffer(
+                    self._category_id, numpy.int64).copy(),
+                'confidence': numpy.frombuffer(
+                    self._confidence, numpy.float64).copy(),
+            }
+            self._exported = ({name: columns[name]
+                               for name in ColumnarResults.COLUMNS},
+                              triplets)
+        return self._exported
@@ -0,0 +1,24 @@
+"""
+JSON decoding backend.
+
+Uses orjson when it is installed (``pip install
+website-categorization[fast]``) and the standard library otherwise. Both
+accept the raw response bytes, so bodies never need to be decoded into an
+intermediate str.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    BACKEND = 'orjson'
+    # Raises orjson.JSONDecodeError, a subclass of ValueError
+    loads = orjson.loads
+else:
+    BACKEND = 'json'
+    # Raises json.JSONDecodeError or UnicodeDecodeError, both ValueError
+    loads = json.loads
@@ -1,7 +1,9 @@
 __all__ = ['ParameterError', 'HttpApiError', 'WebsiteCategorizationApiError',
            'ApiAuthError', 'ResponseError', 'EmptyApiKeyError',
-           'UnparsableApiResponseError']
+           'UnparsableApiResponseError', 'BadRequestError',
+           'CircuitOpenError']
 
 from .error import ParameterError, HttpApiError, \
     WebsiteCategorizationApiError, ApiAuthError, ResponseError, \
-    EmptyApiKeyError, UnparsableApiResponseError
+    EmptyApiKeyError, UnparsableApiResponseError, BadRequestError, \
+    CircuitOpenError
@@ -1,4 +1,3 @@
-from json import loads
 from ..models.response import ErrorMessage
 
 
@@ -29,15 +28,21 @@ class EmptyApiKeyError(WebsiteCategorizationApiError):
 class ResponseError(WebsiteCategorizationApiError):
     def __init__(self, message):
         self.message = message
-        self._parsed_message = None
-        try:
-            parsed = loads(message)
-            self.parsed_message = ErrorMessage(parsed)
-        except Exception:
-            pass
 
     @property
     def parsed_message(self):
+        """`ErrorMessage` parsed on first access, None if unparsable"""
+        try:
+            return self._parsed_message
+        except AttributeError:
+            pass
+        # Imported here, as the JSON backend is not needed until a
+        # response is parsed
+        from ..decoding import loads
+        try:
+            self._parsed_message = ErrorMessage(loads(self.message))
+        except Exception:
+            self._parsed_message = None
         return self._parsed_message
 
     @parsed_message.setter
@@ -69,3 +74,7 @@ class BadRequestError(ResponseError):
 
 class HttpApiError(WebsiteCategorizationApiError):
     pass
+
+
+class CircuitOpenError(WebsiteCategorizationApiError):
+    pass
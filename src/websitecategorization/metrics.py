@@ -0,0 +1,192 @@
+from bisect import bisect_left
+import threading
+
+from .net.hooks import Hooks, RequestInfo
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int):
+        # One count per bucket plus the +Inf bucket, not cumulative
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsCollector:
+    """
+    Counters and latency histograms fed by instrumentation hooks.
+
+    Usage::
+
+        metrics = MetricsCollector()
+        metrics.attach(client)
+        ...
+        print(metrics.to_prometheus())
+
+    One collector may be attached to several clients or requesters.
+    """
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                       5.0, 10.0)
+
+    # Histogram name -> RequestInfo attribute
+    _TIMINGS = (('queue_wait', 'queue_wait'), ('connect', 'connect'),
+                ('ttfb', 'ttfb'), ('total', 'total'))
+
+    def __init__(self, **kwargs):
+        """
+
+        :key buckets: iterable: (optional) Upper bounds of the latency
+            histogram buckets in seconds, Prometheus defaults by default
+        :key prefix: str: (optional) Prefix of exported metric names,
+            'website_categorization' by default
+        """
+        self._buckets = tuple(sorted(
+            kwargs.get('buckets', MetricsCollector.DEFAULT_BUCKETS)))
+        if not self._buckets:
+            raise ValueError("buckets should not be empty")
+        self._prefix = kwargs.get('prefix', 'website_categorization')
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def attach(self, target):
+        """
+        Register the collector's hooks.
+
+        :param target: `Client`, `AsyncClient`, `ApiRequester` or
+            `AsyncApiRequester`
+        """
+        target.add_hook(Hooks.AFTER_RESPONSE, self.after_response)
+        target.add_hook(Hooks.ON_ERROR, self.on_error)
+
+    def detach(self, target):
+        target.remove_hook(Hooks.AFTER_RESPONSE, self.after_response)
+        target.remove_hook(Hooks.ON_ERROR, self.on_error)
+
+    def reset(self):
+        with self._lock:
+            self._responses = {}
+            self._errors = {}
+            self._retries = 0
+            self._cache = {'hit': 0, 'miss': 0}
+            self._bytes = 0
+            self._histograms = {name: _Histogram(len(self._buckets))
+                                for name, _ in MetricsCollector._TIMINGS}
+
+    def after_response(self, info: RequestInfo):
+        with self._lock:
+            if info.cache is not None:
+                self._cache[info.cache] = self._cache.get(info.cache, 0) + 1
+            if info.status_code is None:
+                return
+            self._responses[info.status_code] = \
+                self._responses.get(info.status_code, 0) + 1
+            self._bytes += info.response_size or 0
+            self._count_attempt(info)
+
+    def on_error(self, info: RequestInfo):
+        name = type(info.error).__name__
+        with self._lock:
+            self._errors[name] = self._errors.get(name, 0) + 1
+            self._count_attempt(info)
+
+    def as_dict(self) -> dict:
+        """
+        :return: snapshot of all metrics. Histogram buckets map upper
+            bounds to cumulative counts, like Prometheus
+        """
+        with self._lock:
+            return {
+                'responses': dict(self._responses),
+                'errors': dict(self._errors),
+                'retries': self._retries,
+                'cache': dict(self._cache),
+                'response_bytes': self._bytes,
+                'latency': {
+                    name: {
+                        'buckets': dict(zip(
+                            self._buckets + (float('inf'),),
+                            MetricsCollector._cumulative(histogram.counts))),
+                        'sum': histogram.sum,
+                        'count': histogram.count,
+                    }
+                    for name, histogram in self._histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        :return: metrics in the Prometheus text exposition format
+        """
+        snapshot = self.as_dict()
+        prefix = self._prefix
+        lines = []
+
+        def metric(name, kind, description):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, description))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+
+        metric('responses_total', 'counter', 'API responses by HTTP status.')
+        for status, count in sorted(snapshot['responses'].items()):
+            lines.append('{}_responses_total{{status="{}"}} {}'.format(
+                prefix, status, count))
+
+        metric('errors_total', 'counter',
+               'API call attempts that raised, by exception type.')
+        for error, count in sorted(snapshot['errors'].items()):
+            lines.append('{}_errors_total{{type="{}"}} {}'.format(
+                prefix, error, count))
+
+        metric('retries_total', 'counter', 'Retried API call attempts.')
+        lines.append('{}_retries_total {}'.format(
+            prefix, snapshot['retries']))
+
+        metric('cache_lookups_total', 'counter',
+               'Result cache lookups by outcome.')
+        for outcome, count in sorted(snapshot['cache'].items()):
+            lines.append('{}_cache_lookups_total{{result="{}"}} {}'.format(
+                prefix, outcome, count))
+
+        metric('response_bytes_total', 'counter',
+               'Bytes of API response bodies.')
+        lines.append('{}_response_bytes_total {}'.format(
+            prefix, snapshot['response_bytes']))
+
+        metric('request_duration_seconds', 'histogram',
+               'API call attempt timings by phase.')
+        for phase, histogram in snapshot['latency'].items():
+            name = '{}_request_duration_seconds'.format(prefix)
+            for bound, count in histogram['buckets'].items():
+                lines.append('{}_bucket{{phase="{}",le="{}"}} {}'.format(
+                    name, phase,
+                    '+Inf' if bound == float('inf') else repr(bound),
+                    count))
+            lines.append('{}_sum{{phase="{}"}} {}'.format(
+                name, phase, repr(histogram['sum'])))
+            lines.append('{}_count{{phase="{}"}} {}'.format(
+                name, phase, histogram['count']))
+
+        return '\n'.join(lines) + '\n'
+
+    def _count_attempt(self, info: RequestInfo):
+        if info.attempt > 1:
+            self._retries += 1
+        for name, attribute in MetricsCollector._TIMINGS:
+            value = getattr(info, attribute)
+            if value is None:
+                continue
+            histogram = self._histograms[name]
+            histogram.counts[bisect_left(self._buckets, value)] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    @staticmethod
+    def _cumulative(counts: list) -> list:
+        total = 0
+        result = []
+        for count in counts:
+            total += count
+            result.append(total)
+        return result
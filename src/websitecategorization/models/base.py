@@ -1,10 +1,22 @@
 class BaseModel:
-    def __init__(self):
-        pass
+    __slots__ = ()
+
+    # Public attribute names of slotted models, in display order. Models
+    # without it expose their instance __dict__
+    _FIELDS = None
+
+    def _items(self):
+        if self._FIELDS is None:
+            return list(self.__dict__.items())
+        return [(name, getattr(self, name)) for name in self._FIELDS]
+
+    def _comparable(self) -> tuple:
+        """Hashable values compared by `__eq__`"""
+        return tuple(self._items())
 
     def __str__(self):
         result = {}
-        for k, v in self.__dict__.items():
+        for k, v in self._items():
             result[k] = str(v)
         return str(result)
 
@@ -12,13 +24,19 @@ class BaseModel:
         return self.__str__()
 
     def __eq__(self, other):
-        is_equal = isinstance(other, self.__class__)
-        for k, v in self.__dict__.values():
-            is_equal = is_equal and (other.__dict__.get(k) == v)
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._comparable() == other._comparable()
 
-        return is_equal
+    def __hash__(self):
+        # Fields are not changed after parsing
+        return hash((self.__class__, self._comparable()))
 
     def __getitem__(self, item):
-        if type(item) is str and item in self.__dict__:
-            return self.__dict__[item]
+        if type(item) is str and not item.startswith('_'):
+            if self._FIELDS is None:
+                if item in self.__dict__:
+                    return self.__dict__[item]
+            elif item in self._FIELDS:
+                return getattr(self, item)
         raise KeyError("Invalid key: {}".format(item))
@@ -1,67 +1,99 @@
 import copy
-
-from .base import BaseModel
 import sys
 
-if sys.version_info < (3, 9):
-    import typing
+from .base import BaseModel
 
 
 def _string_value(values: dict, key: str) -> str:
-    if key in values and values[key]:
-        return str(values[key])
-    return ''
+    value = values.get(key)
+    return str(value) if value else ''
 
 
-def _float_value(values: dict, key: str) -> float:
-    if key in values and values[key]:
-        return float(values[key])
-    return 0.0
-
-
-def _int_value(values: dict, key: str) -> int:
-    if key in values and values[key]:
-        return int(values[key])
-    return 0
+def _interned_value(values: dict, key: str) -> str:
+    # For values repeated across responses, such as category and AS names
+    value = values.get(key)
+    return sys.intern(str(value)) if value else ''
 
 
-def _list_value(values: dict, key: str) -> list:
-    if key in values and type(values[key]) is list:
-        return copy.deepcopy(values[key])
-    return []
+def _float_value(values: dict, key: str) -> float:
+    value = values.get(key)
+    return float(value) if value else 0.0
 
 
-def _list_of_objects(values: dict, key: str, classname: str) -> list:
-    r = []
-    if key in values and type(values[key]) is list:
-        r = [globals()[classname](x) for x in values[key]]
-    return r
+def _int_value(values: dict, key: str) -> int:
+    value = values.get(key)
+    return int(value) if value else 0
 
 
 def _bool_value(values: dict, key: str) -> bool:
-    if key in values and values[key]:
-        return bool(values[key])
-    return False
+    return bool(values.get(key))
 
 
 class Category(BaseModel):
+    __slots__ = ('confidence', 'id', 'name')
+    _FIELDS = __slots__
+
     confidence: float
     id: int
     name: str
 
     def __init__(self, values):
-        super().__init__()
-        self.confidence = 0.0
-        self.name = ""
-        self.id = 0
-
         if values is not None:
             self.confidence = _float_value(values, 'confidence')
             self.id = _int_value(values, 'id')
-            self.name = _string_value(values, 'name')
+            self.name = _interned_value(values, 'name')
+        else:
+            self.confidence = 0.0
+            self.id = 0
+            self.name = ""
+
+    @staticmethod
+    def _pack(values: dict) -> tuple:
+        return (_float_value(values, 'confidence'), _int_value(values, 'id'),
+                _interned_value(values, 'name'))
+
+    @staticmethod
+    def _unpack(packed: tuple) -> 'Category':
+        category = Category.__new__(Category)
+        category.confidence, category.id, category.name = packed
+        return category
+
+    def resolve(self, taxonomy) -> 'TaxonomyCategory' or None:
+        """
+        :param taxonomy: `CategoryTaxonomy`
+        :return: taxonomy entry of this category, None if it has none
+        """
+        return taxonomy.get(self.id)
+
+
+class TaxonomyCategory(BaseModel):
+    """Entry of the category list returned by `Client.list_categories`"""
+    __slots__ = ('id', 'name', 'parent', 'tier')
+    _FIELDS = __slots__
+
+    id: int
+    name: str
+    parent: int or None
+    tier: int
+
+    def __init__(self, values):
+        if values is not None:
+            self.id = _int_value(values, 'id')
+            self.name = _interned_value(values, 'name')
+            parent = values.get('parent')
+            self.parent = int(parent) if parent else None
+            self.tier = _int_value(values, 'tier')
+        else:
+            self.id = 0
+            self.name = ""
+            self.parent = None
+            self.tier = 0
 
 
 class AS(BaseModel):
+    __slots__ = ('asn', 'domain', 'name', 'route', 'type')
+    _FIELDS = __slots__
+
     asn: int
     domain: str
     name: str
@@ -69,47 +101,98 @@ class AS(BaseModel):
     type: str
 
     def __init__(self, values):
-        super().__init__()
-        self.asn = 0
-        self.domain = ""
-        self.name = ""
-        self.route = ""
-        self.type = ""
-
         if values is not None:
             self.asn = _int_value(values, 'asn')
-            self.domain = _string_value(values, 'domain')
-            self.name = _string_value(values, 'name')
-            self.route = _string_value(values, 'route')
-            self.type = _string_value(values, 'type')
+            self.domain = _interned_value(values, 'domain')
+            self.name = _interned_value(values, 'name')
+            self.route = _interned_value(values, 'route')
+            self.type = _interned_value(values, 'type')
+        else:
+            self.asn = 0
+            self.domain = ""
+            self.name = ""
+            self.route = ""
+            self.type = ""
 
 
 class Response(BaseModel):
+    """
+    Parsed API response.
+
+    Category objects are built on first access to `categories`; until
+    then the response keeps their values in plain tuples.
+    """
+    __slots__ = ('as_field', 'domain_name', 'created_date',
+                 'website_responded', '_categories', '_raw_categories')
+    _FIELDS = ('as_field', 'domain_name', 'categories', 'created_date',
+               'website_responded')
+
     as_field: AS or None
     domain_name: str
-    if sys.version_info < (3, 9):
-        categories: typing.List[Category]
-    else:
-        categories: [Category]
     created_date: str or None
     website_responded: bool
 
     def __init__(self, values):
-        super().__init__()
-
-        self.as_field = None
-        self.domain_name = ""
-        self.categories = []
-        self.created_date = None
-        self.website_responded = False
+        self._categories = None
+        self._raw_categories = None
 
         if values is not None:
-            if 'as' in values and values['as']:
-                self.as_field = AS(values['as'])
+            as_values = values.get('as')
+            self.as_field = AS(as_values) if as_values else None
             self.domain_name = _string_value(values, 'domainName')
-            self.categories = _list_of_objects(values, 'categories', 'Category')
+            raw = values.get('categories')
+            if type(raw) is list and raw:
+                # Plain tuples are much smaller than the parsed dicts
+                self._raw_categories = [Category._pack(c) for c in raw]
             self.created_date = _string_value(values, 'createdDate')
             self.website_responded = _bool_value(values, 'websiteResponded')
+        else:
+            self.as_field = None
+            self.domain_name = ""
+            self.created_date = None
+            self.website_responded = False
+
+    @property
+    def categories(self) -> list:
+        """List of `Category`, built on first access"""
+        if self._categories is None:
+            raw = self._raw_categories
+            self._categories = [Category._unpack(x) for x in raw] \
+                if raw is not None else []
+            self._raw_categories = None
+        return self._categories
+
+    @categories.setter
+    def categories(self, value: list):
+        self._categories = value
+        self._raw_categories = None
+
+    def _comparable(self) -> tuple:
+        # Categories as tuples, so that comparing does not build them
+        if self._categories is None:
+            categories = tuple(self._raw_categories or ())
+        else:
+            categories = tuple((c.confidence, c.id, c.name)
+                               for c in self._categories)
+        return (self.as_field, self.domain_name, categories,
+                self.created_date, self.website_responded)
+
+    def filtered(self, min_confidence: float) -> 'Response':
+        """
+        Get a copy keeping only categories the API would return for the
+        given minConfidence value, i.e. confidence >= min_confidence.
+
+        :param min_confidence: Minimal confidence value, float
+        :return: `Response` instance
+        """
+        result = copy.copy(self)
+        if self._categories is None and self._raw_categories is not None:
+            result._raw_categories = [
+                c for c in self._raw_categories if c[0] >= min_confidence]
+        else:
+            result._categories = [c for c in self.categories
+                                  if c.confidence >= min_confidence]
+        return result
 
 
 class ErrorMessage(BaseModel):
@@ -119,7 +202,7 @@ class ErrorMessage(BaseModel):
     def __init__(self, values):
         super().__init__()
 
-        self.int = 0
+        self.code = 0
         self.message = ''
 
         if values is not None:
@@ -1,3 +1,40 @@
-__all__ = ['ApiRequester']
+__all__ = ['ApiRequester', 'AsyncApiRequester', 'RateLimiter',
+           'RetryPolicy', 'CircuitBreaker', 'HedgePolicy', 'Hooks',
+           'RequestInfo', 'Transport', 'TransportResponse',
+           'RequestsTransport', 'Urllib3Transport', 'ReplayTransport',
+           'RecordingTransport']
 
-from .http import ApiRequester
+from importlib import import_module
+
+# Imported on first access, so that e.g. hooks do not load requests
+_MODULES = {
+    'ApiRequester': '.http',
+    'AsyncApiRequester': '.async_http',
+    'RateLimiter': '.ratelimit',
+    'RetryPolicy': '.retry',
+    'CircuitBreaker': '.retry',
+    'HedgePolicy': '.hedging',
+    'Hooks': '.hooks',
+    'RequestInfo': '.hooks',
+    'Transport': '.transport',
+    'TransportResponse': '.transport',
+    'RequestsTransport': '.transport',
+    'Urllib3Transport': '.transport',
+    'ReplayTransport': '.transport',
+    'RecordingTransport': '.transport',
+}
+
+
+def __getattr__(name: str):
+    try:
+        module = _MODULES[name]
+    except KeyError:
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name)) from None
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
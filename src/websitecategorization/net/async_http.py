@@ -0,0 +1,697 @@
+from base64 import b64encode
+from json import dumps
+from urllib.parse import urlsplit, urlencode, unquote
+from urllib.request import getproxies, proxy_bypass
+from .hedging import HedgePolicy
+from .hooks import Hooks, RequestInfo
+from .http import ApiRequester
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy, CircuitBreaker, _failed_attempt
+from ..exceptions.error import HttpApiError
+from ..version import VERSION, LIBRARY_NAME
+import asyncio
+import logging
+import ssl
+import time
+
+
+def _authority(host: str, port: int or None) -> str:
+    """host[:port] for request lines and Host headers, without userinfo"""
+    if ':' in host:
+        host = '[{}]'.format(host)
+    return host if port is None else '{}:{}'.format(host, port)
+
+
+class _Connection:
+    __slots__ = ('reader', 'writer', 'last_used')
+
+    def __init__(self, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncApiRequester:
+    """
+    asyncio counterpart of `ApiRequester`.
+
+    Speaks HTTP/1.1 over pooled keep-alive connections using only the
+    standard library. Like ``requests``, it sends requests through the
+    proxies of the HTTP_PROXY, HTTPS_PROXY and NO_PROXY environment
+    variables, read on the first request to each host; only http://
+    proxies are supported. Unlike ``requests``, it does not follow
+    redirects: a 3xx response raises `HttpApiError`.
+    """
+    __logger = logging.getLogger("async-api-requester")
+    __connect_timeout = 5
+    __user_agent = "{name}/{ver}".format(name=LIBRARY_NAME, ver=VERSION)
+    _base_url: str
+    _timeout: float
+    _pool_maxsize: int
+    _keep_alive: float
+    _max_response_size: int
+
+    def __init__(self, **kwargs):
+        """
+
+        :param kwargs: Supported parameters:
+        - base_url: (optional) API endpoint URL; str
+        - timeout: (optional) API call timeout in seconds; float
+        - pool_maxsize: (optional) Maximum number of idle connections kept
+            open per host; int
+        - keep_alive: (optional) Idle time in seconds after which pooled
+            connections are dropped; float
+        - max_response_size: (optional) Size in bytes above which a
+            response body raises `HttpApiError`, 32 MiB by default; int
+        - rate_limit: (optional) Maximum number of requests per second,
+            adapted down on HTTP 429/503; float
+        - burst: (optional) Number of requests that may be sent at once
+            when rate_limit is set; int
+        - rate_limiter: (optional) `RateLimiter` to use instead of
+            rate_limit/burst, e.g. one shared with other requesters
+        - retry_policy: (optional) `RetryPolicy` for failed calls; calls
+            are not retried by default
+        - circuit_breaker: (optional) `CircuitBreaker` to fail fast while
+            the endpoint is unhealthy
+        - hedge_policy: (optional) `HedgePolicy` sending a second request
+            when a call is slow; calls are not hedged by default
+        - hooks: (optional) `Hooks` with instrumentation callbacks, e.g.
+            shared with other requesters
+        """
+        self._base_url = ''
+        self.timeout = 30
+        self.pool_maxsize = 10
+        self.keep_alive = 60
+        self.max_response_size = 32 * 1024 * 1024
+
+        self._idle = {}
+        # (scheme, host, port) -> proxy address and credentials, or None
+        self._proxies = {}
+        self._ssl_context = None
+
+        if 'base_url' in kwargs:
+            self.base_url = kwargs['base_url']
+        if 'timeout' in kwargs:
+            self.timeout = kwargs['timeout']
+        if 'pool_maxsize' in kwargs:
+            self.pool_maxsize = kwargs['pool_maxsize']
+        if 'keep_alive' in kwargs:
+            self.keep_alive = kwargs['keep_alive']
+        if 'max_response_size' in kwargs:
+            self.max_response_size = kwargs['max_response_size']
+
+        self.rate_limiter = kwargs.get('rate_limiter', None)
+        if kwargs.get('rate_limit') is not None:
+            limits = {'burst': kwargs['burst']} if 'burst' in kwargs else {}
+            self.rate_limiter = RateLimiter(kwargs['rate_limit'], **limits)
+
+        self.retry_policy = kwargs.get('retry_policy', None)
+        self.circuit_breaker = kwargs.get('circuit_breaker', None)
+        self.hedge_policy = kwargs.get('hedge_policy', None)
+        self.hooks = kwargs.get('hooks', None) or Hooks()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, url: str):
+        if url is None or len(url) <= 8 or not url.startswith('http'):
+            raise ValueError("Invalid URL specified.")
+        self._base_url = url
+
+    @property
+    def timeout(self) -> float:
+        """API call timeout in seconds"""
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value: float):
+        """API call timeout in seconds"""
+        if value is not None and 1 <= value <= 60:
+            self._timeout = value
+        else:
+            raise ValueError("Timeout value should be in [1, 60]")
+
+    @property
+    def pool_maxsize(self) -> int:
+        """Maximum number of idle connections kept open per host"""
+        return self._pool_maxsize
+
+    @pool_maxsize.setter
+    def pool_maxsize(self, value: int):
+        if type(value) is int and value >= 1:
+            self._pool_maxsize = value
+        else:
+            raise ValueError("pool_maxsize should be a positive int")
+
+    @property
+    def rate_limiter(self) -> RateLimiter or None:
+        return self._rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, value: RateLimiter or None):
+        self._rate_limiter = value
+
+    @property
+    def retry_policy(self) -> RetryPolicy or None:
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: RetryPolicy or None):
+        self._retry_policy = value
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker or None:
+        return self._circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, value: CircuitBreaker or None):
+        self._circuit_breaker = value
+
+    @property
+    def hedge_policy(self) -> HedgePolicy or None:
+        return self._hedge_policy
+
+    @hedge_policy.setter
+    def hedge_policy(self, value: HedgePolicy or None):
+        self._hedge_policy = value
+
+    @property
+    def hooks(self) -> Hooks:
+        return self._hooks
+
+    @hooks.setter
+    def hooks(self, value: Hooks):
+        self._hooks = value
+
+    def add_hook(self, event: str, callback):
+        """
+        Register an instrumentation callback, see `Hooks`.
+
+        :param event: Use Hooks.BEFORE_REQUEST, Hooks.AFTER_RESPONSE,
+            Hooks.ON_ERROR constants
+        :param callback: callable receiving a `RequestInfo`
+        """
+        self._hooks.add(event, callback)
+
+    def remove_hook(self, event: str, callback):
+        self._hooks.remove(event, callback)
+
+    @property
+    def keep_alive(self) -> float:
+        """Idle time in seconds after which pooled connections are dropped"""
+        return self._keep_alive
+
+    @keep_alive.setter
+    def keep_alive(self, value: float):
+        if value is not None and value > 0:
+            self._keep_alive = value
+        else:
+            raise ValueError("keep_alive should be a positive number")
+
+    @property
+    def max_response_size(self) -> int:
+        """Size in bytes above which a response body raises an error"""
+        return self._max_response_size
+
+    @max_response_size.setter
+    def max_response_size(self, value: int):
+        if type(value) is int and value >= 1:
+            self._max_response_size = value
+        else:
+            raise ValueError("max_response_size should be a positive int")
+
+    async def close(self):
+        """
+        Close all pooled connections.
+
+        The requester stays usable: new connections are opened on demand,
+        and proxy environment variables are read again.
+        """
+        idle, self._idle = self._idle, {}
+        self._proxies = {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    async def get(self, payload: dict,
+                  cache_status: str or None = None) -> str:
+        return await self._call('GET', self.base_url, payload,
+                                cache_status=cache_status)
+
+    async def get_bytes(self, payload: dict,
+                        cache_status: str or None = None) -> bytes:
+        """
+        Like `get`, but return the undecoded response body, which
+        `decoding.loads` parses without an intermediate str.
+        """
+        return await self._call('GET', self.base_url, payload,
+                                cache_status=cache_status, decode=False)
+
+    async def post(self, data: dict,
+                   cache_status: str or None = None) -> str:
+        headers = {'Content-Type': 'application/json'}
+        if 'apiKey' in data:
+            headers['X-Authentication-Token'] = data.pop('apiKey')
+
+        return await self._call('POST', self.base_url, None, headers,
+                                dumps(data).encode('utf-8'), cache_status)
+
+    async def get_categories(self, payload: dict) -> str:
+        return await self._call('GET', self.base_url + '/categories', payload)
+
+    async def _call(self, method: str, url: str, params: dict or None,
+                    headers: dict or None = None,
+                    body: bytes = b'',
+                    cache_status: str or None = None,
+                    decode: bool = True) -> str or bytes:
+        policy = self._retry_policy
+        breaker = self._circuit_breaker
+        hooks = self._hooks
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            attempt += 1
+            if breaker is not None:
+                breaker.before_call()
+
+            info = RequestInfo(method, url, attempt, cache_status) \
+                if hooks.enabled else None
+            status = response_headers = error = None
+            try:
+                status, response_headers, content = await self._send(
+                    method, url, params, headers or {}, body,
+                    policy.remaining(started) if policy is not None
+                    else None,
+                    info)
+            except BaseException as failure:
+                # Other errors, and KeyboardInterrupt, are raised at once
+                if not isinstance(failure, Exception) \
+                        or not _failed_attempt(failure, policy):
+                    if breaker is not None:
+                        breaker.release()
+                    if info is not None:
+                        info.error = failure
+                        hooks.fire(Hooks.ON_ERROR, info)
+                    raise
+                error = failure
+
+            if info is not None:
+                if error is None:
+                    hooks.fire(Hooks.AFTER_RESPONSE, info)
+                else:
+                    info.error = error
+                    hooks.fire(Hooks.ON_ERROR, info)
+
+            if breaker is not None:
+                breaker.record(error is None and status < 500)
+
+            delay = None
+            if policy is not None:
+                delay = policy.retry_delay(
+                    attempt, started, status, error,
+                    response_headers.get('retry-after')
+                    if response_headers is not None else None)
+            if delay is None:
+                if error is not None:
+                    raise error
+                if decode:
+                    return ApiRequester._handle_body(status, content)
+                return ApiRequester._check_body(status, content)
+
+            AsyncApiRequester.__logger.debug(
+                "Attempt %d failed (%s), retrying in %.2fs", attempt,
+                error if error is not None else status, delay)
+            await asyncio.sleep(delay)
+
+    async def _send(self, method: str, url: str, params: dict or None,
+                    headers: dict, body: bytes, remaining: float or None,
+                    info: RequestInfo or None) -> (int, dict, bytes):
+        if self._rate_limiter is not None:
+            if info is None:
+                await self._rate_limiter.acquire_async()
+            else:
+                queued = time.perf_counter()
+                await self._rate_limiter.acquire_async()
+                info.queue_wait = time.perf_counter() - queued
+
+        timeout = self.timeout if remaining is None \
+            else max(0.001, min(self.timeout, remaining))
+
+        if info is not None:
+            self._hooks.fire(Hooks.BEFORE_REQUEST, info)
+        sent = time.perf_counter()
+        try:
+            if self._hedge_policy is None:
+                status, response_headers, content = await asyncio.wait_for(
+                    self._request(method, url, params, headers, body, info),
+                    timeout)
+            else:
+                status, response_headers, content = \
+                    await self._hedged_request(
+                        lambda attempt_info: asyncio.wait_for(self._request(
+                            method, url, params, headers, body,
+                            attempt_info), timeout),
+                        info)
+        finally:
+            if info is not None:
+                info.total = time.perf_counter() - sent
+
+        if info is not None:
+            info.status_code = status
+            info.response_size = len(content)
+
+        if AsyncApiRequester.__logger.isEnabledFor(logging.DEBUG):
+            AsyncApiRequester.__logger.debug(
+                "%s %s -> %d (%d bytes) in %.1f ms", method, url, status,
+                len(content), (time.perf_counter() - sent) * 1000)
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.feedback(status,
+                                        response_headers.get('retry-after'))
+        return status, response_headers, content
+
+    async def _hedged_request(self, request, info: RequestInfo or None) \
+            -> (int, dict, bytes):
+        """
+        Await `request`, and a second one if the hedge policy says the
+        first is slow. The first response wins; the other is cancelled.
+
+        :param request: callable returning a `_request` coroutine, given
+            the `RequestInfo` to fill in
+        """
+        policy = self._hedge_policy
+
+        async def send(hedged: bool) -> tuple:
+            if hedged and self._rate_limiter is not None:
+                await self._rate_limiter.acquire_async()
+            sent = time.perf_counter()
+            # Timings are those of the first request
+            response = await request(None if hedged else info)
+            return response, time.perf_counter() - sent, hedged
+
+        delay = policy.start()
+        running = {asyncio.ensure_future(send(False))}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(running, timeout=delay)
+                if not done and policy.allow():
+                    AsyncApiRequester.__logger.debug(
+                        "No response after %.3fs, hedging", delay)
+                    running.add(asyncio.ensure_future(send(True)))
+
+            error = None
+            while running:
+                done, running = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        response, latency, hedged = task.result()
+                    except Exception as failure:
+                        # The other request may still answer
+                        error = error or failure
+                        continue
+                    policy.record(latency, hedged)
+                    if info is not None:
+                        info.hedged = hedged
+                    return response
+            raise error
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _request(self, method: str, url: str, params: dict or None,
+                       headers: dict, body: bytes,
+                       info: RequestInfo or None = None) \
+            -> (int, dict, bytes):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname,
+               parts.port or (443 if parts.scheme == 'https' else 80))
+        proxy = self._proxy(key)
+        authority = _authority(parts.hostname, parts.port)
+
+        target = parts.path or '/'
+        if params:
+            target += '?' + urlencode(params)
+        if proxy is not None and parts.scheme == 'http':
+            # Forwarded by the proxy, which needs the absolute URL
+            target = '{}://{}{}'.format(parts.scheme, authority, target)
+
+        lines = ["{} {} HTTP/1.1".format(method, target),
+                 "Host: {}".format(authority),
+                 "User-Agent: {}".format(AsyncApiRequester.__user_agent),
+                 "Accept-Encoding: identity",
+                 "Content-Length: {}".format(len(body))]
+        if proxy is not None and parts.scheme == 'http' and proxy[2]:
+            lines.append("Proxy-Authorization: {}".format(proxy[2]))
+        lines.extend("{}: {}".format(k, v) for k, v in headers.items())
+        message = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body
+
+        fresh = False
+        while True:
+            connecting = time.perf_counter()
+            connection, reused = await self._acquire(key, proxy, fresh)
+            sent = time.perf_counter()
+            if info is not None:
+                info.connect = None if reused else sent - connecting
+            try:
+                connection.writer.write(message)
+                status, response_headers, content, reusable, first_byte = \
+                    await AsyncApiRequester._read_response(
+                        connection.reader, method, self.max_response_size)
+            except (ConnectionError, asyncio.IncompleteReadError) as error:
+                connection.close()
+                if reused:
+                    # The server dropped an idle connection; retry once
+                    # on a fresh one.
+                    AsyncApiRequester.__logger.debug(
+                        "Pooled connection lost: %s", error)
+                    fresh = True
+                    continue
+                raise ConnectionError(str(error)) from error
+            except BaseException:
+                connection.close()
+                raise
+
+            if info is not None:
+                info.ttfb = first_byte - sent
+            if reusable:
+                self._release(key, connection)
+            else:
+                connection.close()
+            return status, response_headers, content
+
+    async def _acquire(self, key: tuple, proxy: tuple or None,
+                       fresh: bool = False) -> (_Connection, bool):
+        """
+        :param fresh: Open a new connection rather than reuse an idle one
+        :return: connection, and whether it was reused
+        """
+        idle = None if fresh else self._idle.get(key)
+        now = time.monotonic()
+        while idle:
+            connection = idle.pop()
+            if now - connection.last_used <= self.keep_alive \
+                    and not connection.reader.at_eof():
+                return connection, True
+            connection.close()
+
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == 'https':
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+
+        if proxy is None:
+            opening = asyncio.open_connection(host, port, ssl=ssl_context)
+        else:
+            opening = self._open_proxied(proxy, host, port, ssl_context)
+        reader, writer = await asyncio.wait_for(
+            opening, AsyncApiRequester.__connect_timeout)
+        return _Connection(reader, writer), False
+
+    def _proxy(self, key: tuple) -> tuple or None:
+        """
+        :return: proxy (host, port, Proxy-Authorization header or None)
+            for the requests to `key`, None to connect directly
+        """
+        try:
+            return self._proxies[key]
+        except KeyError:
+            pass
+
+        scheme, host, port = key
+        url = getproxies().get(scheme)
+        proxy = None
+        if url and not proxy_bypass('{}:{}'.format(host, port)):
+            if '://' not in url:
+                url = 'http://' + url
+            parts = urlsplit(url)
+            if parts.scheme != 'http' or not parts.hostname:
+                raise HttpApiError(
+                    "Unsupported proxy {!r}, only http:// proxies are "
+                    "supported".format(url))
+            authorization = None
+            if parts.username is not None:
+                credentials = '{}:{}'.format(unquote(parts.username),
+                                             unquote(parts.password or ''))
+                authorization = 'Basic ' + b64encode(
+                    credentials.encode('utf-8')).decode('ascii')
+            proxy = (parts.hostname, parts.port or 80, authorization)
+        self._proxies[key] = proxy
+        return proxy
+
+    async def _open_proxied(self, proxy: tuple, host: str, port: int,
+                            ssl_context: ssl.SSLContext or None) \
+            -> (asyncio.StreamReader, asyncio.StreamWriter):
+        """Connect through a proxy, tunnelling HTTPS with CONNECT"""
+        reader, writer = await asyncio.open_connection(proxy[0], proxy[1])
+        if ssl_context is None:
+            return reader, writer
+
+        try:
+            authority = _authority(host, port)
+            lines = ["CONNECT {} HTTP/1.1".format(authority),
+                     "Host: {}".format(authority)]
+            if proxy[2]:
+                lines.append("Proxy-Authorization: {}".format(proxy[2]))
+            writer.write(("\r\n".join(lines) + "\r\n\r\n")
+                         .encode('latin-1'))
+            status = (await AsyncApiRequester._read_response(
+                reader, 'CONNECT', self.max_response_size))[0]
+            if not 200 <= status < 300:
+                raise HttpApiError(
+                    "Proxy refused to connect to {} (HTTP {})".format(
+                        authority, status))
+
+            if hasattr(writer, 'start_tls'):
+                await writer.start_tls(ssl_context, server_hostname=host)
+            else:
+                # Python < 3.11
+                loop = asyncio.get_event_loop()
+                protocol = writer.transport.get_protocol()
+                transport = await loop.start_tls(
+                    writer.transport, protocol, ssl_context,
+                    server_hostname=host)
+                writer = asyncio.StreamWriter(transport, protocol, reader,
+                                              loop)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    def _release(self, key: tuple, connection: _Connection):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.pool_maxsize:
+            connection.last_used = time.monotonic()
+            idle.append(connection)
+        else:
+            connection.close()
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader, method: str,
+                             max_size: int) \
+            -> (int, dict, bytes, bool, float):
+        """
+        :param method: Method of the request, responses to HEAD and
+            CONNECT have no body
+        :param max_size: Size in bytes above which the body raises
+            `HttpApiError`
+        """
+        first_byte = None
+        while True:
+            status_line = await reader.readline()
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            if not status_line:
+                raise ConnectionError("Connection closed by server")
+            fields = status_line.decode('latin-1').split(None, 2)
+            if len(fields) < 2 or not fields[0].startswith('HTTP/') \
+                    or len(fields[1]) != 3 or not fields[1].isdigit():
+                raise ConnectionError(
+                    "Malformed status line {!r}".format(status_line[:100]))
+            version, status = fields[0], int(fields[1])
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            # Interim responses, e.g. 100 Continue, precede the final one
+            if not 100 <= status < 200:
+                break
+
+        reusable = headers.get('connection', '').lower() != 'close' \
+            and version != 'HTTP/1.0'
+
+        def too_large():
+            return HttpApiError(
+                "Response body larger than {} bytes".format(max_size))
+
+        if method == 'HEAD' or status in (204, 304) \
+                or (method == 'CONNECT' and 200 <= status < 300):
+            content = b''
+        elif 'chunked' in headers.get('transfer-encoding', '').lower():
+            chunks = []
+            received = 0
+            while True:
+                size = AsyncApiRequester._parse_size(
+                    (await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n',
+                                                            b''):
+                        pass
+                    break
+                received += size
+                if received > max_size:
+                    raise too_large()
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            size = AsyncApiRequester._parse_size(
+                headers['content-length'], 10)
+            if size > max_size:
+                raise too_large()
+            content = await reader.readexactly(size)
+        else:
+            chunks = []
+            received = 0
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                received += len(data)
+                if received > max_size:
+                    raise too_large()
+                chunks.append(data)
+            content = b''.join(chunks)
+            reusable = False
+
+        return status, headers, content, reusable, first_byte
+
+    @staticmethod
+    def _parse_size(value: str or bytes, base: int) -> int:
+        """Chunk size or Content-Length, ConnectionError if malformed"""
+        try:
+            size = int(value.strip(), base)
+        except ValueError:
+            size = -1
+        if size < 0:
+            raise ConnectionError("Malformed body size {!r}".format(value))
+        return size
@@ -0,0 +1,138 @@
+import threading
+
+
+class HedgePolicy:
+    """
+    Decides when a slow API call gets a second, identical request.
+
+    A call that has not answered `delay` seconds after it was sent is
+    hedged: the same request goes out again on another pooled connection,
+    the first answer wins and the other request is ignored (cancelled in
+    asyncio). Without a fixed `delay`, the delay is the `quantile` of the
+    latencies observed over the last `window` calls, so that only the
+    slowest calls are hedged, and no call is hedged before `min_samples`
+    latencies are known.
+
+    Hedges are limited to `max_extra` times the number of calls, e.g. at
+    most 5% more requests by default.
+
+    One instance may be shared by requesters; its counters then cover
+    all of them.
+    """
+
+    def __init__(self, **kwargs):
+        """
+
+        :key delay: float: (optional) Seconds before a call is hedged.
+            Derived from the observed latencies by default
+        :key quantile: float: (optional) Latency quantile used as delay
+            when no fixed delay is set, 0.95 by default
+        :key min_delay: float: (optional) Lower bound of the derived
+            delay in seconds, 0.01 by default
+        :key min_samples: int: (optional) Latencies needed before the
+            delay is derived, 20 by default
+        :key window: int: (optional) Number of recent latencies the delay
+            is derived from, 1000 by default
+        :key max_extra: float: (optional) Maximal ratio of hedges to
+            calls, 0.05 by default
+        """
+        self.delay = kwargs.get('delay', None)
+        self.quantile = kwargs.get('quantile', 0.95)
+        self.min_delay = kwargs.get('min_delay', 0.01)
+        self.min_samples = kwargs.get('min_samples', 20)
+        self.window = kwargs.get('window', 1000)
+        self.max_extra = kwargs.get('max_extra', 0.05)
+
+        if self.delay is not None and self.delay < 0:
+            raise ValueError("delay should be a non-negative number")
+        if not 0 < self.quantile < 1:
+            raise ValueError("quantile should be in (0, 1)")
+        if self.min_delay < 0:
+            raise ValueError("min_delay should be a non-negative number")
+        if type(self.min_samples) is not int or self.min_samples < 1:
+            raise ValueError("min_samples should be a positive int")
+        if type(self.window) is not int or self.window < self.min_samples:
+            raise ValueError("window should be an int >= min_samples")
+        if not 0 < self.max_extra <= 1:
+            raise ValueError("max_extra should be in (0, 1]")
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def calls(self) -> int:
+        """Number of calls started"""
+        return self._calls
+
+    @property
+    def hedges(self) -> int:
+        """Number of hedged requests sent"""
+        return self._hedges
+
+    @property
+    def wins(self) -> int:
+        """Number of calls answered by their hedged request"""
+        return self._wins
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {'calls': self._calls, 'hedges': self._hedges,
+                    'wins': self._wins, 'delay': self._current_delay()}
+
+    def reset(self):
+        with self._lock:
+            self._calls = 0
+            self._hedges = 0
+            self._wins = 0
+            self._latencies = [0.0] * self.window
+            self._observed = 0
+            self._derived = None
+
+    def start(self) -> float or None:
+        """
+        Count a call.
+
+        :return: seconds to wait for an answer before hedging, or None if
+            the call should not be hedged
+        """
+        with self._lock:
+            self._calls += 1
+            return self._current_delay()
+
+    def allow(self) -> bool:
+        """
+        Reserve a hedge, within the `max_extra` budget.
+
+        :return: whether the hedged request may be sent
+        """
+        with self._lock:
+            if self._hedges + 1 > self.max_extra * self._calls:
+                return False
+            self._hedges += 1
+            return True
+
+    def record(self, latency: float, hedged: bool = False):
+        """
+        Report the answer of a call.
+
+        :param latency: Seconds from sending the answering request to its
+            response
+        :param hedged: Whether the hedged request answered
+        """
+        with self._lock:
+            if hedged:
+                self._wins += 1
+            self._latencies[self._observed % self.window] = latency
+            self._observed += 1
+            # The quantile is recomputed every few answers, not on each
+            if self._observed >= self.min_samples \
+                    and (self._derived is None or self._observed % 16 == 0):
+                latencies = sorted(self._latencies[:self._observed]
+                                   if self._observed < self.window
+                                   else self._latencies)
+                self._derived = max(self.min_delay, latencies[min(
+                    len(latencies) - 1,
+                    int(self.quantile * len(latencies)))])
+
+    def _current_delay(self) -> float or None:
+        return self.delay if self.delay is not None else self._derived
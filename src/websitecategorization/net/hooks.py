@@ -0,0 +1,105 @@
+import logging
+
+
+class RequestInfo:
+    """
+    Describes one API call attempt to instrumentation hooks.
+
+    Durations are in seconds and None when not measured: `connect` is
+    None when a pooled connection was reused, all timings are None for
+    cache hits.
+    """
+    __slots__ = ('method', 'url', 'attempt', 'cache', 'queue_wait',
+                 'connect', 'ttfb', 'total', 'status_code',
+                 'response_size', 'error', 'hedged')
+
+    def __init__(self, method: str, url: str or None, attempt: int = 1,
+                 cache: str or None = None):
+        self.method = method
+        self.url = url
+        # 1 for the first attempt, 2 for the first retry and so on
+        self.attempt = attempt
+        # 'hit', 'stale', 'miss', 'refresh' or None if the call is not
+        # cached
+        self.cache = cache
+        # Time spent waiting for the rate limiter
+        self.queue_wait = None
+        self.connect = None
+        # Time to first byte of the response, connect excluded
+        self.ttfb = None
+        # From the end of queue_wait to the end of the response
+        self.total = None
+        self.status_code = None
+        self.response_size = None
+        self.error = None
+        # Whether a hedged request answered, see `HedgePolicy`
+        self.hedged = False
+
+    @property
+    def retries(self) -> int:
+        return self.attempt - 1
+
+    def __repr__(self):
+        return 'RequestInfo({})'.format(', '.join(
+            '{}={!r}'.format(name, getattr(self, name))
+            for name in RequestInfo.__slots__))
+
+
+class Hooks:
+    """
+    Instrumentation callbacks of a requester.
+
+    Each callback receives a `RequestInfo`:
+
+    - before_request: before every attempt, once the rate limiter let
+      it through
+    - after_response: after every attempt that got an HTTP response,
+      whatever its status, and for cache hits
+    - on_error: after every attempt that raised instead, e.g. on
+      connection errors and timeouts
+
+    Exceptions raised by callbacks are logged and otherwise ignored.
+    """
+    BEFORE_REQUEST = 'before_request'
+    AFTER_RESPONSE = 'after_response'
+    ON_ERROR = 'on_error'
+    EVENTS = (BEFORE_REQUEST, AFTER_RESPONSE, ON_ERROR)
+
+    __logger = logging.getLogger("api-requester-hooks")
+
+    def __init__(self):
+        # Tuples are replaced rather than mutated, so that firing needs
+        # no lock
+        self._callbacks = {event: () for event in Hooks.EVENTS}
+        self.enabled = False
+
+    def add(self, event: str, callback):
+        """
+        :param event: Use Hooks.BEFORE_REQUEST, Hooks.AFTER_RESPONSE,
+            Hooks.ON_ERROR constants
+        :param callback: callable receiving a `RequestInfo`
+        """
+        self._callbacks[Hooks._validate_event(event)] += (callback,)
+        self.enabled = True
+
+    def remove(self, event: str, callback):
+        callbacks = list(self._callbacks[Hooks._validate_event(event)])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        self._callbacks[event] = tuple(callbacks)
+        self.enabled = any(self._callbacks.values())
+
+    def fire(self, event: str, info: RequestInfo):
+        for callback in self._callbacks[event]:
+            try:
+                callback(info)
+            except Exception:
+                Hooks.__logger.exception("%s hook %r failed", event,
+                                         callback)
+
+    @staticmethod
+    def _validate_event(event: str) -> str:
+        if event not in Hooks.EVENTS:
+            raise ValueError("Event should be one of {}".format(
+                ', '.join(Hooks.EVENTS)))
+        return event
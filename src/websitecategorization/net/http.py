@@ -1,7 +1,17 @@
-from requests import request, Response
+from concurrent.futures import Future, ThreadPoolExecutor, wait, \
+    FIRST_COMPLETED
+from json import dumps
+from .hedging import HedgePolicy
+from .hooks import Hooks, RequestInfo
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy, CircuitBreaker, _failed_attempt
+from .transport import Transport, TransportResponse, RequestsTransport, \
+    _timing
 from ..exceptions.error import ApiAuthError, HttpApiError, BadRequestError
 from ..version import VERSION, LIBRARY_NAME
 import logging
+import threading
+import time
 
 
 class ApiRequester:
@@ -10,6 +20,9 @@ class ApiRequester:
     __user_agent = "{name}/{ver}".format(name=LIBRARY_NAME, ver=VERSION)
     _base_url: str
     _timeout: float
+    _pool_connections: int
+    _pool_maxsize: int
+    _keep_alive: float
 
     def __init__(self, **kwargs):
         """
@@ -17,14 +30,72 @@ class ApiRequester:
         :param kwargs: Supported parameters:
         - base_url: (optional) API endpoint URL; str
         - timeout: (optional) API call timeout in seconds; float
+        - pool_connections: (optional) Number of per-host connection pools
+            to keep; int
+        - pool_maxsize: (optional) Maximum number of connections kept open
+            per host; int
+        - keep_alive: (optional) Idle time in seconds after which pooled
+            connections are dropped; float
+        - rate_limit: (optional) Maximum number of requests per second,
+            adapted down on HTTP 429/503; float
+        - burst: (optional) Number of requests that may be sent at once
+            when rate_limit is set; int
+        - rate_limiter: (optional) `RateLimiter` to use instead of
+            rate_limit/burst, e.g. one shared with other requesters
+        - retry_policy: (optional) `RetryPolicy` for failed calls; calls
+            are not retried by default
+        - circuit_breaker: (optional) `CircuitBreaker` to fail fast while
+            the endpoint is unhealthy
+        - hedge_policy: (optional) `HedgePolicy` sending a second request
+            when a call is slow; calls are not hedged by default
+        - hooks: (optional) `Hooks` with instrumentation callbacks, e.g.
+            shared with other requesters
+        - transport: (optional) `Transport` sending the requests, e.g.
+            `Urllib3Transport` or `ReplayTransport`. A `RequestsTransport`
+            with the pool settings above by default
         """
         self._base_url = ''
         self.timeout = 30
+        self.pool_connections = 10
+        self.pool_maxsize = 10
+        self.keep_alive = 60
+
+        self._lock = threading.Lock()
+        # Made from the pool settings on first use, unless one is given
+        self._default_transport = None
+        # Threads running hedged calls, created on first use and grown
+        # so that calls never queue, see `_submit_hedged`
+        self._hedge_executor = None
+        self._hedge_threads = 0
+        self._hedge_running = 0
 
         if 'base_url' in kwargs:
             self.base_url = kwargs['base_url']
         if 'timeout' in kwargs:
             self.timeout = kwargs['timeout']
+        if 'pool_connections' in kwargs:
+            self.pool_connections = kwargs['pool_connections']
+        if 'pool_maxsize' in kwargs:
+            self.pool_maxsize = kwargs['pool_maxsize']
+        if 'keep_alive' in kwargs:
+            self.keep_alive = kwargs['keep_alive']
+
+        self.rate_limiter = kwargs.get('rate_limiter', None)
+        if kwargs.get('rate_limit') is not None:
+            limits = {'burst': kwargs['burst']} if 'burst' in kwargs else {}
+            self.rate_limiter = RateLimiter(kwargs['rate_limit'], **limits)
+
+        self.retry_policy = kwargs.get('retry_policy', None)
+        self.circuit_breaker = kwargs.get('circuit_breaker', None)
+        self.hedge_policy = kwargs.get('hedge_policy', None)
+        self.hooks = kwargs.get('hooks', None) or Hooks()
+        self.transport = kwargs.get('transport', None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     @property
     def base_url(self) -> str:
@@ -49,65 +120,406 @@ class ApiRequester:
         else:
             raise ValueError("Timeout value should be in [1, 60]")
 
-    def get(self, payload: dict) -> str:
-        headers = {
-            'User-Agent': ApiRequester.__user_agent,
-            'Connection': 'close'
-        }
-        response = request(
+    @property
+    def pool_connections(self) -> int:
+        """Number of per-host connection pools to keep"""
+        return self._pool_connections
+
+    @pool_connections.setter
+    def pool_connections(self, value: int):
+        if type(value) is int and value >= 1:
+            self._pool_connections = value
+        else:
+            raise ValueError("pool_connections should be a positive int")
+
+    @property
+    def pool_maxsize(self) -> int:
+        """Maximum number of connections kept open per host"""
+        return self._pool_maxsize
+
+    @pool_maxsize.setter
+    def pool_maxsize(self, value: int):
+        if type(value) is int and value >= 1:
+            self._pool_maxsize = value
+        else:
+            raise ValueError("pool_maxsize should be a positive int")
+
+    @property
+    def rate_limiter(self) -> RateLimiter or None:
+        return self._rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, value: RateLimiter or None):
+        self._rate_limiter = value
+
+    @property
+    def retry_policy(self) -> RetryPolicy or None:
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: RetryPolicy or None):
+        self._retry_policy = value
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker or None:
+        return self._circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, value: CircuitBreaker or None):
+        self._circuit_breaker = value
+
+    @property
+    def hedge_policy(self) -> HedgePolicy or None:
+        return self._hedge_policy
+
+    @hedge_policy.setter
+    def hedge_policy(self, value: HedgePolicy or None):
+        self._hedge_policy = value
+
+    @property
+    def transport(self) -> Transport:
+        """Transport sending the requests"""
+        return self._get_transport()
+
+    @transport.setter
+    def transport(self, value: Transport or None):
+        """Transport sending the requests, None for the default one"""
+        self._transport = value
+
+    @property
+    def hooks(self) -> Hooks:
+        return self._hooks
+
+    @hooks.setter
+    def hooks(self, value: Hooks):
+        self._hooks = value
+
+    def add_hook(self, event: str, callback):
+        """
+        Register an instrumentation callback, see `Hooks`.
+
+        :param event: Use Hooks.BEFORE_REQUEST, Hooks.AFTER_RESPONSE,
+            Hooks.ON_ERROR constants
+        :param callback: callable receiving a `RequestInfo`
+        """
+        self._hooks.add(event, callback)
+
+    def remove_hook(self, event: str, callback):
+        self._hooks.remove(event, callback)
+
+    @property
+    def keep_alive(self) -> float:
+        """Idle time in seconds after which pooled connections are dropped"""
+        return self._keep_alive
+
+    @keep_alive.setter
+    def keep_alive(self, value: float):
+        if value is not None and value > 0:
+            self._keep_alive = value
+        else:
+            raise ValueError("keep_alive should be a positive number")
+
+    def close(self):
+        """
+        Close all pooled connections.
+
+        The requester stays usable: a new pool is opened on the next call.
+        """
+        with self._lock:
+            default, self._default_transport = self._default_transport, None
+            executor, self._hedge_executor = self._hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if default is not None:
+            default.close()
+        if self._transport is not None:
+            self._transport.close()
+
+    def get(self, payload: dict, cache_status: str or None = None) -> str:
+        response = self._request(
             "GET",
             self.base_url,
-            params=payload,
-            headers=headers,
-            timeout=(ApiRequester.__connect_timeout, self.timeout)
+            cache_status=cache_status,
+            params=payload
         )
 
         return ApiRequester._handle_response(response)
 
-    def post(self, data: dict) -> str:
-        headers = {
-            'User-Agent': ApiRequester.__user_agent,
-            'Connection': 'close'
-        }
+    def get_bytes(self, payload: dict,
+                  cache_status: str or None = None) -> bytes:
+        """
+        Like `get`, but return the undecoded response body, which
+        `decoding.loads` parses without an intermediate str.
+        """
+        response = self._request(
+            "GET",
+            self.base_url,
+            cache_status=cache_status,
+            params=payload
+        )
+
+        return ApiRequester._check_body(response.status_code,
+                                        response.content)
+
+    def post(self, data: dict, cache_status: str or None = None) -> str:
+        headers = {}
         if 'apiKey' in data:
             headers['X-Authentication-Token'] = data.pop('apiKey')
 
-        response = request(
+        headers['Content-Type'] = 'application/json'
+
+        response = self._request(
             'POST',
             self.base_url,
-            json=data,
+            body=dumps(data).encode('utf-8'),
             headers=headers,
-            timeout=(ApiRequester.__connect_timeout, self.timeout)
+            cache_status=cache_status
         )
 
         return ApiRequester._handle_response(response)
 
     def get_categories(self, payload: dict) -> str:
-        headers = {
-            'User-Agent': ApiRequester.__user_agent,
-            'Connection': 'close'
-        }
-        response = request(
+        response = self._request(
             "GET",
-            self.base_url+'/categories',
-            params=payload,
-            headers=headers,
-            timeout=(ApiRequester.__connect_timeout, self.timeout)
+            self.base_url + '/categories',
+            params=payload
         )
 
         return ApiRequester._handle_response(response)
-            
+
+    def _request(self, method: str, url: str, headers: dict or None = None,
+                 cache_status: str or None = None,
+                 **kwargs) -> TransportResponse:
+        headers = {'User-Agent': ApiRequester.__user_agent, **(headers or {})}
+        policy = self._retry_policy
+        breaker = self._circuit_breaker
+        hooks = self._hooks
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            attempt += 1
+            if breaker is not None:
+                breaker.before_call()
+
+            info = RequestInfo(method, url, attempt, cache_status) \
+                if hooks.enabled else None
+            response = error = None
+            try:
+                response = self._send(
+                    method, url, headers,
+                    policy.remaining(started) if policy is not None
+                    else None,
+                    info,
+                    **kwargs)
+            except BaseException as failure:
+                # Other errors, and KeyboardInterrupt, are raised at once
+                if not isinstance(failure, Exception) \
+                        or not _failed_attempt(failure, policy):
+                    if breaker is not None:
+                        breaker.release()
+                    if info is not None:
+                        info.error = failure
+                        hooks.fire(Hooks.ON_ERROR, info)
+                    raise
+                error = failure
+
+            if info is not None:
+                if error is None:
+                    hooks.fire(Hooks.AFTER_RESPONSE, info)
+                else:
+                    info.error = error
+                    hooks.fire(Hooks.ON_ERROR, info)
+
+            if breaker is not None:
+                breaker.record(error is None and response.status_code < 500)
+
+            delay = None
+            if policy is not None:
+                delay = policy.retry_delay(
+                    attempt, started,
+                    response.status_code if response is not None else None,
+                    error,
+                    response.headers.get('retry-after')
+                    if response is not None else None)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            ApiRequester.__logger.debug(
+                "Attempt %d failed (%s), retrying in %.2fs", attempt,
+                error if error is not None else response.status_code, delay)
+            time.sleep(delay)
+
+    def _send(self, method: str, url: str, headers: dict or None,
+              remaining: float or None, info: RequestInfo or None,
+              **kwargs) -> TransportResponse:
+        if self._rate_limiter is not None:
+            if info is None:
+                self._rate_limiter.acquire()
+            else:
+                queued = time.perf_counter()
+                self._rate_limiter.acquire()
+                info.queue_wait = time.perf_counter() - queued
+
+        timeout = self.timeout if remaining is None \
+            else max(0.001, min(self.timeout, remaining))
+
+        transport = self._get_transport()
+        if info is not None:
+            self._hooks.fire(Hooks.BEFORE_REQUEST, info)
+        _timing.connect = None
+        sent = time.perf_counter()
+        try:
+            if self._hedge_policy is None:
+                response = transport.request(
+                    method,
+                    url,
+                    headers=headers,
+                    timeout=(ApiRequester.__connect_timeout, timeout),
+                    **kwargs
+                )
+            else:
+                response = self._hedged_request(
+                    transport, info,
+                    method,
+                    url,
+                    headers=headers,
+                    timeout=(ApiRequester.__connect_timeout, timeout),
+                    **kwargs
+                )
+        finally:
+            if info is not None:
+                info.total = time.perf_counter() - sent
+                info.connect = _timing.connect
+
+        if info is not None:
+            info.ttfb = response.elapsed - (info.connect or 0)
+            info.status_code = response.status_code
+            info.response_size = len(response.content)
+
+        if ApiRequester.__logger.isEnabledFor(logging.DEBUG):
+            ApiRequester.__logger.debug(
+                "%s %s -> %d (%d bytes) in %.1f ms", method, url,
+                response.status_code, len(response.content),
+                response.elapsed * 1000)
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.feedback(response.status_code,
+                                        response.headers.get('retry-after'))
+        return response
+
+    def _hedged_request(self, transport: Transport,
+                        info: RequestInfo or None, method: str, url: str,
+                        **kwargs) -> TransportResponse:
+        """
+        Send the request from the hedging threads, and the same request
+        again if the hedge policy says the first one is slow. The first
+        response wins; the other request is left to finish unread.
+        """
+        policy = self._hedge_policy
+
+        def send(hedged: bool) -> tuple:
+            if hedged and self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            _timing.connect = None
+            sent = time.perf_counter()
+            response = transport.request(method, url, **kwargs)
+            return (response, time.perf_counter() - sent, _timing.connect,
+                    hedged)
+
+        delay = policy.start()
+        running = {self._submit_hedged(send, False)}
+        if delay is not None:
+            done, _ = wait(running, timeout=delay)
+            if not done and policy.allow():
+                ApiRequester.__logger.debug(
+                    "No response after %.3fs, hedging", delay)
+                running.add(self._submit_hedged(send, True))
+
+        error = None
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response, latency, connect, hedged = future.result()
+                except Exception as failure:
+                    # The other request may still answer
+                    error = error or failure
+                    continue
+                policy.record(latency, hedged)
+                _timing.connect = connect
+                if info is not None:
+                    info.hedged = hedged
+                return response
+        raise error
+
+    def _submit_hedged(self, function, *args) -> Future:
+        """
+        Run `function` on the hedging threads.
+
+        A request waiting for a free thread would count the wait in its
+        latency and be hedged for it, so the threads are replaced by
+        twice as many once they are all busy, whatever the number of
+        calls. Submitting under the lock keeps `close` from shutting the
+        threads down in between.
+        """
+        def run():
+            try:
+                return function(*args)
+            finally:
+                with self._lock:
+                    self._hedge_running -= 1
+
+        with self._lock:
+            if self._hedge_executor is None \
+                    or self._hedge_running >= self._hedge_threads:
+                previous = self._hedge_executor
+                self._hedge_threads = max(32, 4 * self.pool_maxsize,
+                                          2 * self._hedge_threads)
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self._hedge_threads,
+                    thread_name_prefix='hedge')
+                if previous is not None:
+                    # Its threads exit once their requests are done
+                    previous.shutdown(wait=False)
+            future = self._hedge_executor.submit(run)
+            self._hedge_running += 1
+            return future
+
+    def _get_transport(self) -> Transport:
+        if self._transport is not None:
+            return self._transport
+        with self._lock:
+            if self._default_transport is None:
+                self._default_transport = RequestsTransport(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    keep_alive=self.keep_alive)
+            return self._default_transport
 
     @staticmethod
-    def _handle_response(response: Response) -> str:
-        if 200 <= response.status_code < 300:
-            return response.content.decode('UTF-8')
+    def _handle_response(response: TransportResponse) -> str:
+        return ApiRequester._handle_body(response.status_code,
+                                         response.content)
+
+    @staticmethod
+    def _handle_body(status_code: int, content: bytes) -> str:
+        return ApiRequester._check_body(status_code, content).decode('UTF-8')
+
+    @staticmethod
+    def _check_body(status_code: int, content: bytes) -> bytes:
+        if 200 <= status_code < 300:
+            return content
+
+        text = content.decode('UTF-8', errors='replace')
 
-        if response.status_code in [401, 402, 403]:
-            raise ApiAuthError(response.text)
+        if status_code in [401, 402, 403]:
+            raise ApiAuthError(text)
 
-        if response.status_code in [400, 422]:
-            raise BadRequestError(response.text)
+        if status_code in [400, 422]:
+            raise BadRequestError(text)
 
-        if response.status_code >= 300:
-            raise HttpApiError(response.text)
+        if status_code >= 300:
+            raise HttpApiError(text)
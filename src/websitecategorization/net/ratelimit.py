@@ -0,0 +1,168 @@
+from email.utils import parsedate_to_datetime
+import datetime
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Adaptive client-side token bucket.
+
+    Hands out up to `max_rate` requests per second with bursts of up to
+    `burst` requests. When the API answers 429 or 503 the rate is cut by
+    `backoff` (at most once per second) and a Retry-After header, if any,
+    pauses all callers. Afterwards the rate grows back linearly, reaching
+    `max_rate` again after `recovery_time` seconds without throttling.
+
+    One instance may be shared by any number of threads, requesters and
+    asyncio clients.
+    """
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, max_rate: float, **kwargs):
+        """
+        :param max_rate: Maximum number of requests per second
+        :key burst: int: (optional) Bucket capacity, one second worth of
+            requests by default
+        :key min_rate: float: (optional) Lowest rate the limiter adapts
+            down to, 1/20 of max_rate by default
+        :key backoff: float: (optional) Factor applied to the rate on
+            throttling, 0.5 by default
+        :key recovery_time: float: (optional) Seconds to grow from
+            min_rate back to max_rate, 30 by default
+        """
+        if not max_rate or max_rate <= 0:
+            raise ValueError("max_rate should be a positive number")
+        self._max_rate = float(max_rate)
+        self._burst = kwargs.get('burst', max(1, int(max_rate)))
+        self._min_rate = kwargs.get('min_rate', self._max_rate / 20)
+        self._backoff = kwargs.get('backoff', 0.5)
+        self._recovery_time = kwargs.get('recovery_time', 30.0)
+
+        if type(self._burst) is not int or self._burst < 1:
+            raise ValueError("burst should be a positive int")
+        if not 0 < self._min_rate <= self._max_rate:
+            raise ValueError("min_rate should be in (0, max_rate]")
+        if not 0 < self._backoff < 1:
+            raise ValueError("backoff should be in (0, 1)")
+        if self._recovery_time <= 0:
+            raise ValueError("recovery_time should be a positive number")
+
+        self._lock = threading.Lock()
+        self._rate = self._max_rate
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_backoff = float('-inf')
+        self._waiting = 0
+
+    @property
+    def max_rate(self) -> float:
+        return self._max_rate
+
+    @property
+    def burst(self) -> int:
+        return self._burst
+
+    @property
+    def rate(self) -> float:
+        """Current allowed requests per second"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._rate
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a token"""
+        with self._lock:
+            return self._waiting
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        delay = self._reserve()
+        if delay > 0:
+            try:
+                time.sleep(delay)
+            finally:
+                self._done_waiting()
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent"""
+        import asyncio
+        delay = self._reserve()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._done_waiting()
+
+    def feedback(self, status_code: int, retry_after: str or None = None):
+        """
+        Adapt the rate to an API response.
+
+        :param status_code: HTTP status of the response
+        :param retry_after: Value of the Retry-After header, if any
+        """
+        if status_code not in RateLimiter.THROTTLE_STATUSES:
+            return
+
+        pause = RateLimiter.parse_retry_after(retry_after)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now - self._last_backoff >= 1.0:
+                self._rate = max(self._min_rate, self._rate * self._backoff)
+                self._last_backoff = now
+            self._tokens = min(self._tokens, 0.0)
+            if pause:
+                self._paused_until = max(self._paused_until, now + pause)
+
+    @staticmethod
+    def parse_retry_after(value: str or None) -> float or None:
+        """
+        :return: seconds to wait according to a Retry-After header value
+        """
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if when is None:
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=datetime.timezone.utc)
+        return max(0.0, (when - datetime.datetime.now(
+            datetime.timezone.utc)).total_seconds())
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            # Tokens do not accrue while paused, so the deficit is paid
+            # off after the pause
+            delay = max(0.0, self._paused_until - now) \
+                + max(0.0, -self._tokens / self._rate)
+            if delay > 0:
+                self._waiting += 1
+            return delay
+
+    def _done_waiting(self):
+        with self._lock:
+            self._waiting -= 1
+
+    def _refill(self, now: float):
+        start = max(self._updated, self._paused_until)
+        self._updated = max(self._updated, now)
+        elapsed = now - start
+        if elapsed <= 0:
+            return
+        if self._rate < self._max_rate:
+            step = (self._max_rate - self._min_rate) / self._recovery_time
+            self._rate = min(self._max_rate, self._rate + step * elapsed)
+        self._tokens = min(float(self._burst),
+                           self._tokens + elapsed * self._rate)
@@ -0,0 +1,257 @@
+from ..exceptions.error import CircuitOpenError
+from .ratelimit import RateLimiter
+import random
+import sys
+import threading
+import time
+
+
+# Errors raised by the HTTP stacks when the endpoint could not be reached
+# or did not answer in time, see `_transient_errors`
+_transient = None
+
+
+def _transient_errors() -> tuple:
+    """
+    Transient error types, built on first use so that importing the
+    client does not load requests, urllib3 or asyncio
+    """
+    global _transient
+    if _transient is None:
+        from requests.exceptions import \
+            ConnectionError as RequestsConnectionError, \
+            Timeout as RequestsTimeout, ChunkedEncodingError, \
+            ContentDecodingError
+        from urllib3.exceptions import \
+            ProtocolError as Urllib3ProtocolError, \
+            TimeoutError as Urllib3Timeout
+        # Bodies cut or garbled in transit are not ConnectionErrors
+        _transient = (RequestsConnectionError, RequestsTimeout,
+                      ChunkedEncodingError, ContentDecodingError,
+                      Urllib3ProtocolError, Urllib3Timeout,
+                      ConnectionError, TimeoutError)
+    # A separate class before Python 3.11, and only raised once loaded
+    asyncio = sys.modules.get('asyncio')
+    if asyncio is not None and asyncio.TimeoutError not in _transient:
+        _transient += (asyncio.TimeoutError,)
+    return _transient
+
+
+def _failed_attempt(error: BaseException,
+                    policy: 'RetryPolicy' or None) -> bool:
+    """
+    Whether an exception raised by an attempt is a failure of the
+    endpoint, recorded by the circuit breaker and passed to the retry
+    policy, rather than raised at once
+    """
+    return isinstance(error, _transient_errors()) or (
+        policy is not None and isinstance(error, policy.retry_exceptions))
+
+
+def __getattr__(name: str):
+    if name == 'TRANSIENT_ERRORS':
+        return _transient_errors()
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed API call is retried.
+
+    Delays grow exponentially with full jitter: before attempt n + 1 the
+    caller sleeps a random time in [0, min(backoff_max,
+    backoff_base * 2 ** (n - 1))], or longer if the server sent
+    Retry-After. No attempt starts once `deadline` seconds have passed
+    since the first one.
+
+    Authentication and bad request errors (HTTP 400, 401, 402, 403, 422)
+    are never retried.
+    """
+    NEVER_RETRIED = frozenset((400, 401, 402, 403, 422))
+
+    def __init__(self, **kwargs):
+        """
+
+        :key max_attempts: int: (optional) Total number of attempts per
+            call, 3 by default
+        :key backoff_base: float: (optional) Upper bound of the first
+            delay in seconds, 0.5 by default
+        :key backoff_max: float: (optional) Upper bound of any delay in
+            seconds, 30 by default
+        :key retry_statuses: iterable: (optional) HTTP statuses to retry,
+            429, 500, 502, 503 and 504 by default
+        :key retry_exceptions: tuple: (optional) Exception types to retry,
+            connection errors, timeouts and truncated or undecodable
+            bodies by default
+        :key deadline: float: (optional) Time budget in seconds for all
+            attempts of a call, unlimited by default
+        """
+        self.max_attempts = kwargs.get('max_attempts', 3)
+        self.backoff_base = kwargs.get('backoff_base', 0.5)
+        self.backoff_max = kwargs.get('backoff_max', 30.0)
+        self.retry_statuses = frozenset(
+            kwargs.get('retry_statuses', (429, 500, 502, 503, 504)))
+        retry_exceptions = kwargs.get('retry_exceptions', None)
+        self._retry_exceptions = None if retry_exceptions is None \
+            else tuple(retry_exceptions)
+        self.deadline = kwargs.get('deadline', None)
+
+        if type(self.max_attempts) is not int or self.max_attempts < 1:
+            raise ValueError("max_attempts should be a positive int")
+        if self.backoff_base < 0 or self.backoff_max < 0:
+            raise ValueError("Backoff values should be non-negative")
+        if self.retry_statuses & RetryPolicy.NEVER_RETRIED:
+            raise ValueError("Authentication and bad request errors "
+                             "cannot be retried")
+        if self.deadline is not None and self.deadline <= 0:
+            raise ValueError("deadline should be a positive number")
+
+    @property
+    def retry_exceptions(self) -> tuple:
+        """Exception types to retry"""
+        if self._retry_exceptions is None:
+            return _transient_errors()
+        return self._retry_exceptions
+
+    def remaining(self, started: float) -> float or None:
+        """
+        :param started: time.monotonic() of the first attempt
+        :return: seconds left until the deadline, None if there is none
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - (time.monotonic() - started)
+
+    def retry_delay(self, attempt: int, started: float,
+                    status_code: int or None = None,
+                    error: BaseException or None = None,
+                    retry_after: str or None = None) -> float or None:
+        """
+        :param attempt: Number of attempts made so far
+        :param started: time.monotonic() of the first attempt
+        :param status_code: HTTP status of the last attempt, if any
+        :param error: Exception raised by the last attempt, if any
+        :param retry_after: Retry-After header of the last response
+        :return: seconds to wait before the next attempt, or None if the
+            call should not be retried
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if error is not None:
+            if not isinstance(error, self.retry_exceptions):
+                return None
+        elif status_code not in self.retry_statuses:
+            return None
+
+        delay = random.uniform(0, min(
+            self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        requested = RateLimiter.parse_retry_after(retry_after)
+        if requested is not None:
+            delay = max(delay, requested)
+
+        remaining = self.remaining(started)
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while the endpoint is unhealthy.
+
+    After `failure_threshold` consecutive failures (connection errors,
+    timeouts or HTTP 5xx) the circuit opens and calls raise
+    `CircuitOpenError` without touching the network. After
+    `recovery_timeout` seconds a single trial call is let through: its
+    success closes the circuit, its failure opens it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, **kwargs):
+        """
+
+        :key failure_threshold: int: (optional) Consecutive failures that
+            open the circuit, 5 by default
+        :key recovery_timeout: float: (optional) Seconds before a trial
+            call is allowed, 30 by default
+        """
+        self.failure_threshold = kwargs.get('failure_threshold', 5)
+        self.recovery_timeout = kwargs.get('recovery_timeout', 30.0)
+
+        if type(self.failure_threshold) is not int \
+                or self.failure_threshold < 1:
+            raise ValueError("failure_threshold should be a positive int")
+        if self.recovery_timeout <= 0:
+            raise ValueError("recovery_timeout should be a positive number")
+
+        self._lock = threading.Lock()
+        self._state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == CircuitBreaker.OPEN and self._recovered():
+                return CircuitBreaker.HALF_OPEN
+            return self._state
+
+    @property
+    def failures(self) -> int:
+        """Number of consecutive failures"""
+        with self._lock:
+            return self._failures
+
+    def before_call(self):
+        """
+        :raises CircuitOpenError: the call must not be made
+        """
+        with self._lock:
+            if self._state == CircuitBreaker.CLOSED:
+                return
+            if self._state == CircuitBreaker.OPEN and self._recovered():
+                self._state = CircuitBreaker.HALF_OPEN
+            if self._state == CircuitBreaker.HALF_OPEN \
+                    and not self._trial_running:
+                self._trial_running = True
+                return
+            raise CircuitOpenError(
+                "Circuit is open after {} consecutive failures".format(
+                    self._failures))
+
+    def record(self, healthy: bool):
+        """
+        Report the outcome of a call allowed by `before_call`.
+        """
+        with self._lock:
+            self._trial_running = False
+            if healthy:
+                self._failures = 0
+                self._state = CircuitBreaker.CLOSED
+                return
+            self._failures += 1
+            if self._state == CircuitBreaker.HALF_OPEN \
+                    or self._failures >= self.failure_threshold:
+                self._state = CircuitBreaker.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """
+        Report that a call allowed by `before_call` ended without telling
+        anything about the endpoint's health.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def reset(self):
+        with self._lock:
+            self._state = CircuitBreaker.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def _recovered(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.recovery_timeout
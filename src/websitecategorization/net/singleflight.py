@@ -0,0 +1,92 @@
+from typing import Callable, Hashable
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and get the same result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: Hashable, function: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of `SingleFlight`.
+
+    A waiter being cancelled does not cancel the shared call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, function: Callable):
+        """
+        :param function: Coroutine function to run once per key
+        """
+        # Imported here, so that the sync client does not load asyncio
+        import asyncio
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(function())
+            self._calls[key] = future
+
+            def forget(done):
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+                # Mark the exception retrieved even if all waiters are gone
+                if not done.cancelled():
+                    done.exception()
+
+            future.add_done_callback(forget)
+
+        return await asyncio.shield(future)
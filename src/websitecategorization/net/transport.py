@@ -0,0 +1,489 @@
+"""
+HTTP transports of `ApiRequester`.
+
+A transport sends one HTTP request and returns the `TransportResponse`.
+Retries, rate limiting, hedging and instrumentation stay in the
+requester, so that they work the same over every transport:
+
+- `RequestsTransport`: pooled ``requests`` session, the default;
+- `Urllib3Transport`: ``urllib3`` pool manager, with less work per call;
+- `ReplayTransport`: answers from recorded responses, without network;
+- `RecordingTransport`: records the traffic of another transport to a
+  JSON Lines file that `ReplayTransport` replays.
+"""
+from collections import deque
+from urllib.parse import urlencode
+from ..exceptions.error import HttpApiError
+import json
+import logging
+import threading
+import time
+
+
+# Connect time of the request in progress on the current thread
+_timing = threading.local()
+
+# Request parameters and headers never written to recordings
+_SECRETS = frozenset(('apikey', 'x-authentication-token'))
+
+
+# keep_alive -> urllib3 pool classes by scheme
+_pool_classes = {}
+_pool_bases = None
+
+
+def _timed_pool_classes(keep_alive: float) -> dict:
+    """
+    urllib3 pool classes by scheme, recording connect times in `_timing`
+    and closing connections idle for more than `keep_alive` seconds.
+
+    Built on first use, so that importing the client does not load
+    urllib3.
+    """
+    global _pool_bases
+    classes = _pool_classes.get(keep_alive)
+    if classes is not None:
+        return classes
+    if _pool_bases is None:
+        _pool_bases = _build_pool_bases()
+    classes = _pool_classes[keep_alive] = {
+        scheme: type(base.__name__, (base,), {'keep_alive': keep_alive})
+        for scheme, base in _pool_bases.items()}
+    return classes
+
+
+def _build_pool_bases() -> dict:
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, \
+        HTTPSConnectionPool
+
+    class _TimedHTTPConnection(HTTPConnection):
+        # time.monotonic() since which the connection is in the pool
+        idle_since = None
+
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                super().connect()
+            finally:
+                _timing.connect = time.perf_counter() - started
+
+    class _TimedHTTPSConnection(HTTPSConnection):
+        idle_since = None
+
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                super().connect()
+            finally:
+                _timing.connect = time.perf_counter() - started
+
+    class _Expiring:
+        """
+        Closes pooled connections idle for more than `keep_alive`
+        seconds; urllib3 reconnects closed connections when reused
+        """
+        keep_alive = None
+
+        def _get_conn(self, timeout=None):
+            connection = super()._get_conn(timeout)
+            if connection.idle_since is not None and time.monotonic() \
+                    - connection.idle_since > self.keep_alive:
+                connection.close()
+            connection.idle_since = None
+            return connection
+
+        def _put_conn(self, connection):
+            now = time.monotonic()
+            if connection is not None:
+                connection.idle_since = now
+            super()._put_conn(connection)
+
+            # Under steady load the most recently used connections are
+            # reused, and the others are only closed here
+            queue = self.pool
+            if queue is None:
+                return
+            with queue.mutex:
+                for pooled in queue.queue:
+                    if pooled is not None and pooled.idle_since is not None \
+                            and now - pooled.idle_since > self.keep_alive:
+                        pooled.close()
+                        pooled.idle_since = None
+
+    class _TimedHTTPConnectionPool(_Expiring, HTTPConnectionPool):
+        ConnectionCls = _TimedHTTPConnection
+
+    class _TimedHTTPSConnectionPool(_Expiring, HTTPSConnectionPool):
+        ConnectionCls = _TimedHTTPSConnection
+
+    return {
+        'http': _TimedHTTPConnectionPool,
+        'https': _TimedHTTPSConnectionPool,
+    }
+
+
+class TransportResponse:
+    """
+    HTTP response returned by a transport.
+
+    `headers` has lower-case names. `elapsed` is the time in seconds from
+    sending the request to receiving the response headers.
+    """
+    __slots__ = ('status_code', 'headers', 'content', 'elapsed')
+
+    def __init__(self, status_code: int, headers: dict, content: bytes,
+                 elapsed: float = 0.0):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return '<TransportResponse [{}] {} bytes>'.format(
+            self.status_code, len(self.content))
+
+
+class Transport:
+    """
+    Sends HTTP requests for `ApiRequester`.
+
+    Subclasses implement `request`, may be called from several threads
+    at once, and stay usable after `close`.
+    """
+
+    def request(self, method: str, url: str, params: dict or None = None,
+                headers: dict or None = None, body: bytes or None = None,
+                timeout: (float, float) = (5, 30)) -> TransportResponse:
+        """
+        :param method: HTTP method, str
+        :param url: Request URL without query string, str
+        :param params: Query string parameters, dict
+        :param headers: Request headers, dict
+        :param body: Request body, bytes
+        :param timeout: (connect, read) timeouts in seconds
+        :return: TransportResponse
+        :raises ConnectionError: the endpoint could not be reached or did
+            not answer in time; retried by `RetryPolicy` like the errors
+            of the HTTP library in use
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """Release held connections and files"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _PooledTransport(Transport):
+    """
+    Keeps connection pools. Connections idle for more than `keep_alive`
+    seconds are closed, and all pools are dropped once no request has
+    been in flight for that long.
+    """
+    _logger = logging.getLogger("api-requester")
+
+    def __init__(self, **kwargs):
+        """
+        :key pool_connections: int: (optional) Number of per-host
+            connection pools to keep, 10 by default
+        :key pool_maxsize: int: (optional) Maximum number of connections
+            kept open per host, 10 by default. More are opened for
+            concurrent requests and closed after use, unless pool_block
+            is set
+        :key pool_block: bool: (optional) If True, requests wait for one
+            of the pool_maxsize connections of their host instead of
+            opening another one. False by default
+        :key keep_alive: float: (optional) Idle time in seconds after which
+            pooled connections are closed, 60 by default
+        """
+        self.pool_connections = kwargs.get('pool_connections', 10)
+        self.pool_maxsize = kwargs.get('pool_maxsize', 10)
+        self.pool_block = bool(kwargs.get('pool_block', False))
+        self.keep_alive = kwargs.get('keep_alive', 60)
+        if type(self.pool_connections) is not int \
+                or self.pool_connections < 1:
+            raise ValueError("pool_connections should be a positive int")
+        if type(self.pool_maxsize) is not int or self.pool_maxsize < 1:
+            raise ValueError("pool_maxsize should be a positive int")
+        if self.keep_alive is None or self.keep_alive <= 0:
+            raise ValueError("keep_alive should be a positive number")
+
+        self._pool = None
+        self._lock = threading.Lock()
+        self._last_used = 0.0
+        # Requests between `_get_pool` and `_used`
+        self._in_flight = 0
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            self._close_pool(pool)
+
+    def _get_pool(self):
+        """Callers must call `_used` once their request is done"""
+        with self._lock:
+            now = time.monotonic()
+            # A request in flight may outlast keep_alive on its connection
+            if self._pool is not None and not self._in_flight \
+                    and now - self._last_used > self.keep_alive:
+                self._logger.debug(
+                    "Dropping connections idle for more than %ss",
+                    self.keep_alive)
+                self._close_pool(self._pool)
+                self._pool = None
+            if self._pool is None:
+                self._pool = self._new_pool()
+            self._in_flight += 1
+            self._last_used = now
+            return self._pool
+
+    def _used(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._last_used = time.monotonic()
+
+    def _new_pool(self):
+        raise NotImplementedError()
+
+    def _close_pool(self, pool):
+        raise NotImplementedError()
+
+
+class RequestsTransport(_PooledTransport):
+    """
+    Sends requests with a pooled ``requests`` session, keeping
+    connections alive between calls. The default transport.
+    """
+
+    def request(self, method: str, url: str, params: dict or None = None,
+                headers: dict or None = None, body: bytes or None = None,
+                timeout: (float, float) = (5, 30)) -> TransportResponse:
+        session = self._get_pool()
+        try:
+            response = session.request(method, url, params=params,
+                                       headers=headers, data=body,
+                                       timeout=timeout)
+        finally:
+            self._used()
+        return TransportResponse(
+            response.status_code,
+            {name.lower(): value for name, value in response.headers.items()},
+            response.content,
+            response.elapsed.total_seconds())
+
+    def _new_pool(self):
+        from requests import Session
+        from requests.adapters import HTTPAdapter
+        session = Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        adapter.poolmanager.pool_classes_by_scheme = _timed_pool_classes(
+            self.keep_alive)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _close_pool(self, pool):
+        pool.close()
+
+
+class Urllib3Transport(_PooledTransport):
+    """
+    Sends requests with a ``urllib3`` pool manager directly, skipping the
+    session, hook and cookie handling ``requests`` does on every call.
+    """
+
+    def request(self, method: str, url: str, params: dict or None = None,
+                headers: dict or None = None, body: bytes or None = None,
+                timeout: (float, float) = (5, 30)) -> TransportResponse:
+        from urllib3 import Timeout
+        if params:
+            url = url + '?' + urlencode(params)
+        manager = self._get_pool()
+        sent = time.perf_counter()
+        try:
+            response = manager.urlopen(
+                method, url, body=body, headers=headers, retries=False,
+                redirect=False, preload_content=False,
+                timeout=Timeout(connect=timeout[0], read=timeout[1]))
+            elapsed = time.perf_counter() - sent
+            try:
+                content = response.read()
+            finally:
+                response.release_conn()
+        finally:
+            self._used()
+        return TransportResponse(
+            response.status,
+            {name.lower(): value for name, value in response.headers.items()},
+            content, elapsed)
+
+    def _new_pool(self):
+        from urllib3 import PoolManager
+        manager = PoolManager(num_pools=self.pool_connections,
+                              maxsize=self.pool_maxsize,
+                              block=self.pool_block)
+        manager.pool_classes_by_scheme = _timed_pool_classes(
+            self.keep_alive)
+        return manager
+
+    def _close_pool(self, pool):
+        pool.clear()
+
+
+def _text(data: bytes or None) -> str or None:
+    # Bytes that are not UTF-8 survive the JSON round trip as surrogates
+    return None if data is None else data.decode('utf-8', 'surrogateescape')
+
+
+def _bytes(text: str or None) -> bytes or None:
+    return None if text is None else text.encode('utf-8', 'surrogateescape')
+
+
+def _public(params: dict or None) -> dict:
+    return {name: str(value) for name, value in (params or {}).items()
+            if name.lower() not in _SECRETS}
+
+
+def _key(method: str, url: str, params: dict, body: str or None) -> tuple:
+    return method.upper(), url, tuple(sorted(params.items())), body
+
+
+class ReplayTransport(Transport):
+    """
+    Answers requests from recorded responses, without network access.
+
+    Requests are matched by method, URL, query parameters and body; API
+    keys are ignored. Responses recorded for the same request are served
+    in order, and the last one again for later calls.
+
+    Usage::
+
+        transport = ReplayTransport('recording.jsonl')
+        client = Client('Your API key', transport=transport)
+    """
+
+    def __init__(self, path: str or None = None):
+        """
+        :param path: (optional) JSON Lines file written by
+            `RecordingTransport`
+        """
+        self._responses = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        self._add_record(json.loads(line))
+
+    def add(self, method: str, url: str, params: dict or None = None,
+            body: bytes or None = None, status_code: int = 200,
+            headers: dict or None = None, content: bytes = b''):
+        """
+        Add a response.
+
+        :param method: HTTP method of the request, str
+        :param url: Request URL without query string, str
+        :param params: Query string parameters of the request, dict
+        :param body: Request body, bytes
+        :param status_code: Response status code, int
+        :param headers: Response headers, dict
+        :param content: Response body, bytes
+        """
+        self._add_record({
+            'method': method, 'url': url, 'params': _public(params),
+            'body': _text(body), 'status': status_code,
+            'headers': headers or {}, 'content': _text(content)})
+
+    def request(self, method: str, url: str, params: dict or None = None,
+                headers: dict or None = None, body: bytes or None = None,
+                timeout: (float, float) = (5, 30)) -> TransportResponse:
+        key = _key(method, url, _public(params), _text(body))
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise HttpApiError(
+                    "No recorded response for {} {} {}".format(
+                        method, url, _public(params)))
+            response = responses[0] if len(responses) == 1 \
+                else responses.popleft()
+        # Callers may not share the headers dict
+        return TransportResponse(response.status_code,
+                                 dict(response.headers), response.content)
+
+    def _add_record(self, record: dict):
+        key = _key(record['method'], record['url'], record.get('params')
+                   or {}, record.get('body'))
+        response = TransportResponse(
+            record['status'],
+            {name.lower(): value
+             for name, value in (record.get('headers') or {}).items()},
+            _bytes(record['content']))
+        with self._lock:
+            self._responses.setdefault(key, deque()).append(response)
+
+
+class RecordingTransport(Transport):
+    """
+    Sends requests with another transport and appends every exchange to
+    a JSON Lines file, for `ReplayTransport`.
+
+    API keys are not recorded. Failed requests without a response are
+    not recorded either.
+
+    Usage::
+
+        with RecordingTransport('recording.jsonl') as transport:
+            Client('Your API key', transport=transport).data('example.com')
+    """
+
+    def __init__(self, path: str, transport: Transport or None = None):
+        """
+        :param path: File the exchanges are appended to
+        :param transport: (optional) Transport sending the requests, a
+            `RequestsTransport` by default
+        """
+        self._path = path
+        self._transport = transport if transport is not None \
+            else RequestsTransport()
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def request(self, method: str, url: str, params: dict or None = None,
+                headers: dict or None = None, body: bytes or None = None,
+                timeout: (float, float) = (5, 30)) -> TransportResponse:
+        response = self._transport.request(method, url, params, headers,
+                                           body, timeout)
+        line = json.dumps({
+            'method': method, 'url': url, 'params': _public(params),
+            'body': _text(body), 'status': response.status_code,
+            'headers': {name: value
+                        for name, value in response.headers.items()
+                        if name not in _SECRETS},
+            'content': _text(response.content)}) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+        return response
+
+    def close(self):
+        self._transport.close()
+        with self._lock:
+            file, self._file = self._file, None
+        if file is not None:
+            file.close()
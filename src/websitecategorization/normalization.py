@@ -0,0 +1,186 @@
+"""
+Domain name normalization.
+
+Turns user input such as ``https://WWW.Example.co.uk./path`` into the
+host name the API is asked about, and optionally collapses host names to
+their registrable domain (``example.co.uk``) with the Public Suffix List
+bundled as a precompiled trie (see tools/build_public_suffix.py).
+"""
+from urllib.parse import urlsplit
+import gzip
+import os
+import threading
+
+from .exceptions.error import ParameterError
+
+_TRIE_PATH = os.path.join(os.path.dirname(__file__), 'data',
+                          'public_suffix.gz')
+
+# Trie node flags
+_NONE, _ICANN, _PRIVATE, _ICANN_EXCEPTION, _PRIVATE_EXCEPTION = range(5)
+_FLAGS = {'-': _NONE, 'i': _ICANN, 'p': _PRIVATE,
+          '!': _ICANN_EXCEPTION, '?': _PRIVATE_EXCEPTION}
+
+_URL_CHARACTERS = frozenset('/:@?#')
+
+_trie = None
+_trie_version = None
+_trie_lock = threading.Lock()
+
+
+def _load_trie() -> dict:
+    """
+    :return: root of the trie of reversed labels. Nodes are
+        [flag, children dict or None] lists
+    """
+    global _trie, _trie_version
+    with _trie_lock:
+        if _trie is not None:
+            return _trie
+        with gzip.open(_TRIE_PATH, 'rt', encoding='ascii') as file:
+            lines = file.read().split('\n')
+
+        root = {}
+        # Children dicts of the last node seen at each depth
+        path = [root]
+        for line in lines:
+            if not line:
+                continue
+            if line[0] == '#':
+                _trie_version = line[len('# VERSION '):]
+                continue
+            depth = ord(line[0]) - 48
+            node = [_FLAGS[line[1]], {}]
+            path[depth][line[2:]] = node
+            del path[depth + 1:]
+            path.append(node[1])
+        _prune(root)
+        _trie = root
+        return _trie
+
+
+def _prune(children: dict):
+    # Leaves get None instead of an empty dict, to end lookups early
+    for node in children.values():
+        if node[1]:
+            _prune(node[1])
+        else:
+            node[1] = None
+
+
+class DomainNormalizer:
+    """
+    Normalization applied to domain names before validation.
+
+    - URLs are reduced to their host name, e.g. ``https://user@host:443/``
+    - surrounding whitespace and trailing dots are removed
+    - names are lowercased; internationalized names are converted to
+      IDNA ASCII (``xn--`` labels)
+    - with `collapse`, names are replaced with their registrable domain:
+      ``a.example.com`` and ``www.example.com`` become ``example.com``,
+      so that they are looked up, deduplicated and cached once
+
+    Usage::
+
+        client = Client('Your API key', normalizer=DomainNormalizer())
+    """
+
+    def __init__(self, **kwargs):
+        """
+
+        :key collapse: bool: (optional) Replace host names with their
+            registrable domain, True by default
+        :key private_suffixes: bool: (optional) Honor the private section
+            of the Public Suffix List, so that e.g. ``user.github.io`` is
+            a registrable domain of its own. True by default
+        """
+        self._collapse = bool(kwargs.get('collapse', True))
+        private = bool(kwargs.get('private_suffixes', True))
+        self._rules = frozenset((_ICANN, _PRIVATE) if private
+                                else (_ICANN,))
+        self._exceptions = frozenset(
+            (_ICANN_EXCEPTION, _PRIVATE_EXCEPTION) if private
+            else (_ICANN_EXCEPTION,))
+
+    @property
+    def collapse(self) -> bool:
+        return self._collapse
+
+    @staticmethod
+    def version() -> str:
+        """Version of the bundled Public Suffix List"""
+        _load_trie()
+        return _trie_version
+
+    def normalize(self, value: str) -> str:
+        """
+        :param value: Domain name, host name or URL, str
+        :return: normalized domain name. Not validated
+        :raises ParameterError: the value has no host name or it cannot be
+            converted to IDNA
+        """
+        host = str(value).strip()
+        if not _URL_CHARACTERS.isdisjoint(host):
+            try:
+                host = urlsplit(
+                    host if '//' in host else '//' + host).hostname
+            except ValueError:
+                host = None
+            if not host:
+                raise ParameterError("Invalid domain name")
+        host = host.rstrip('.').lower()
+        if not host.isascii():
+            try:
+                host = host.encode('idna').decode('ascii')
+            except UnicodeError:
+                raise ParameterError("Invalid domain name")
+
+        if self._collapse:
+            return self.registrable_domain(host) or host
+        return host
+
+    def public_suffix(self, host: str) -> str:
+        """
+        :param host: Normalized host name, str
+        :return: public suffix of the host name, e.g. ``co.uk``
+        """
+        labels = host.split('.')
+        return '.'.join(labels[len(labels) - self._suffix_length(labels):])
+
+    def registrable_domain(self, host: str) -> str or None:
+        """
+        :param host: Normalized host name, str
+        :return: public suffix plus one label, e.g. ``example.co.uk``.
+            None if the host name is a public suffix itself or an IPv4
+            address
+        """
+        labels = host.split('.')
+        if labels[-1].isdigit():
+            return None
+        length = self._suffix_length(labels) + 1
+        if len(labels) < length:
+            return None
+        if len(labels) == length:
+            return host
+        return '.'.join(labels[-length:])
+
+    def _suffix_length(self, labels: list) -> int:
+        children = _trie if _trie is not None else _load_trie()
+        rules = self._rules
+        # Without a matching rule, the top level domain is the suffix
+        length = 1
+        depth = 0
+        for label in reversed(labels):
+            exact = children.get(label)
+            if exact is not None and exact[0] in self._exceptions:
+                return depth
+            wildcard = children.get('*')
+            depth += 1
+            if (exact is not None and exact[0] in rules) \
+                    or (wildcard is not None and wildcard[0] in rules):
+                length = depth
+            node = exact if exact is not None else wildcard
+            if node is None or node[1] is None:
+                break
+            children = node[1]
+        return length
@@ -0,0 +1,376 @@
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps, loads, JSONDecodeError
+from typing import Iterable, Iterator, BinaryIO
+from xml.sax.saxutils import escape
+import csv
+import io
+import os
+
+from .client import Client
+from .sharding import ShardedRunner, shard_of
+from .exceptions.error import ParameterError, \
+    UnparsableApiResponseError, WebsiteCategorizationApiError
+
+
+PipelineStats = namedtuple('PipelineStats', [
+    'read', 'resumed', 'duplicates', 'invalid', 'succeeded', 'failed'
+])
+
+
+class Pipeline:
+    """
+    Streaming bulk categorization with checkpoint/resume.
+
+    Domains are read lazily, normalized, validated and deduplicated on
+    the fly, looked up concurrently through `Client.raw_data` and written
+    in input order. Output formats:
+
+    - JSONL: one raw API response per line, or an error record
+      ``{"domainName": ..., "error": {"type": ..., "message": ...}}``
+      for invalid domains and failed lookups
+    - CSV: one row per category with domain, website_responded,
+      category_id, category_name, confidence and error columns
+    - XML: raw XML API responses, or ``<error>`` elements, one after
+      another
+
+    When writing to a file, a checkpoint file records how much of the
+    input has been written. Running the pipeline again on the same input
+    resumes after the last checkpoint; results written after it are
+    discarded and redone.
+
+    Memory use is bounded by the in-flight window and `dedupe_window`,
+    not by the input size. Deduplication therefore only catches repeats
+    among the last `dedupe_window` distinct domains.
+
+    With `shard`, only the domains of one shard are processed, so that
+    machines given the same input and shard count split the job between
+    them. A `ShardedRunner` moves the lookups to worker processes.
+    """
+    _client: Client
+    _output: str or BinaryIO
+    _checkpoint: str or None
+
+    JSONL_FORMAT = 'jsonl'
+    CSV_FORMAT = 'csv'
+    XML_FORMAT = 'xml'
+
+    CSV_HEADER = ['domain', 'website_responded', 'category_id',
+                  'category_name', 'confidence', 'error']
+
+    def __init__(self, client: Client, output: str or BinaryIO, **kwargs):
+        """
+        :param client: `Client` used for lookups. Its cache, rate limiter
+            and retry policy apply
+        :param output: Path of the file to write, str, or a binary stream
+            such as ``sys.stdout.buffer``. Streams are not checkpointed
+        :key output_format: str: (optional) Use Pipeline.JSONL_FORMAT,
+            Pipeline.CSV_FORMAT, Pipeline.XML_FORMAT constants. JSONL by
+            default
+        :key checkpoint: str: (optional) Path of the checkpoint file,
+            output path with a '.checkpoint' suffix by default
+        :key on_result: callable: (optional) Called with each domain and
+            its result, a raw response or an exception, as it is written
+        :key min_confidence: float: (optional) Minimal confidence value
+        :key max_workers: int: (optional) Number of concurrent lookups.
+            Defaults to the requester's `pool_maxsize`
+        :key dedupe_window: int: (optional) Number of recent distinct
+            domains remembered for deduplication, 100000 by default
+        :key checkpoint_interval: int: (optional) Number of written
+            results between checkpoints, 1000 by default
+        :key shard: tuple: (optional) (index, count) pair. Only domains in
+            shard `index` of `count`, by `shard_of` their normalized name,
+            are processed; others are skipped as if absent
+        :key runner: ShardedRunner: (optional) Run lookups in its worker
+            processes instead of `client`, which then only normalizes
+            domains. Its `max_workers` is per process
+        """
+        self._client = client
+        if hasattr(output, 'write'):
+            self._output = output
+            self._checkpoint = None
+            if kwargs.get('checkpoint') is not None:
+                raise ParameterError("Streams cannot be checkpointed")
+        else:
+            self._output = os.fspath(output)
+            self._checkpoint = os.fspath(
+                kwargs.get('checkpoint', self._output + '.checkpoint'))
+
+        self._output_format = str(
+            kwargs.get('output_format', Pipeline.JSONL_FORMAT)).lower()
+        if self._output_format not in {Pipeline.JSONL_FORMAT,
+                                       Pipeline.CSV_FORMAT,
+                                       Pipeline.XML_FORMAT}:
+            raise ParameterError(
+                "Output format must be {}, {} or {}".format(
+                    Pipeline.JSONL_FORMAT, Pipeline.CSV_FORMAT,
+                    Pipeline.XML_FORMAT))
+        self._on_result = kwargs.get('on_result', None)
+
+        min_confidence = kwargs.get('min_confidence', None)
+        self._min_confidence = Client._validate_confidence(min_confidence) \
+            if min_confidence is not None else None
+
+        max_workers = kwargs.get('max_workers', None)
+        self._max_workers = Client._validate_max_workers(max_workers) \
+            if max_workers is not None \
+            else client.api_requester.pool_maxsize
+
+        self._dedupe_window = kwargs.get('dedupe_window', 100000)
+        if type(self._dedupe_window) is not int or self._dedupe_window < 0:
+            raise ParameterError("dedupe_window should be a non-negative int")
+
+        self._checkpoint_interval = kwargs.get('checkpoint_interval', 1000)
+        if type(self._checkpoint_interval) is not int \
+                or self._checkpoint_interval < 1:
+            raise ParameterError(
+                "checkpoint_interval should be a positive int")
+
+        shard = kwargs.get('shard', None)
+        self._shard = ShardedRunner._validate_shard(shard) \
+            if shard is not None else None
+        self._runner = kwargs.get('runner', None)
+
+    @property
+    def output(self) -> str or BinaryIO:
+        return self._output
+
+    @property
+    def output_format(self) -> str:
+        return self._output_format
+
+    @property
+    def checkpoint(self) -> str or None:
+        return self._checkpoint
+
+    def run(self, domains: Iterable[str] or str) -> PipelineStats:
+        """
+        Categorize all domains, resuming from the checkpoint if any.
+
+        :param domains: Domain names, iterable of strings consumed lazily,
+            or the path of a file with one domain per line
+        :return: `PipelineStats` of this run
+        :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code.
+            Aborts the run; the checkpoint allows resuming it
+        :raises ParameterError: the checkpoint does not match the output
+        """
+        if isinstance(domains, (str, bytes, os.PathLike)):
+            with open(domains, 'r', encoding='utf-8') as source:
+                return self._run(source)
+        return self._run(domains)
+
+    def _run(self, domains: Iterable[str]) -> PipelineStats:
+        if self._checkpoint is None:
+            return self._write(domains, self._output, 0, 0)
+
+        position, offset = self._load_checkpoint()
+        with open(self._output, 'ab') as output:
+            output.truncate(offset)
+            output.seek(offset)
+            return self._write(domains, output, position, offset)
+
+    def _write(self, domains: Iterable[str], output: BinaryIO,
+               position: int, offset: int) -> PipelineStats:
+        counts = {'read': 0, 'duplicates': 0, 'invalid': 0,
+                  'succeeded': 0, 'failed': 0}
+        done = position
+        output_format = Client.XML_FORMAT \
+            if self._output_format == Pipeline.XML_FORMAT else None
+        record = {Pipeline.JSONL_FORMAT: Pipeline._jsonl_record,
+                  Pipeline.CSV_FORMAT: Pipeline._csv_record,
+                  Pipeline.XML_FORMAT: Pipeline._xml_record
+                  }[self._output_format]
+
+        if offset == 0 and self._output_format == Pipeline.CSV_FORMAT:
+            output.write(Pipeline._csv_rows([Pipeline.CSV_HEADER]))
+
+        def lookup(domain):
+            return self._client.raw_data(domain, self._min_confidence,
+                                         output_format)
+
+        # Index after the last input line read, shard-skipped lines too
+        consumed = [position]
+        items = self._items(domains, position, counts, consumed)
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            if self._runner is None:
+                results = Client._collect_ordered(
+                    executor, lookup, items, 2 * self._max_workers)
+            else:
+                results = Pipeline._decoded(self._runner._collect(
+                    items, self._min_confidence, output_format))
+            written = 0
+            try:
+                for (index, domain), result in results:
+                    output.write(record(domain, result))
+                    if isinstance(result, str):
+                        counts['succeeded'] += 1
+                    elif isinstance(result, ParameterError):
+                        counts['invalid'] += 1
+                    else:
+                        counts['failed'] += 1
+                    if self._on_result is not None:
+                        self._on_result(domain, result)
+
+                    done = index + 1
+                    written += 1
+                    if self._checkpoint is not None \
+                            and written % self._checkpoint_interval == 0:
+                        output.flush()
+                        self._save_checkpoint(done, output.tell())
+                done = max(done, consumed[0])
+            finally:
+                output.flush()
+                # Everything before `done` has been written, so an aborted
+                # run resumes right after it
+                if self._checkpoint is not None:
+                    self._save_checkpoint(done, output.tell())
+
+        return PipelineStats(resumed=position, **counts)
+
+    def _items(self, domains: Iterable[str], skip: int, counts: dict,
+               consumed: list) -> Iterator[tuple]:
+        """
+        :param consumed: One-item list, set to the index after each input
+            line read
+        :return: iterator of ((input index, domain), validated domain,
+            result) tuples for `Client._collect_ordered`
+        """
+        normalizer = self._client.normalizer
+        seen = OrderedDict()
+        for index, line in enumerate(domains):
+            if index >= skip:
+                consumed[0] = index + 1
+            domain = Pipeline._normalize(line)
+            if not domain:
+                if index >= skip:
+                    counts['read'] += 1
+                continue
+
+            # Deduplicated by what is looked up, so with a collapsing
+            # normalizer other subdomains of a domain are duplicates
+            key, error = domain, None
+            if normalizer is not None:
+                try:
+                    key = normalizer.normalize(domain)
+                except ParameterError as invalid:
+                    error = invalid
+            if self._shard is not None \
+                    and shard_of(key, self._shard[1]) != self._shard[0]:
+                continue
+
+            # The skipped prefix still goes through deduplication so
+            # that a resumed run sees the same duplicates
+            duplicate = key in seen
+            if duplicate:
+                seen.move_to_end(key)
+            elif self._dedupe_window:
+                seen[key] = None
+                if len(seen) > self._dedupe_window:
+                    seen.popitem(last=False)
+
+            if index < skip:
+                continue
+            counts['read'] += 1
+            if duplicate:
+                counts['duplicates'] += 1
+                continue
+
+            valid = None
+            if error is None:
+                try:
+                    valid = Client._validate_domain_name(key)
+                except ParameterError as invalid:
+                    error = invalid
+            yield (index, domain), valid, error
+
+    @staticmethod
+    def _decoded(results: Iterator[tuple]) -> Iterator[tuple]:
+        for domain, result in results:
+            yield domain, result.decode('utf-8') \
+                if isinstance(result, bytes) else result
+
+    @staticmethod
+    def _normalize(line: str) -> str:
+        return line.strip().rstrip('.').lower()
+
+    @staticmethod
+    def _jsonl_record(domain: str, result) -> bytes:
+        if isinstance(result, str):
+            # Raw JSON cannot contain literal line breaks inside strings,
+            # so removing them keeps the document intact on one line
+            line = result.replace('\r', '').replace('\n', '')
+        else:
+            line = dumps({'domainName': domain,
+                          'error': {'type': type(result).__name__,
+                                    'message': Pipeline._message(result)}})
+        return (line + '\n').encode('utf-8')
+
+    @staticmethod
+    def _csv_record(domain: str, result) -> bytes:
+        if isinstance(result, str):
+            try:
+                response = Client._parse_response(result)
+            except UnparsableApiResponseError as error:
+                result = error
+            else:
+                responded = int(response.website_responded)
+                return Pipeline._csv_rows(
+                    [[domain, responded, c.id, c.name, c.confidence, '']
+                     for c in response.categories]
+                    or [[domain, responded, '', '', '', '']])
+        return Pipeline._csv_rows([[domain, '', '', '', '', '{}: {}'.format(
+            type(result).__name__, Pipeline._message(result))]])
+
+    @staticmethod
+    def _csv_rows(rows: list) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def _xml_record(domain: str, result) -> bytes:
+        if isinstance(result, str):
+            document = result
+        else:
+            document = '<error domainName="{}" type="{}">{}</error>'.format(
+                escape(domain, {'"': '&quot;'}), type(result).__name__,
+                escape(Pipeline._message(result)))
+        if not document.endswith('\n'):
+            document += '\n'
+        return document.encode('utf-8')
+
+    @staticmethod
+    def _message(error: Exception) -> str:
+        if isinstance(error, WebsiteCategorizationApiError):
+            return str(error.message)
+        return str(error)
+
+    def _load_checkpoint(self) -> (int, int):
+        try:
+            with open(self._checkpoint, 'r', encoding='utf-8') as file:
+                state = loads(file.read())
+        except FileNotFoundError:
+            return 0, 0
+        except (OSError, JSONDecodeError) as error:
+            raise ParameterError(
+                "Unreadable checkpoint {}: {}".format(self._checkpoint, error))
+
+        position, offset = state.get('position'), state.get('offset')
+        if type(position) is not int or type(offset) is not int \
+                or position < 0 or offset < 0:
+            raise ParameterError(
+                "Invalid checkpoint {}".format(self._checkpoint))
+        try:
+            size = os.path.getsize(self._output)
+        except FileNotFoundError:
+            size = 0
+        if size < offset:
+            raise ParameterError("Checkpoint {} does not match {}".format(
+                self._checkpoint, self._output))
+        return position, offset
+
+    def _save_checkpoint(self, position: int, offset: int):
+        temporary = self._checkpoint + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(dumps({'position': position, 'offset': offset}))
+        os.replace(temporary, self._checkpoint)
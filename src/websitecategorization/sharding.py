@@ -0,0 +1,299 @@
+"""
+Sharded bulk lookups across processes and machines.
+
+Domains are assigned to shards by a stable hash of their normalized name,
+so that a job can be split across machines (``--shard i/N``) and across
+worker processes, each with its own `Client`, and every repeat of a
+domain lands in the same shard.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+from typing import Callable, Iterable, Iterator, Tuple
+import multiprocessing
+import os
+import pickle
+import queue
+
+from .client import Client
+from .exceptions.error import ParameterError, ApiAuthError, HttpApiError
+from .normalization import DomainNormalizer
+
+
+def _digest(key: str) -> int:
+    return int.from_bytes(
+        blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def shard_of(key: str, shards: int) -> int:
+    """
+    :param key: Normalized domain name, str
+    :param shards: Number of shards, int
+    :return: shard of the domain, from 0 to shards - 1. The same on every
+        machine and Python version
+    """
+    # Worker processes use the high half of the digest, so that the
+    # domains of one shard still spread across them
+    return (_digest(key) & 0xffffffff) % shards
+
+
+def parse_shard(value: str) -> (int, int):
+    """
+    :param value: Shard as 'i/N', e.g. '0/4' for the first of 4 shards
+    :return: (index, count) tuple
+    :raises ParameterError: invalid value
+    """
+    index, _, count = str(value).partition('/')
+    try:
+        return ShardedRunner._validate_shard((int(index), int(count)))
+    except (ValueError, ParameterError):
+        raise ParameterError("Shard should be i/N with 0 <= i < N, e.g. 0/4")
+
+
+def _portable(error: BaseException) -> BaseException:
+    # Exceptions cross back to the parent process pickled, unlike results
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return HttpApiError('{}: {}'.format(type(error).__name__, error))
+
+
+def _work(client_factory: Callable, max_workers: int, min_confidence,
+          output_format, inbox, outbox):
+    """Worker process: looks up batches of (sequence, domain) pairs"""
+    try:
+        client = client_factory()
+    except BaseException as error:
+        outbox.put((None, _portable(error)))
+        return
+
+    def lookup(domain: str) -> bytes or BaseException:
+        try:
+            response = client._lookup(
+                Client._validate_domain(domain, client.normalizer),
+                min_confidence, output_format)
+        except Exception as error:
+            return _portable(error)
+        # Undecoded unless the client caches responses
+        return response.encode('utf-8') if isinstance(response, str) \
+            else response
+
+    with client, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            batch = inbox.get()
+            if batch is None:
+                break
+            sequences, domains = batch
+            outbox.put((sequences, list(executor.map(lookup, domains))))
+
+
+class ShardedRunner:
+    """
+    Bulk lookups spread over worker processes.
+
+    Parsing and building responses takes a core at a few thousand lookups
+    per second. The runner routes each domain to one of `processes`
+    worker processes by a hash of the name. Each worker has its own
+    `Client` made by `client_factory` and runs `max_workers` concurrent
+    lookups. Results come back as undecoded response bodies in input
+    order.
+
+    Usage::
+
+        runner = ShardedRunner(functools.partial(Client, 'Your API key'),
+                               processes=4)
+        for domain, body in runner.run(domains):
+            ...
+
+    Domains are routed by their normalized name, so that e.g.
+    ``Example.COM`` and ``https://example.com/`` reach the same worker
+    and share its cache and deduplication.
+
+    `client_factory` and its arguments are pickled to start the workers,
+    so it should be a module-level function or a functools.partial of
+    one. Rate limits and caches apply per worker. Use a shared
+    `SqliteCache` file to share the cache between workers.
+    """
+
+    def __init__(self, client_factory: Callable[[], Client], **kwargs):
+        """
+        :param client_factory: Callable returning the `Client` of a
+            worker process
+        :key processes: int: (optional) Number of worker processes,
+            os.cpu_count() by default
+        :key max_workers: int: (optional) Number of concurrent lookups in
+            each worker process, 10 by default
+        :key batch_size: int: (optional) Number of domains sent to a
+            worker at once, 64 by default
+        :key normalizer: DomainNormalizer: (optional) Normalization of the
+            names before routing, which should match the normalizer of
+            the workers' clients. URLs are reduced to their host name and
+            names are lowercased without trailing dots by default
+        """
+        self._client_factory = client_factory
+        self._processes = kwargs.get('processes', os.cpu_count() or 1)
+        if type(self._processes) is not int or self._processes < 1:
+            raise ParameterError("processes should be a positive int")
+        self._max_workers = Client._validate_max_workers(
+            kwargs.get('max_workers', 10))
+        self._batch_size = kwargs.get('batch_size', 64)
+        if type(self._batch_size) is not int or self._batch_size < 1:
+            raise ParameterError("batch_size should be a positive int")
+        self._normalizer = kwargs.get('normalizer', None) \
+            or DomainNormalizer(collapse=False)
+
+    @property
+    def processes(self) -> int:
+        return self._processes
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def run(self, domains: Iterable[str],
+            min_confidence: float or None = None,
+            output_format: str or None = None
+            ) -> Iterator[Tuple[str, object]]:
+        """
+        Look up domains in the worker processes.
+
+        :param domains: Domain names, iterable of strings. Consumed lazily
+        :param min_confidence: Minimal confidence value, float
+        :param output_format: Use Client.JSON_FORMAT, Client.XML_FORMAT
+            constants
+        :return: iterator of (domain, response body bytes or exception)
+            pairs, in input order
+        :raises ApiAuthError: Server returned 401, 402 or 403 HTTP code.
+            Aborts the run since no other lookup can succeed
+        :raises ParameterError: invalid min_confidence or output_format.
+            Invalid domain names are yielded as ParameterError instead
+        """
+        _confidence = Client._validate_confidence(min_confidence) \
+            if min_confidence is not None else None
+        _output_format = Client._validate_output_format(output_format) \
+            if output_format is not None else None
+
+        # Validated and normalized by the workers' clients
+        items = ((domain, str(domain), None) for domain in domains)
+        yield from self._collect(items, _confidence, _output_format,
+                                 self._route_key)
+
+    def _collect(self, items: Iterable[tuple], min_confidence: float or None,
+                 output_format: str or None,
+                 route_key: Callable[[str], str] or None = None
+                 ) -> Iterator[tuple]:
+        """
+        Counterpart of `Client._collect_ordered` running the lookups in
+        the worker processes.
+
+        :param items: iterable of (domain, domain to look up, result)
+            tuples. Lookups are only made for tuples without a result
+        :param route_key: (optional) Callable returning the name a domain
+            to look up is routed by, the domain itself by default
+        """
+        context = multiprocessing.get_context('spawn')
+        outbox = context.Queue()
+        inboxes = [context.Queue() for _ in range(self._processes)]
+        workers = [context.Process(
+            target=_work, daemon=True,
+            args=(self._client_factory, self._max_workers, min_confidence,
+                  output_format, inbox, outbox)) for inbox in inboxes]
+        for worker in workers:
+            worker.start()
+
+        # In-flight lookups are bounded to keep every worker busy without
+        # buffering the input
+        window = 2 * self._processes * max(self._max_workers,
+                                           self._batch_size)
+        batches = [([], []) for _ in workers]
+        # [domain, result] of every item not yielded yet, in input order
+        pending = deque()
+        # Sequence number of the first pending item
+        first = 0
+        in_flight = 0
+
+        def send(worker: int):
+            if batches[worker][0]:
+                inboxes[worker].put(batches[worker])
+                batches[worker] = ([], [])
+
+        def receive():
+            while True:
+                try:
+                    sequences, results = outbox.get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not all(worker.is_alive() for worker in workers):
+                        raise HttpApiError("A worker process exited")
+            if sequences is None:
+                raise results
+            for sequence, result in zip(sequences, results):
+                if isinstance(result, ApiAuthError):
+                    raise result
+                pending[sequence - first][1] = result
+            return len(sequences)
+
+        finished = False
+        try:
+            for domain, valid, result in items:
+                if result is None:
+                    worker = (_digest(valid if route_key is None
+                                      else route_key(valid)) >> 32) \
+                        % self._processes
+                    batches[worker][0].append(first + len(pending))
+                    batches[worker][1].append(valid)
+                    if len(batches[worker][0]) >= self._batch_size:
+                        send(worker)
+                    in_flight += 1
+                pending.append([domain, result])
+
+                while in_flight >= window or \
+                        (pending and pending[0][1] is not None):
+                    if pending[0][1] is None:
+                        for worker in range(len(workers)):
+                            send(worker)
+                        in_flight -= receive()
+                        continue
+                    yield tuple(pending.popleft())
+                    first += 1
+
+            for worker in range(len(workers)):
+                send(worker)
+            while pending:
+                if pending[0][1] is None:
+                    in_flight -= receive()
+                    continue
+                yield tuple(pending.popleft())
+                first += 1
+            finished = True
+        finally:
+            # Workers still holding batches are not waited for
+            for inbox in inboxes:
+                inbox.put(None)
+            for worker in workers:
+                if finished:
+                    worker.join(5)
+                if worker.is_alive():
+                    worker.terminate()
+
+    def _route_key(self, domain: str) -> str:
+        try:
+            return self._normalizer.normalize(domain)
+        except ParameterError:
+            # Rejected by the worker anyway
+            return domain
+
+    @staticmethod
+    def _validate_shard(shard) -> (int, int):
+        try:
+            index, count = shard
+        except (TypeError, ValueError):
+            index = count = None
+        if type(index) is int and type(count) is int \
+                and 0 <= index < count:
+            return index, count
+
+        raise ParameterError(
+            "Shard should be an (index, count) pair with "
+            "0 <= index < count")
@@ -0,0 +1,204 @@
+from json import dumps
+from typing import Iterator
+import os
+import threading
+import time
+
+from .decoding import loads
+from .exceptions.error import ParameterError, UnparsableApiResponseError
+from .models.response import TaxonomyCategory
+
+
+class _Index:
+    __slots__ = ('by_id', 'by_name', 'children', 'expires')
+
+    def __init__(self, categories: list, expires: float):
+        self.by_id = {}
+        self.by_name = {}
+        self.children = {}
+        for category in sorted(categories, key=lambda c: c.id):
+            self.by_id[category.id] = category
+            self.by_name[category.name.casefold()] = category
+            if category.parent is not None:
+                self.children.setdefault(category.parent, []).append(
+                    category)
+        self.expires = expires
+
+
+class CategoryTaxonomy:
+    """
+    The API's category list, indexed by id and by name.
+
+    Fetched with `Client.list_categories` on first use and again once
+    `ttl` has passed. With `path`, the list is also saved to that file
+    and reused by later processes while it is fresh.
+
+    Usage::
+
+        taxonomy = CategoryTaxonomy(client, path='categories.json')
+        for category in client.data('whoisxmlapi.com').categories:
+            entry = category.resolve(taxonomy)
+            print(entry.name, [c.name for c in taxonomy.ancestors(entry)])
+
+    Category names are interned, so the taxonomy and the `Category`
+    objects of any number of responses share one copy of each name.
+    """
+
+    def __init__(self, client, **kwargs):
+        """
+        :param client: `Client` used to fetch the category list
+        :key ttl: float: (optional) Lifetime of the category list in
+            seconds, one day by default
+        :key path: str: (optional) File the category list is saved to
+            and loaded from
+        """
+        self._client = client
+        self._ttl = kwargs.get('ttl', 86400)
+        if not isinstance(self._ttl, (int, float)) or self._ttl <= 0:
+            raise ParameterError("ttl should be a positive number")
+        path = kwargs.get('path', None)
+        self._path = os.fspath(path) if path is not None else None
+
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def path(self) -> str or None:
+        return self._path
+
+    def refresh(self):
+        """
+        Fetch the category list now, even if the current one is fresh.
+
+        :raises WebsiteCategorizationApiError: see `Client.list_categories`
+        """
+        with self._lock:
+            self._index = self._fetch()
+
+    def get(self, key: int or str,
+            default=None) -> TaxonomyCategory or None:
+        """
+        :param key: Category id, int, or name, str. Names are matched
+            case-insensitively
+        :return: `TaxonomyCategory`, default if there is none
+        """
+        index = self._current()
+        if type(key) is int:
+            return index.by_id.get(key, default)
+        if type(key) is str:
+            return index.by_name.get(key.casefold(), default)
+        return default
+
+    def __getitem__(self, key: int or str) -> TaxonomyCategory:
+        category = self.get(key)
+        if category is None:
+            raise KeyError(key)
+        return category
+
+    def __contains__(self, key: int or str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._current().by_id)
+
+    def __iter__(self) -> Iterator[TaxonomyCategory]:
+        """Categories in id order"""
+        return iter(list(self._current().by_id.values()))
+
+    def parent(self, key: int or str or TaxonomyCategory) \
+            -> TaxonomyCategory or None:
+        """
+        :return: parent category, None for top tier categories
+        :raises KeyError: no such category
+        """
+        category = self._category(key)
+        if category.parent is None:
+            return None
+        return self.get(category.parent)
+
+    def children(self, key: int or str or TaxonomyCategory) -> list:
+        """
+        :return: list of `TaxonomyCategory` directly below this one
+        :raises KeyError: no such category
+        """
+        category = self._category(key)
+        return list(self._current().children.get(category.id, ()))
+
+    def ancestors(self, key: int or str or TaxonomyCategory) -> list:
+        """
+        :return: list of `TaxonomyCategory` from the parent up to the top
+            tier, empty for top tier categories
+        :raises KeyError: no such category
+        """
+        index = self._current()
+        category = self._category(key)
+        result = []
+        seen = {category.id}
+        while category.parent is not None \
+                and category.parent not in seen:
+            category = index.by_id.get(category.parent)
+            if category is None:
+                break
+            seen.add(category.id)
+            result.append(category)
+        return result
+
+    def _category(self, key) -> TaxonomyCategory:
+        if isinstance(key, TaxonomyCategory):
+            return key
+        return self[key]
+
+    def _current(self) -> _Index:
+        index = self._index
+        if index is None or time.monotonic() >= index.expires:
+            with self._lock:
+                index = self._index
+                if index is None or time.monotonic() >= index.expires:
+                    index = self._index = self._load()
+        return index
+
+    def _load(self) -> _Index:
+        if self._path is not None:
+            try:
+                with open(self._path, 'r', encoding='utf-8') as file:
+                    saved = loads(file.read())
+                age = time.time() - float(saved['fetched'])
+                if 0 <= age < self._ttl:
+                    return _Index(
+                        CategoryTaxonomy._parse(saved['categories']),
+                        time.monotonic() + self._ttl - age)
+            except (OSError, ValueError, TypeError, KeyError,
+                    UnparsableApiResponseError):
+                # Missing or unusable, fetched and rewritten below
+                pass
+        return self._fetch()
+
+    def _fetch(self) -> _Index:
+        fetched = time.time()
+        response = self._client.list_categories(output_format='json')
+        try:
+            raw = loads(response)
+        except ValueError as error:
+            raise UnparsableApiResponseError(
+                "Could not parse category list", error) from error
+        if type(raw) is dict:
+            raw = raw.get('categories')
+        categories = CategoryTaxonomy._parse(raw)
+        if self._path is not None:
+            temporary = self._path + '.tmp'
+            with open(temporary, 'w', encoding='utf-8') as file:
+                file.write(dumps({'fetched': fetched, 'categories': raw}))
+            os.replace(temporary, self._path)
+        return _Index(categories, time.monotonic() + self._ttl)
+
+    @staticmethod
+    def _parse(raw) -> list:
+        if type(raw) is not list:
+            raise UnparsableApiResponseError(
+                "Could not parse category list", None)
+        return [TaxonomyCategory(values) for values in raw
+                if type(values) is dict and values.get('id')]
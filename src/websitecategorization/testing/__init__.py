@@ -0,0 +1,3 @@
+__all__ = ['StubApiServer', 'AsyncStubApiServer']
+
+from .stub_server import StubApiServer, AsyncStubApiServer
@@ -0,0 +1,428 @@
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from urllib.parse import urlsplit, parse_qs
+from xml.sax.saxutils import escape
+import asyncio
+import random
+import socket
+import threading
+import time
+
+
+_DEFAULT_CATEGORIES = [
+    {'confidence': 0.92, 'id': 5, 'name': 'Computer and Internet Info'},
+    {'confidence': 0.71, 'id': 61, 'name': 'Technology'},
+    {'confidence': 0.58, 'id': 12, 'name': 'Business'},
+    {'confidence': 0.33, 'id': 40, 'name': 'News'},
+]
+
+_DEFAULT_TAXONOMY = [
+    {'id': 5, 'name': 'Computer and Internet Info', 'parent': None, 'tier': 1},
+    {'id': 12, 'name': 'Business', 'parent': None, 'tier': 1},
+    {'id': 40, 'name': 'News', 'parent': None, 'tier': 1},
+    {'id': 61, 'name': 'Technology', 'parent': 5, 'tier': 2},
+]
+
+_JSON = {'Content-Type': 'application/json'}
+
+# Applied by the API when minConfidence is omitted
+_DEFAULT_MIN_CONFIDENCE = 0.55
+
+_AS = {
+    'asn': 13335,
+    'domain': 'https://www.cloudflare.com',
+    'name': 'CLOUDFLARENET',
+    'route': '172.67.64.0/20',
+    'type': 'Content'
+}
+
+
+class _StubApi:
+    """
+    Request handling shared by the threaded and the asyncio stub servers.
+    """
+
+    def __init__(self, **kwargs):
+        self.latency = kwargs.get('latency', 0.0)
+        self.api_key = kwargs.get('api_key', None)
+        self.categories = list(_DEFAULT_CATEGORIES)
+        self.taxonomy = list(_DEFAULT_TAXONOMY)
+        # domain name -> HTTP status to answer with instead of a result
+        self.failures = {}
+        # domain names answered with websiteResponded=false
+        self.unresponsive = set()
+        # requests per second above which HTTP 429 is returned
+        self.quota = kwargs.get('quota', None)
+        # Retry-After value sent with 429 and stub failures, if set
+        self.retry_after = kwargs.get('retry_after', None)
+        # share of domain lookups answered with HTTP 500
+        self.error_rate = kwargs.get('error_rate', 0.0)
+        # share of responses delayed by tail_latency instead of latency
+        self.tail_rate = kwargs.get('tail_rate', 0.0)
+        self.tail_latency = kwargs.get('tail_latency', 0.0)
+        if kwargs.get('payload_size') is not None:
+            self.payload_size = kwargs['payload_size']
+
+        self._random = random.Random(kwargs.get('seed', None))
+
+        self._lock = threading.Lock()
+        self._request_count = 0
+        self._connection_count = 0
+        self._quota_tokens = float(self.quota or 0)
+        self._quota_updated = time.monotonic()
+
+    @property
+    def payload_size(self) -> int:
+        """Number of categories returned per domain"""
+        return len(self.categories)
+
+    @payload_size.setter
+    def payload_size(self, value: int):
+        # Confidences stay above the API's default threshold so that all
+        # categories are returned unless minConfidence is raised
+        self.categories = [
+            {'confidence': round(0.99 - 0.4 * i / max(value, 1), 4),
+             'id': 1000 + i, 'name': 'Stub category {}'.format(i)}
+            for i in range(value)]
+
+    @property
+    def request_count(self) -> int:
+        with self._lock:
+            return self._request_count
+
+    @property
+    def connection_count(self) -> int:
+        with self._lock:
+            return self._connection_count
+
+    def reset_counters(self):
+        with self._lock:
+            self._request_count = 0
+            self._connection_count = 0
+
+    def _count_connection(self):
+        with self._lock:
+            self._connection_count += 1
+
+    def respond(self, path: str, params: dict) -> (int, dict, str):
+        """
+        Build a response for the given request.
+
+        :return: HTTP status, headers and body
+        """
+        with self._lock:
+            self._request_count += 1
+            throttled = self._over_quota()
+
+        output_format = params.get('outputFormat', 'json').lower()
+
+        if throttled:
+            return _error(429, "Too many requests", self.retry_after)
+
+        if path.rstrip('/').endswith('/categories'):
+            return 200, dict(_JSON), dumps(self.taxonomy)
+
+        if self.api_key is not None and params.get('apiKey') != self.api_key:
+            return _error(403, "Access restricted. Check credits balance "
+                               "or enter the correct API key.")
+
+        domain = params.get('domainName')
+        if not domain:
+            return _error(422, "domainName is required")
+        if domain in self.failures:
+            return _error(self.failures[domain], "Stub failure",
+                          self.retry_after)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return _error(500, "Stub failure")
+
+        try:
+            min_confidence = float(params.get('minConfidence',
+                                              _DEFAULT_MIN_CONFIDENCE))
+        except ValueError:
+            return _error(422, "minConfidence should be a number")
+
+        responded = domain not in self.unresponsive
+        body = {
+            'as': _AS,
+            'domainName': domain,
+            'categories': [c for c in self.categories
+                           if responded and c['confidence'] >= min_confidence],
+            'createdDate': '2009-03-19T21:47:17+00:00',
+            'websiteResponded': responded
+        }
+        if output_format == 'xml':
+            return 200, {'Content-Type': 'application/xml'}, _to_xml(body)
+        return 200, dict(_JSON), dumps(body)
+
+    def _delay(self) -> float:
+        """
+        :return: seconds to wait before sending a response
+        """
+        if self.tail_rate:
+            with self._lock:
+                if self._random.random() < self.tail_rate:
+                    return self.tail_latency
+        return self.latency
+
+    def _over_quota(self) -> bool:
+        if not self.quota:
+            return False
+        now = time.monotonic()
+        self._quota_tokens = min(
+            float(self.quota),
+            self._quota_tokens + (now - self._quota_updated) * self.quota)
+        self._quota_updated = now
+        if self._quota_tokens < 1:
+            return True
+        self._quota_tokens -= 1
+        return False
+
+
+class StubApiServer(_StubApi):
+    """
+    Local HTTP server mimicking the Website Categorization API v3.
+
+    Serves ``/api/v3`` and ``/api/v3/categories`` on a background thread.
+    Intended for tests and benchmarks only.
+    """
+
+    def __init__(self, **kwargs):
+        """
+
+        :key host: str: (optional) Interface to bind, 127.0.0.1 by default
+        :key port: int: (optional) Port to bind, a free one by default
+        :key latency: float: (optional) Delay before every response, seconds
+        :key api_key: str: (optional) If set, other keys get HTTP 403
+        :key quota: float: (optional) Requests per second above which
+            HTTP 429 is returned
+        :key retry_after: str: (optional) Retry-After header sent with
+            HTTP 429 and 503
+        :key error_rate: float: (optional) Share of domain lookups answered
+            with HTTP 500, 0 by default
+        :key payload_size: int: (optional) Number of categories returned
+            per domain, 3 of the default 4 pass the default threshold
+        :key tail_rate: float: (optional) Share of responses delayed by
+            tail_latency instead of latency, 0 by default
+        :key tail_latency: float: (optional) Delay of the slow responses,
+            seconds
+        :key seed: int: (optional) Seed for error_rate and tail_rate
+            sampling
+        """
+        super().__init__(**kwargs)
+        self._thread = None
+
+        self._server = ThreadingHTTPServer(
+            (kwargs.get('host', '127.0.0.1'), kwargs.get('port', 0)),
+            _make_handler(self))
+        self._server.daemon_threads = True
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to `Client`/`ApiRequester`"""
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/api/v3".format(host, port)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, args=(0.05,),
+                daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+class AsyncStubApiServer(_StubApi):
+    """
+    asyncio flavour of `StubApiServer`, served on the running event loop.
+    """
+
+    def __init__(self, **kwargs):
+        """
+
+        :key host: str: (optional) Interface to bind, 127.0.0.1 by default
+        :key port: int: (optional) Port to bind, a free one by default
+        :key latency: float: (optional) Delay before every response, seconds
+        :key api_key: str: (optional) If set, other keys get HTTP 403
+        :key quota: float: (optional) Requests per second above which
+            HTTP 429 is returned
+        :key retry_after: str: (optional) Retry-After header sent with
+            HTTP 429 and 503
+        :key error_rate: float: (optional) Share of domain lookups answered
+            with HTTP 500, 0 by default
+        :key payload_size: int: (optional) Number of categories returned
+            per domain, 3 of the default 4 pass the default threshold
+        :key tail_rate: float: (optional) Share of responses delayed by
+            tail_latency instead of latency, 0 by default
+        :key tail_latency: float: (optional) Delay of the slow responses,
+            seconds
+        :key seed: int: (optional) Seed for error_rate and tail_rate
+            sampling
+        """
+        super().__init__(**kwargs)
+        self._host = kwargs.get('host', '127.0.0.1')
+        self._port = kwargs.get('port', 0)
+        self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to `AsyncClient`/`AsyncApiRequester`"""
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return "http://{}:{}/api/v3".format(host, port)
+
+    async def start(self):
+        if self._server is None:
+            self._server = await asyncio.start_server(
+                self._serve, self._host, self._port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        self._count_connection()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target = request_line.decode('latin-1').split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(
+                    int(headers.get('content-length') or 0))
+
+                url = urlsplit(target)
+                if method == 'POST':
+                    params = _post_params(body, headers.get(
+                        'x-authentication-token'))
+                else:
+                    params = {k: v[-1]
+                              for k, v in parse_qs(url.query).items()}
+
+                status, response_headers, text = self.respond(url.path,
+                                                              params)
+                delay = self._delay()
+                if delay:
+                    await asyncio.sleep(delay)
+
+                data = text.encode('utf-8')
+                response_headers['Content-Length'] = len(data)
+                writer.write("".join(
+                    ["HTTP/1.1 {} {}\r\n".format(
+                        status, HTTPStatus(status).phrase)]
+                    + ["{}: {}\r\n".format(k, v)
+                       for k, v in response_headers.items()]
+                    + ["\r\n"]).encode('latin-1') + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Idle keep-alive connections are cancelled when the event
+            # loop shuts down; there is nobody left to report that to
+            pass
+        finally:
+            writer.close()
+
+
+def _post_params(body: bytes, token: str or None) -> dict:
+    try:
+        params = loads(body or b'{}')
+    except ValueError:
+        params = {}
+    params = {k: str(v) for k, v in params.items()}
+    if token is not None:
+        params['apiKey'] = token
+    return params
+
+
+def _error(code: int, message: str,
+           retry_after: str or None = None) -> (int, dict, str):
+    headers = dict(_JSON)
+    if retry_after is not None and code in (429, 503):
+        headers['Retry-After'] = str(retry_after)
+    return code, headers, dumps({'code': code, 'messages': message})
+
+
+def _to_xml(body: dict) -> str:
+    def node(tag, value):
+        if isinstance(value, dict):
+            inner = ''.join(node(k, v) for k, v in value.items())
+        elif isinstance(value, list):
+            inner = ''.join(node('category', v) for v in value)
+        elif isinstance(value, bool):
+            inner = 'true' if value else 'false'
+        else:
+            inner = escape(str(value))
+        return '<{0}>{1}</{0}>'.format(tag, inner)
+
+    return '<?xml version="1.0" encoding="utf-8"?>\n' + node('root', body)
+
+
+def _make_handler(stub: StubApiServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            stub._count_connection()
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            self._reply(*stub.respond(url.path, params))
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            params = _post_params(self.rfile.read(length),
+                                  self.headers.get('X-Authentication-Token'))
+            self._reply(*stub.respond(url.path, params))
+
+        def _reply(self, status, headers, body):
+            delay = stub._delay()
+            if delay:
+                time.sleep(delay)
+            data = body.encode('utf-8')
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
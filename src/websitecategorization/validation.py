@@ -0,0 +1,107 @@
+"""
+Domain name validation.
+
+`problem` accepts exactly the names matched by `Client._re_domain_name`,
+with a fixed number of linear scans done by str methods instead of a
+backtracking match, and tells why a name is rejected.
+"""
+from string import ascii_letters, digits
+from typing import Iterable, List, Tuple
+
+from .exceptions.error import ParameterError
+
+# Characters outside ASCII that the reference pattern matches because of
+# re.IGNORECASE: 'İ', 'ı', 'ſ' and the Kelvin sign fold to i, s and k
+_FOLDED = 'İıſK'
+_NAME_CHARACTERS = frozenset(ascii_letters + digits + '-_.' + _FOLDED)
+
+EMPTY = "empty domain name"
+INVALID_CHARACTER = "invalid character"
+NO_TOP_LEVEL_DOMAIN = "missing top level domain"
+EMPTY_LABEL = "empty label"
+HYPHEN = "label starts or ends with a hyphen"
+INVALID_TOP_LEVEL_DOMAIN = "invalid top level domain"
+LABEL_TOO_LONG = "label longer than 64 characters"
+
+
+def problem(name: str) -> str or None:
+    """
+    :param name: Domain name, str
+    :return: why the domain name is invalid, or None if it is valid
+    """
+    if not _NAME_CHARACTERS.issuperset(name):
+        # The reference pattern ends with '$', which also matches before
+        # a final newline
+        if name[-1:] != '\n' or not _NAME_CHARACTERS.issuperset(name[:-1]):
+            return INVALID_CHARACTER
+        name = name[:-1]
+    dot = name.rfind('.')
+    if dot <= 0:
+        if dot == 0:
+            return EMPTY_LABEL
+        return NO_TOP_LEVEL_DOMAIN if name else EMPTY
+    if '..' in name or name[0] == '.' or name[-1] == '.':
+        return EMPTY_LABEL
+    if '.-' in name or '-.' in name or name[0] == '-' or name[-1] == '-':
+        return HYPHEN
+    if len(name) - dot < 3 or name.find('_', dot) >= 0:
+        return INVALID_TOP_LEVEL_DOMAIN
+    # Names with a label of 65 characters have another one and a dot
+    if len(name) > 66 and max(map(len, name.split('.'))) > 64:
+        return LABEL_TOO_LONG
+    return None
+
+
+class ValidationResult:
+    """
+    Outcome of `validate_domains`.
+
+    `valid` lists the domain names to look up, in input order. `invalid`
+    lists (value, reason) pairs of the rejected input values.
+    """
+    __slots__ = ('valid', 'invalid')
+
+    def __init__(self, valid: List[str], invalid: List[Tuple[str, str]]):
+        self.valid = valid
+        self.invalid = invalid
+
+    def __repr__(self) -> str:
+        return '<ValidationResult valid={} invalid={}>'.format(
+            len(self.valid), len(self.invalid))
+
+
+def validate_domains(domains: Iterable, **kwargs) -> ValidationResult:
+    """
+    Validates domain names in bulk, accepting the same names as `Client`.
+
+    Usage::
+
+        result = validate_domains(open('domains.txt'))
+        for value, reason in result.invalid:
+            print(value, reason)
+
+    :param domains: iterable of domain names. Values are converted with
+        str(); surrounding whitespace is not removed
+    :key normalizer: DomainNormalizer: (optional) Normalize values before
+        validating them; valid names are then the normalized ones
+    :return: ValidationResult
+    """
+    normalizer = kwargs.get('normalizer', None)
+    valid = []
+    invalid = []
+    accept = valid.append
+    reject = invalid.append
+    for value in domains:
+        name = value if type(value) is str else str(value)
+        if normalizer is not None:
+            try:
+                name = normalizer.normalize(name)
+            except ParameterError as error:
+                reject((value, error.message))
+                continue
+        reason = problem(name)
+        if reason is None:
+            accept(name)
+        else:
+            reject((value, reason))
+    return ValidationResult(valid, invalid)
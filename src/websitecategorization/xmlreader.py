@@ -0,0 +1,151 @@
+"""
+XML response parsing.
+
+Responses are converted to the dicts `Response` is built from with the C
+accelerated ElementTree parser; the element tree of a response is small
+and dropped as soon as it is converted. `iterparse` reads many responses
+concatenated in one stream, such as saved `Client.raw_data` output or
+`Pipeline` XML output, incrementally: memory use is bounded by one
+document, not by the stream.
+"""
+from typing import BinaryIO, Iterable, Iterator, Tuple
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser, \
+    fromstring
+import os
+import re
+
+from .exceptions.error import ResponseError, UnparsableApiResponseError
+from .models.response import Response
+
+# Elements whose children are list items whatever their tag
+_LIST_ELEMENTS = frozenset(['categories'])
+_BOOLEAN_ELEMENTS = frozenset(['websiteResponded'])
+
+# Element Pipeline writes in place of failed lookups
+_ERROR_ELEMENT = 'error'
+
+_CHUNK_SIZE = 64 * 1024
+
+_DECLARATION = re.compile(rb'<\?xml\s[^>]*\?>')
+
+
+def loads(data: bytes or str) -> dict:
+    """
+    Parse an XML API response into the dict its JSON equivalent decodes
+    to. Leaf values are str, websiteResponded is bool.
+
+    :param data: XML document, bytes or str
+    :return: content of the root element
+    :raises UnparsableApiResponseError: data is not well-formed XML or
+        has a DTD
+    """
+    # API responses never have one, and DTDs enable entity expansion
+    if (b'<!DOCTYPE' if type(data) is bytes else '<!DOCTYPE') in data:
+        raise UnparsableApiResponseError(
+            "Could not parse API response",
+            ParseError("DTDs are not allowed"))
+    try:
+        value = _value(fromstring(data))
+    except ParseError as error:
+        raise UnparsableApiResponseError(
+            "Could not parse API response", error) from error
+    return value if type(value) is dict else {}
+
+
+def iterparse(source: str or BinaryIO,
+              chunk_size: int = _CHUNK_SIZE) \
+        -> Iterator[Tuple[str, object]]:
+    """
+    Read concatenated XML API responses incrementally.
+
+    Documents may be separated by whitespace; each may have its own
+    UTF-8 XML declaration.
+
+    :param source: Path of the file to read, str, or a binary stream
+    :param chunk_size: Number of bytes read at a time, int
+    :return: iterator of (domain, `Response` or exception) pairs, like
+        `Client.data_many`. ``<error>`` records written by `Pipeline`
+        for failed lookups are yielded as `ResponseError` with the
+        recorded message
+    :raises UnparsableApiResponseError: a document is not well-formed
+        XML. Reading stops there
+    """
+    if hasattr(source, 'read'):
+        yield from _iterparse(source, chunk_size)
+    else:
+        with open(os.fspath(source), 'rb') as file:
+            yield from _iterparse(file, chunk_size)
+
+
+def _iterparse(stream: BinaryIO, chunk_size: int) \
+        -> Iterator[Tuple[str, object]]:
+    # The documents become children of a synthetic root element, which
+    # is emptied as they are converted
+    parser = XMLPullParser(('start', 'end'))
+    parser.feed(b'<documents>')
+    root = None
+    depth = 0
+
+    chunks = iter(lambda: stream.read(chunk_size), b'')
+    try:
+        for data in _without_declarations(chunks):
+            parser.feed(data)
+            for event, element in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = element
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 1:
+                    root.clear()
+                    yield _record(element)
+        parser.feed(b'</documents>')
+        parser.close()
+    except ParseError as error:
+        raise UnparsableApiResponseError(
+            "Could not parse API response", error) from error
+
+
+def _without_declarations(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    XML declarations are only allowed at the start of a document, so
+    they are removed from the stream, including those split between
+    chunks.
+    """
+    carry = b''
+    for chunk in chunks:
+        data = _DECLARATION.sub(b'', carry + chunk)
+        # Hold back a tail that may be the start of a declaration
+        tail = data.rfind(b'<')
+        if tail >= 0 and data.find(b'>', tail) < 0 \
+                and b'<?xml'.startswith(data[tail:tail + 5]):
+            data, carry = data[:tail], data[tail:]
+        else:
+            carry = b''
+        if data:
+            yield data
+    if carry:
+        yield carry
+
+
+def _value(element: Element):
+    if not len(element):
+        text = (element.text or '').strip()
+        if element.tag in _BOOLEAN_ELEMENTS:
+            return text.lower() in ('true', '1')
+        return text
+    if element.tag in _LIST_ELEMENTS:
+        return [_value(child) for child in element]
+    return {child.tag: _value(child) for child in element}
+
+
+def _record(element: Element) -> Tuple[str, object]:
+    if element.tag == _ERROR_ELEMENT and 'domainName' in element.attrib:
+        return element.attrib['domainName'], ResponseError(
+            element.text or '')
+    value = _value(element)
+    if type(value) is dict and 'domainName' in value:
+        return value['domainName'], Response(value)
+    return '', UnparsableApiResponseError(
+        "Could not find the correct root element.", None)
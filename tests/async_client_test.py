@@ -0,0 +1,300 @@
+import asyncio
+import os
+import time
+import unittest
+from unittest import mock
+from websitecategorization import AsyncClient, Response, ParameterError, \
+    ApiAuthError, BadRequestError, HttpApiError
+from websitecategorization.net import AsyncApiRequester
+from websitecategorization.testing import AsyncStubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAIN = 'whoisxmlapi.com'
+
+
+def run(test):
+    """Run an async test body against a fresh stub server."""
+    async def wrapper(self):
+        async with AsyncStubApiServer(api_key=API_KEY) as server:
+            async with AsyncClient(API_KEY, base_url=server.url) as client:
+                await test(self, server, client)
+
+    def sync(self):
+        asyncio.run(wrapper(self))
+    return sync
+
+
+class TestAsyncClient(unittest.TestCase):
+    """
+    AsyncClient tests against a local asyncio stub server.
+    """
+
+    @run
+    async def test_data(self, server, client):
+        response = await client.data(DOMAIN, 0.5)
+        self.assertIsInstance(response, Response)
+        self.assertEqual(response.domain_name, DOMAIN)
+        self.assertTrue(all(c.confidence >= 0.5
+                            for c in response.categories))
+
+    @run
+    async def test_raw_data_xml(self, server, client):
+        response = await client.raw_data(
+            DOMAIN, output_format=AsyncClient.XML_FORMAT)
+        self.assertTrue(response.startswith('<?xml'))
+
+    @run
+    async def test_list_categories(self, server, client):
+        self.assertGreater(len(await client.list_categories()), 0)
+
+    @run
+    async def test_connections_are_reused(self, server, client):
+        for _ in range(5):
+            await client.data(DOMAIN)
+        self.assertEqual(server.request_count, 5)
+        self.assertEqual(server.connection_count, 1)
+
+    @run
+    async def test_concurrency_is_bounded(self, server, client):
+        server.latency = 0.05
+        client.max_concurrency = 2
+        start = time.monotonic()
+        await asyncio.gather(
+            *[client.data('d{}.com'.format(i)) for i in range(6)])
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertLessEqual(server.connection_count, 2)
+
+    @run
+    async def test_errors(self, server, client):
+        server.failures['rejected.com'] = 400
+        with self.assertRaises(BadRequestError):
+            await client.data('rejected.com')
+        with self.assertRaises(ParameterError):
+            await client.data('')
+        client.api_key = 'at_' + '1' * 29
+        with self.assertRaises(ApiAuthError):
+            await client.data(DOMAIN)
+
+
+
+def _proxy_environment(**variables) -> dict:
+    environment = {name: value for name, value in os.environ.items()
+                   if not name.lower().endswith('_proxy')}
+    environment.update(variables)
+    return environment
+
+
+class TestAsyncApiRequester(unittest.TestCase):
+    """
+    Protocol edge cases against raw asyncio servers.
+    """
+
+    def serve(self, responses: list, requests: list or None = None):
+        """
+        Run a test body against a server answering the requests on each
+        connection with `responses` in order, until one closes it. None
+        closes the connection without answering.
+        """
+        def decorator(test):
+            async def handle(reader, writer):
+                for response in responses:
+                    try:
+                        head = await reader.readuntil(b'\r\n\r\n')
+                    except asyncio.IncompleteReadError:
+                        break
+                    if requests is not None:
+                        requests.append(head.decode('latin-1'))
+                    if response is None:
+                        break
+                    writer.write(response)
+                    if b'Connection: close' in response:
+                        break
+                writer.close()
+
+            async def wrapper():
+                server = await asyncio.start_server(handle, '127.0.0.1', 0)
+                url = 'http://127.0.0.1:{}'.format(
+                    server.sockets[0].getsockname()[1])
+                try:
+                    await test(url)
+                finally:
+                    server.close()
+                    await server.wait_closed()
+
+            asyncio.run(wrapper())
+        return decorator
+
+    def test_bodyless_responses(self):
+        ok = b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}'
+
+        @self.serve([
+            # A 304 may announce the length of the body it does not send
+            b'HTTP/1.1 304 Not Modified\r\nContent-Length: 10\r\n\r\n',
+            b'HTTP/1.1 100 Continue\r\n\r\n' + ok,
+            b'HTTP/1.1 204 No Content\r\n\r\n', ok])
+        async def test(url):
+            async with AsyncApiRequester(base_url=url) as requester:
+                responses = [await asyncio.wait_for(
+                    requester._request('GET', url, None, {}, b''), 1)
+                    for _ in range(4)]
+                self.assertEqual([(status, content)
+                                  for status, _, content in responses],
+                                 [(304, b''), (200, b'{}'), (204, b''),
+                                  (200, b'{}')])
+
+    def test_malformed_responses(self):
+        for response in (
+                b'garbage\r\n\r\n',
+                b'HTTP/1.1\r\n\r\n',
+                b'HTTP/1.1 2000 OK\r\nContent-Length: 0\r\n\r\n',
+                b'HTTP/1.1 200 OK\r\nContent-Length: x\r\n\r\n',
+                b'HTTP/1.1 200 OK\r\nContent-Length: -1\r\n\r\n',
+                b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+                b'zz\r\n',
+                # Truncated
+                b'HTTP/1.1 200 OK\r\nContent-Length: 10\r\n'
+                b'Connection: close\r\n\r\n{}',
+                b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n'
+                b'Connection: close\r\n\r\n5\r\n{}'):
+
+            @self.serve([response])
+            async def test(url):
+                async with AsyncApiRequester(base_url=url) as requester:
+                    with self.assertRaises(ConnectionError):
+                        await asyncio.wait_for(requester.get({}), 1)
+
+    def test_chunked(self):
+        @self.serve([
+            b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'1;name=value\r\n{\r\n1\r\n}\r\n0\r\n'
+            b'X-Trailer: 1\r\n\r\n',
+            b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'0\r\n\r\n'])
+        async def test(url):
+            async with AsyncApiRequester(base_url=url) as requester:
+                # Both on one connection, after the trailer
+                self.assertEqual(await requester.get({}), '{}')
+                self.assertEqual(await requester.get({}), '')
+
+    def test_stale_pooled_connections(self):
+        ok = b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}'
+        requests = []
+        # Connections answer once, then drop without answering
+        responses = [ok, None]
+
+        @self.serve(responses, requests)
+        async def test(url):
+            async with AsyncApiRequester(base_url=url) as requester:
+                await asyncio.gather(*[requester.get({}) for _ in range(3)])
+                self.assertEqual(len(requester._idle[
+                    ('http', '127.0.0.1', int(url.rsplit(':', 1)[1]))]), 3)
+
+                # One stale connection, then a fresh one
+                self.assertEqual(await requester.get({}), '{}')
+                self.assertEqual(len(requests), 5)
+
+                # No more than one fresh attempt
+                responses[:] = [None]
+                with self.assertRaises(ConnectionError):
+                    await requester.get({})
+                self.assertEqual(len(requests), 7)
+
+    def test_userinfo_not_sent(self):
+        requests = []
+
+        @self.serve([b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}'],
+                    requests)
+        async def test(url):
+            url = url.replace('http://', 'http://user:secret@')
+            async with AsyncApiRequester(base_url=url) as requester:
+                self.assertEqual(await requester.get({}), '{}')
+            self.assertIn('\r\nHost: {}\r\n'.format(url.rsplit('@')[1]),
+                          requests[0])
+
+        self.assertNotIn('secret', requests[0])
+
+    def test_max_response_size(self):
+        body = b'x' * 20
+        for response in (
+                b'HTTP/1.1 200 OK\r\nContent-Length: 20\r\n\r\n' + body,
+                b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+                b'a\r\n' + body[:10] + b'\r\na\r\n' + body[10:]
+                + b'\r\n0\r\n\r\n',
+                b'HTTP/1.1 200 OK\r\nConnection: close\r\n\r\n' + body):
+
+            @self.serve([response, response])
+            async def test(url):
+                async with AsyncApiRequester(base_url=url) as requester:
+                    requester.max_response_size = 20
+                    self.assertEqual(await requester.get({}), body.decode())
+                    requester.max_response_size = 19
+                    with self.assertRaises(HttpApiError):
+                        await requester.get({})
+
+        with self.assertRaises(ValueError):
+            AsyncApiRequester(max_response_size=0)
+
+    def test_http_proxy(self):
+        requests = []
+
+        @self.serve([b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}'],
+                    requests)
+        async def test(proxy):
+            proxy = proxy.replace('http://', 'http://user:p%40ss@')
+            with mock.patch.dict(os.environ, _proxy_environment(
+                    HTTP_PROXY=proxy, NO_PROXY='localhost'), clear=True):
+                async with AsyncApiRequester(
+                        base_url='http://api.example.invalid/v3') \
+                        as requester:
+                    self.assertEqual(await requester.get({'a': 1}), '{}')
+
+        request_line, *headers = requests[0].splitlines()
+        self.assertEqual(request_line,
+                         'GET http://api.example.invalid/v3?a=1 HTTP/1.1')
+        # user:p@ss
+        self.assertIn('Proxy-Authorization: Basic dXNlcjpwQHNz', headers)
+
+    def test_https_proxy(self):
+        requests = []
+
+        @self.serve([b'HTTP/1.1 407 Proxy Authentication Required\r\n'
+                     b'Content-Length: 0\r\n\r\n'], requests)
+        async def test(proxy):
+            with mock.patch.dict(os.environ, _proxy_environment(
+                    HTTPS_PROXY=proxy), clear=True):
+                async with AsyncApiRequester(
+                        base_url='https://api.example.invalid/v3') \
+                        as requester:
+                    with self.assertRaises(HttpApiError):
+                        await requester.get({})
+        self.assertTrue(requests[0].startswith(
+            'CONNECT api.example.invalid:443 HTTP/1.1\r\n'))
+
+        # The proxy drops the connection
+        @self.serve([None])
+        async def test(proxy):
+            with mock.patch.dict(os.environ, _proxy_environment(
+                    HTTPS_PROXY=proxy), clear=True):
+                async with AsyncApiRequester(
+                        base_url='https://api.example.invalid/v3') \
+                        as requester:
+                    with self.assertRaises(ConnectionError):
+                        await requester.get({})
+
+    def test_no_proxy(self):
+        async def test():
+            async with AsyncStubApiServer(api_key=API_KEY) as server:
+                with mock.patch.dict(os.environ, _proxy_environment(
+                        HTTP_PROXY='http://127.0.0.1:9', NO_PROXY='127.0.0.1'),
+                        clear=True):
+                    async with AsyncClient(API_KEY, base_url=server.url) \
+                            as client:
+                        await client.data(DOMAIN)
+                self.assertEqual(server.request_count, 1)
+
+        asyncio.run(test())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import time
+import unittest
+from websitecategorization import Client, Response, ParameterError, \
+    BadRequestError, ApiAuthError
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAINS = ['whoisxmlapi.com', 'bad domain', 'example.com', 'rejected.com',
+           'example.org']
+
+
+class TestDataMany(unittest.TestCase):
+    """
+    Bulk lookup tests against a local stub server.
+    """
+    def setUp(self) -> None:
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.failures['rejected.com'] = 400
+        self.server.start()
+        self.client = Client(API_KEY, base_url=self.server.url)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+
+    def test_ordered(self):
+        results = list(self.client.data_many(DOMAINS, max_workers=2))
+        self.assertEqual([d for d, _ in results], DOMAINS)
+        self.assertIsInstance(results[0][1], Response)
+        self.assertEqual(results[0][1].domain_name, 'whoisxmlapi.com')
+        self.assertIsInstance(results[1][1], ParameterError)
+        self.assertIsInstance(results[3][1], BadRequestError)
+        self.assertIsInstance(results[4][1], Response)
+
+    def test_invalid_domains_not_sent(self):
+        list(self.client.data_many(DOMAINS, ordered=False))
+        self.assertEqual(self.server.request_count, 4)
+
+    def test_unordered(self):
+        results = dict(self.client.data_many(iter(DOMAINS), ordered=False))
+        self.assertEqual(set(results), set(DOMAINS))
+        self.assertEqual(results['example.org'].domain_name, 'example.org')
+
+    def test_concurrency(self):
+        self.server.latency = 0.1
+        domains = ['d{}.com'.format(i) for i in range(8)]
+        start = time.monotonic()
+        results = list(self.client.data_many(domains, max_workers=8))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertTrue(all(isinstance(r, Response) for _, r in results))
+
+    def test_auth_error_aborts(self):
+        client = Client('at_' + '1' * 29, base_url=self.server.url)
+        with self.assertRaises(ApiAuthError):
+            list(client.data_many(DOMAINS))
+        client.close()
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ParameterError):
+            list(self.client.data_many(DOMAINS, max_workers=0))
+        with self.assertRaises(ParameterError):
+            list(self.client.data_many(DOMAINS, min_confidence=2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from websitecategorization import Client
+from websitecategorization.cache import MemoryCache, SqliteCache
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAIN = 'whoisxmlapi.com'
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set(('a',), 'A')
+        cache.set(('b',), 'B')
+        cache.get(('a',))
+        cache.set(('c',), 'C')
+        self.assertEqual(cache.get(('a',)), 'A')
+        self.assertIsNone(cache.get(('b',)))
+        info = cache.info()
+        self.assertEqual(info.evictions, 1)
+        self.assertEqual(info.currsize, 2)
+        self.assertEqual((info.hits, info.misses), (2, 1))
+
+    def test_byte_bound(self):
+        cache = MemoryCache(maxbytes=200)
+        cache.set(('a',), 'x' * 100)
+        cache.set(('b',), 'y' * 100)
+        self.assertIsNone(cache.get(('a',)))
+        self.assertLessEqual(cache.info().currbytes, 200)
+        cache.set(('c',), 'z' * 500)
+        self.assertIsNone(cache.get(('c',)))
+
+    def test_ttl(self):
+        cache = MemoryCache(ttl=0.01)
+        cache.set(('a',), 'A')
+        cache.set(('b',), 'B', ttl=60)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(('a',)))
+        self.assertEqual(cache.get(('b',)), 'B')
+
+    def test_clear(self):
+        cache = MemoryCache()
+        cache.set(('a',), 'A')
+        cache.get(('a',))
+        cache.clear()
+        self.assertEqual(tuple(cache.info()), (0, 0, 0, 1024, 0, None, 0))
+
+    def test_thread_safety(self):
+        cache = MemoryCache(maxsize=50, maxbytes=10000)
+
+        def work(n):
+            for i in range(500):
+                cache.set((n, i % 70), str(i))
+                cache.get((n, (i * 7) % 70))
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        info = cache.info()
+        self.assertLessEqual(info.currsize, 50)
+        self.assertLessEqual(info.currbytes, 10000)
+        self.assertEqual(info.hits + info.misses, 2000)
+
+
+def _write_rows(path, worker):
+    cache = SqliteCache(path)
+    for i in range(200):
+        cache.set(('d{}.com'.format(i), None, 'json'), str(worker))
+    cache.close()
+
+
+class TestSqliteCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite')
+        self.cache = SqliteCache(self.path)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_get_set(self):
+        self.cache.set(('a.com', 0.5, 'json'), 'A')
+        self.assertEqual(self.cache.get(('a.com', 0.5, 'json')), 'A')
+        self.assertIsNone(self.cache.get(('a.com', None, 'json')))
+        self.assertEqual(self.cache.info().currsize, 1)
+
+    def test_persistence(self):
+        self.cache.set(('a.com', None, 'json'), 'A')
+        self.cache.close()
+        other = SqliteCache(self.path)
+        self.assertEqual(other.get(('a.com', None, 'json')), 'A')
+        other.close()
+
+    def test_get_many(self):
+        keys = [('d{}.com'.format(i), None, 'json') for i in range(1200)]
+        for key in keys[::2]:
+            self.cache.set(key, key[0])
+        found = self.cache.get_many(keys)
+        self.assertEqual(len(found), 600)
+        self.assertEqual(found[keys[10]], keys[10][0])
+        self.assertEqual(self.cache.info().misses, 600)
+
+    def test_expiry_and_purge(self):
+        cache = SqliteCache(self.path, purge_batch=3)
+        for i in range(10):
+            cache.set(('d{}.com'.format(i),), 'x', ttl=0)
+        cache.set(('live.com',), 'y')
+        self.assertIsNone(cache.get(('d1.com',)))
+        self.assertEqual(cache.purge_expired(), 10)
+        self.assertEqual(cache.info().currsize, 1)
+        cache.close()
+
+    def test_processes(self):
+        processes = [multiprocessing.Process(target=_write_rows,
+                                             args=(self.path, n))
+                     for n in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertTrue(all(p.exitcode == 0 for p in processes))
+        self.assertEqual(self.cache.info().currsize, 200)
+
+
+class TestClientCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.unresponsive.add('down.com')
+        self.server.start()
+        self.client = Client(API_KEY, base_url=self.server.url,
+                             cache=MemoryCache(unresponsive_ttl=0))
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+
+    def test_hit_skips_requester(self):
+        first = self.client.data(DOMAIN)
+        self.client.api_requester = None
+        self.assertEqual(self.client.data(DOMAIN.upper()).domain_name,
+                         first.domain_name)
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(self.client.cache_info().hits, 1)
+
+    def test_key_includes_parameters(self):
+        self.client.data(DOMAIN)
+        self.client.data(DOMAIN, 0.5)
+        self.client.raw_data(DOMAIN, output_format=Client.XML_FORMAT)
+        self.client.raw_data(DOMAIN, output_format=Client.JSON_FORMAT)
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_unresponsive_ttl(self):
+        self.assertFalse(self.client.data('down.com').website_responded)
+        self.client.data('down.com')
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_cache_clear(self):
+        self.client.data(DOMAIN)
+        self.client.cache_clear()
+        self.client.data(DOMAIN)
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_data_many_prefetch(self):
+        domains = ['d{}.com'.format(i) for i in range(10)]
+        for domain in domains[:6]:
+            self.client.data(domain)
+        self.server.reset_counters()
+        results = list(self.client.data_many(domains))
+        self.assertEqual([d for d, _ in results], domains)
+        self.assertEqual(self.server.request_count, 4)
+        self.assertEqual(self.client.cache_info().hits, 6)
+
+    def test_disabled_by_default(self):
+        client = Client(API_KEY, base_url=self.server.url)
+        client.data(DOMAIN)
+        client.data(DOMAIN)
+        client.close()
+        self.assertIsNone(client.cache_info())
+        self.assertEqual(self.server.request_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
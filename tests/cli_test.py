@@ -0,0 +1,106 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from websitecategorization import cli
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+class TestCli(unittest.TestCase):
+    """
+    Command-line tests against a local stub server.
+    """
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.input = os.path.join(self.directory, 'domains.txt')
+        self.output = os.path.join(self.directory, 'out')
+        with open(self.input, 'w', encoding='utf-8') as file:
+            file.write('whoisxmlapi.com\nbad domain\nexample.com\n')
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def run_cli(self, *args) -> (int, str):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            code = cli.main(['--api-key', API_KEY,
+                             '--base-url', self.server.url,
+                             '--output', self.output, self.input]
+                            + list(args))
+        return code, stderr.getvalue()
+
+    def test_jsonl(self):
+        code, stderr = self.run_cli()
+        self.assertEqual(code, 0)
+        with open(self.output, encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([r['domainName'] for r in records],
+                         ['whoisxmlapi.com', 'bad domain', 'example.com'])
+        self.assertIn('2 succeeded', stderr)
+        self.assertIn('1 errors', stderr)
+
+    def test_csv(self):
+        self.assertEqual(self.run_cli('--format', 'csv', '-q'), (0, ''))
+        with open(self.output, encoding='utf-8', newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual({r['domain'] for r in rows},
+                         {'whoisxmlapi.com', 'bad domain', 'example.com'})
+        self.assertTrue(any(r['error'].startswith('ParameterError')
+                            for r in rows))
+
+    def test_xml(self):
+        self.assertEqual(self.run_cli('--format', 'xml', '-q')[0], 0)
+        with open(self.output, encoding='utf-8') as file:
+            content = file.read()
+        self.assertEqual(content.count('<?xml'), 2)
+        self.assertIn('<error domainName="bad domain"', content)
+
+    def test_auth_error(self):
+        self.server.api_key = 'at_' + '1' * 29
+        code, stderr = self.run_cli('-q')
+        self.assertEqual(code, 1)
+        self.assertIn('error:', stderr)
+
+    def test_missing_api_key(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(cli.main(['--api-key', '', self.input]), 2)
+
+    def test_invalid_options(self):
+        for args in (('--timeout', '100'), ('--timeout', 'soon'),
+                     ('--rate-limit', '0'), ('-r', '-5'), ('-w', '0'),
+                     ('--workers', '2.5'), ('-p', '-1'), ('--retries', '-1'),
+                     ('-m', '0'), ('-m', '1.5'), ('--bench', '0'),
+                     ('--bench-latency', '-1'), ('-r', 'nan')):
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr), \
+                    self.assertRaises(SystemExit) as raised:
+                cli.main(['--api-key', API_KEY, '--base-url',
+                          self.server.url, self.input] + list(args))
+            self.assertEqual(raised.exception.code, 2)
+            self.assertIn('usage:', stderr.getvalue())
+            self.assertIn('error: argument ', stderr.getvalue())
+        self.assertEqual(self.server.request_count, 0)
+
+        self.assertEqual(self.run_cli('-q', '--timeout', '60',
+                                      '--rate-limit', '0.5')[0], 0)
+
+    def test_bench(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(cli.main(['--bench', '50', '-q']), 0)
+        summary = json.loads(stdout.getvalue())
+        self.assertEqual(summary['domains'], 50)
+        self.assertEqual(summary['requests'], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from websitecategorization import Client, ColumnarResults, \
+    CategoryTaxonomy, HttpApiError, ParameterError
+from websitecategorization.columnar import numpy
+from websitecategorization.testing import StubApiServer
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+API_KEY = 'at_' + '0' * 29
+
+
+def _response(domain: str, categories: list, responded: bool = True):
+    return Client._parse_response(
+        '{{"domainName": "{}", "websiteResponded": {}, '
+        '"as": {{"asn": 13335, "name": "CLOUDFLARENET"}}, '
+        '"categories": [{}]}}'.format(
+            domain, 'true' if responded else 'false',
+            ', '.join('{{"id": {}, "confidence": {}, "name": "C{}"}}'.format(
+                i, c, i) for i, c in categories)))
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestColumnarResults(unittest.TestCase):
+
+    def setUp(self):
+        self.results = ColumnarResults()
+        self.results.append('a.com', _response('a.com', [(5, 0.9), (61, 0.7)]))
+        self.results.append('b.com', HttpApiError('Server error'))
+        materialized = _response('c.com', [(61, 0.4)], responded=False)
+        materialized.categories
+        self.results.extend([('c.com', materialized),
+                             ('d.com', _response('d.com', []))])
+
+    def test_columns(self):
+        self.assertEqual(len(self.results), 4)
+        columns = self.results.to_numpy()
+        self.assertEqual(list(columns), list(ColumnarResults.COLUMNS))
+        self.assertEqual(list(columns['domain']),
+                         ['a.com', 'b.com', 'c.com', 'd.com'])
+        self.assertEqual(columns['website_responded'].tolist(),
+                         [True, False, False, True])
+        self.assertEqual(list(columns['error']),
+                         ['', 'HttpApiError', '', ''])
+        self.assertEqual(columns['as_asn'].tolist(), [13335, 0, 13335, 13335])
+        self.assertEqual(columns['as_name'][0], 'CLOUDFLARENET')
+
+    def test_categories(self):
+        triplets = self.results.categories()
+        self.assertEqual(triplets['row'].tolist(), [0, 0, 2])
+        self.assertEqual(triplets['category_id'].tolist(), [5, 61, 61])
+        self.assertEqual(triplets['confidence'].tolist(), [0.9, 0.7, 0.4])
+        self.assertEqual(self.results.category_ids().tolist(), [5, 61])
+        self.assertEqual(self.results.category_matrix().tolist(),
+                         [[0.9, 0.7], [0, 0], [0, 0.4], [0, 0]])
+
+    def test_domains_with(self):
+        self.assertEqual(list(self.results.domains_with(61)),
+                         ['a.com', 'c.com'])
+        self.assertEqual(list(self.results.domains_with(61, 0.5)),
+                         ['a.com'])
+        self.assertEqual(len(self.results.domains_with(12)), 0)
+        with self.assertRaises(ParameterError):
+            self.results.domains_with('Technology')
+
+        # Exports are refreshed when rows are added
+        self.results.append('e.com', _response('e.com', [(12, 0.8)]))
+        self.assertEqual(list(self.results.domains_with(12)), ['e.com'])
+
+    def test_taxonomy(self):
+        with StubApiServer(api_key=API_KEY) as server:
+            with Client(API_KEY, base_url=server.url) as client:
+                taxonomy = CategoryTaxonomy(client)
+                results = ColumnarResults(taxonomy=taxonomy)
+                results.extend(client.data_many(['a.com', 'b.com']))
+                self.assertEqual(results.category_ids().tolist(),
+                                 [5, 12, 40, 61])
+                self.assertEqual(
+                    list(results.domains_with('technology', 0.7)),
+                    ['a.com', 'b.com'])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow(self):
+        table = self.results.to_arrow()
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(table.column('categories').to_pylist(), [
+            [{'id': 5, 'confidence': 0.9}, {'id': 61, 'confidence': 0.7}],
+            [], [{'id': 61, 'confidence': 0.4}], []])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.parquet')
+            self.results.to_parquet(path)
+            self.assertTrue(pyarrow.parquet.read_table(path).equals(table))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from json import loads
+from websitecategorization import Client, MemoryCache, Response
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAIN = 'whoisxmlapi.com'
+THRESHOLDS = [None, 0.01, 0.33, 0.34, 0.5, 0.58, 0.7, 0.71, 0.92, 1.0]
+
+
+class TestLocalConfidenceFilter(unittest.TestCase):
+    """
+    Local min_confidence filtering must match the API's filtering.
+    """
+    def setUp(self) -> None:
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+        self.remote = Client(API_KEY, base_url=self.server.url)
+        self.local = Client(API_KEY, base_url=self.server.url,
+                            cache=MemoryCache(),
+                            local_confidence_filter=True)
+
+    def tearDown(self) -> None:
+        self.remote.close()
+        self.local.close()
+        self.server.stop()
+
+    def test_filtered(self):
+        response = Response(loads(self.remote.raw_data(DOMAIN, 0.01)))
+        filtered = response.filtered(0.71)
+        self.assertEqual([c.confidence for c in filtered.categories],
+                         [0.92, 0.71])
+        self.assertEqual(len(response.categories), 4)
+        self.assertEqual(filtered.domain_name, response.domain_name)
+
+    def test_matches_api(self):
+        for threshold in THRESHOLDS:
+            expected = self.remote.data(DOMAIN, threshold)
+            actual = self.local.data(DOMAIN, threshold)
+            self.assertEqual(
+                [(c.id, c.confidence) for c in actual.categories],
+                [(c.id, c.confidence) for c in expected.categories],
+                threshold)
+
+    def test_single_fetch(self):
+        self.server.reset_counters()
+        for threshold in THRESHOLDS:
+            self.local.data(DOMAIN, threshold)
+        for _, response in self.local.data_many([DOMAIN] * 3, 0.9):
+            self.assertEqual(len(response.categories), 1)
+        self.assertEqual(self.server.request_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import asyncio
+import importlib
+import sys
+import unittest
+from websitecategorization import Client, AsyncClient, Response, \
+    ResponseError, ApiAuthError, UnparsableApiResponseError
+from websitecategorization import decoding
+from websitecategorization.testing import StubApiServer, AsyncStubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+_RAW = '{"domainName": "café.com", "websiteResponded": true, ' \
+       '"categories": [{"id": 1, "name": "News", "confidence": 0.9}]}'
+
+
+class TestDecoding(unittest.TestCase):
+
+    def test_parse_bytes_and_str(self):
+        from_bytes = Client._parse_response(_RAW.encode('utf-8'))
+        self.assertIsInstance(from_bytes, Response)
+        self.assertEqual(from_bytes.domain_name, 'café.com')
+        self.assertEqual(from_bytes, Client._parse_response(_RAW))
+
+    def test_unparsable(self):
+        for body in (b'{"domainName": ', b'\xff\xfe', b'[1, 2]', b'42',
+                     b'{"categories": []}'):
+            with self.assertRaises(UnparsableApiResponseError):
+                Client._parse_response(body)
+
+    def test_stdlib_fallback(self):
+        saved = sys.modules.get('orjson')
+        sys.modules['orjson'] = None
+        try:
+            fallback = importlib.reload(decoding)
+            self.assertEqual(fallback.BACKEND, 'json')
+            self.assertEqual(fallback.loads(_RAW.encode('utf-8')),
+                             fallback.loads(_RAW))
+            with self.assertRaises(ValueError):
+                fallback.loads(b'\xff')
+        finally:
+            if saved is None:
+                del sys.modules['orjson']
+            else:
+                sys.modules['orjson'] = saved
+            importlib.reload(decoding)
+
+    def test_lazy_parsed_message(self):
+        error = ResponseError('{"code": 403, "messages": "Access restricted"}')
+        self.assertNotIn('_parsed_message', vars(error))
+        self.assertEqual(error.parsed_message.code, 403)
+        self.assertEqual(error.parsed_message.message, 'Access restricted')
+        self.assertIs(error.parsed_message, error.parsed_message)
+
+        self.assertIsNone(ResponseError('<html>').parsed_message)
+
+
+class TestBytesPath(unittest.TestCase):
+
+    def test_sync(self):
+        with StubApiServer(api_key=API_KEY) as server:
+            with Client(API_KEY, base_url=server.url) as client:
+                self.assertIsInstance(
+                    client.api_requester.get_bytes(
+                        {'apiKey': API_KEY, 'domainName': 'a.com'}), bytes)
+                self.assertEqual(client.data('a.com').domain_name, 'a.com')
+                self.assertIsInstance(client.raw_data('a.com'), str)
+
+                client.api_key = 'at_' + '1' * 29
+                with self.assertRaises(ApiAuthError) as context:
+                    client.data('a.com')
+                self.assertIsNotNone(context.exception.parsed_message)
+
+    def test_async(self):
+        async def run():
+            async with AsyncStubApiServer(api_key=API_KEY) as server:
+                async with AsyncClient(API_KEY,
+                                       base_url=server.url) as client:
+                    response = await client.data('a.com')
+                    raw = await client.raw_data('a.com')
+            return response, raw
+
+        response, raw = asyncio.run(run())
+        self.assertEqual(response.domain_name, 'a.com')
+        self.assertIsInstance(raw, str)
+        self.assertEqual(response, Client._parse_response(raw))
+
+
+if __name__ == '__main__':
+    unittest.main()
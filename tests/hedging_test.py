@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from websitecategorization import Client, AsyncClient, HedgePolicy, Hooks, \
+    ApiRequester, Transport, TransportResponse
+from websitecategorization.testing import StubApiServer, AsyncStubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+class _SlowTransport(Transport):
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def request(self, method, url, params=None, headers=None, body=None,
+                timeout=(5, 30)):
+        time.sleep(self.latency)
+        return TransportResponse(200, {}, b'{}')
+
+
+class TestHedgePolicy(unittest.TestCase):
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            HedgePolicy(delay=-1)
+        with self.assertRaises(ValueError):
+            HedgePolicy(quantile=1)
+        with self.assertRaises(ValueError):
+            HedgePolicy(max_extra=0)
+        with self.assertRaises(ValueError):
+            HedgePolicy(min_samples=10, window=5)
+
+    def test_derived_delay(self):
+        policy = HedgePolicy(quantile=0.9, min_samples=10, window=20,
+                             min_delay=0.001)
+        for i in range(9):
+            self.assertIsNone(policy.start())
+            policy.record(0.01 * (i + 1))
+        policy.record(0.1)
+        self.assertAlmostEqual(policy.start(), 0.1)
+
+        # Old latencies leave the window
+        for _ in range(32):
+            policy.record(0.002)
+        self.assertAlmostEqual(policy.start(), 0.002)
+
+    def test_budget(self):
+        policy = HedgePolicy(delay=0.1, max_extra=0.1)
+        for _ in range(19):
+            policy.start()
+        self.assertTrue(policy.allow())
+        self.assertFalse(policy.allow())
+        policy.start()
+        self.assertTrue(policy.allow())
+        policy.record(0.5, hedged=True)
+        self.assertEqual(policy.as_dict(),
+                         {'calls': 20, 'hedges': 2, 'wins': 1, 'delay': 0.1})
+
+
+class TestHedgedRequests(unittest.TestCase):
+
+    def test_client(self):
+        policy = HedgePolicy(delay=0.02, max_extra=1)
+        hedged = []
+        hooks = Hooks()
+        hooks.add(Hooks.AFTER_RESPONSE, lambda info: hedged.append(
+            info.hedged))
+        with StubApiServer(api_key=API_KEY, tail_rate=0.5, tail_latency=0.3,
+                           seed=1) as server:
+            with Client(API_KEY, base_url=server.url, hedge_policy=policy,
+                        hooks=hooks) as client:
+                for i in range(12):
+                    self.assertEqual(
+                        client.data('d{}.com'.format(i)).domain_name,
+                        'd{}.com'.format(i))
+        self.assertEqual(policy.calls, 12)
+        self.assertGreater(policy.hedges, 0)
+        self.assertGreater(policy.wins, 0)
+        self.assertEqual(hedged.count(True), policy.wins)
+
+    def test_fast_responses_are_not_hedged(self):
+        policy = HedgePolicy(delay=1)
+        with StubApiServer(api_key=API_KEY) as server:
+            with Client(API_KEY, base_url=server.url,
+                        hedge_policy=policy) as client:
+                results = list(client.data_many(
+                    ['d{}.com'.format(i) for i in range(30)]))
+                self.assertEqual(server.request_count, 30)
+        self.assertTrue(all(r.domain_name == d for d, r in results))
+        self.assertEqual((policy.calls, policy.hedges), (30, 0))
+
+    def test_budget(self):
+        policy = HedgePolicy(delay=0.01, max_extra=0.1)
+        with StubApiServer(api_key=API_KEY, tail_rate=1,
+                           tail_latency=0.05) as server:
+            with Client(API_KEY, base_url=server.url,
+                        hedge_policy=policy) as client:
+                for i in range(20):
+                    client.data('d{}.com'.format(i))
+                self.assertEqual(server.request_count, 22)
+        self.assertEqual(policy.hedges, 2)
+
+    def test_concurrent_calls_do_not_queue(self):
+        # More calls at once than the initial 40 threads
+        policy = HedgePolicy(delay=0.25, max_extra=1)
+        with ApiRequester(transport=_SlowTransport(0.1),
+                          hedge_policy=policy) as requester:
+            start = time.monotonic()
+            with ThreadPoolExecutor(max_workers=150) as executor:
+                results = list(executor.map(
+                    lambda _: requester.get({}), range(150)))
+            elapsed = time.monotonic() - start
+        self.assertEqual(results, ['{}'] * 150)
+        self.assertEqual((policy.calls, policy.hedges), (150, 0))
+        self.assertLess(elapsed, 0.25)
+
+    def test_close_while_hedging(self):
+        policy = HedgePolicy(delay=0, max_extra=1)
+        errors = []
+        stop = threading.Event()
+        requester = ApiRequester(transport=_SlowTransport(0.002),
+                                 hedge_policy=policy)
+
+        def call():
+            while not stop.is_set():
+                try:
+                    requester.get({})
+                except Exception as error:
+                    errors.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(50):
+            requester.close()
+            time.sleep(0.002)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        requester.close()
+        self.assertEqual(errors, [])
+        self.assertGreater(policy.hedges, 0)
+
+    def test_async_client(self):
+        policy = HedgePolicy(delay=0.02, max_extra=1)
+
+        async def scenario():
+            async with AsyncStubApiServer(api_key=API_KEY, tail_rate=0.5,
+                                          tail_latency=0.3,
+                                          seed=1) as server:
+                async with AsyncClient(API_KEY, base_url=server.url,
+                                       hedge_policy=policy) as client:
+                    for i in range(12):
+                        response = await client.data('d{}.com'.format(i))
+                        self.assertEqual(response.domain_name,
+                                         'd{}.com'.format(i))
+
+        asyncio.run(scenario())
+        self.assertEqual(policy.calls, 12)
+        self.assertGreater(policy.wins, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
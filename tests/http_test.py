@@ -0,0 +1,85 @@
+import threading
+import unittest
+from websitecategorization import Client, ApiRequester, ApiAuthError
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAIN = 'whoisxmlapi.com'
+
+
+class TestApiRequester(unittest.TestCase):
+    """
+    Connection pooling tests against a local stub server.
+    """
+    def setUp(self) -> None:
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_connections_are_reused(self):
+        with Client(API_KEY, base_url=self.server.url) as client:
+            for _ in range(10):
+                client.data(DOMAIN)
+            client.list_categories()
+        self.assertEqual(self.server.request_count, 11)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_pool_shared_between_threads(self):
+        requester = ApiRequester(base_url=self.server.url, pool_maxsize=4)
+        errors = []
+
+        def work():
+            try:
+                for _ in range(5):
+                    requester.get({'apiKey': API_KEY, 'domainName': DOMAIN})
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        requester.close()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.server.request_count, 20)
+        self.assertLessEqual(self.server.connection_count, 4)
+
+    def test_close_and_reopen(self):
+        requester = ApiRequester(base_url=self.server.url)
+        requester.get({'apiKey': API_KEY, 'domainName': DOMAIN})
+        requester.close()
+        requester.get({'apiKey': API_KEY, 'domainName': DOMAIN})
+        requester.close()
+        self.assertEqual(self.server.connection_count, 2)
+
+    def test_idle_connections_dropped(self):
+        requester = ApiRequester(base_url=self.server.url, keep_alive=0.01)
+        requester.get({'apiKey': API_KEY, 'domainName': DOMAIN})
+        threading.Event().wait(0.05)
+        requester.get({'apiKey': API_KEY, 'domainName': DOMAIN})
+        requester.close()
+        self.assertEqual(self.server.connection_count, 2)
+
+    def test_post(self):
+        with ApiRequester(base_url=self.server.url) as requester:
+            self.assertIn(DOMAIN, requester.post(
+                {'apiKey': API_KEY, 'domainName': DOMAIN}))
+
+    def test_auth_error(self):
+        with Client('at_' + '1' * 29, base_url=self.server.url) as client:
+            with self.assertRaises(ApiAuthError):
+                client.data(DOMAIN)
+
+    def test_invalid_pool_settings(self):
+        with self.assertRaises(ValueError):
+            ApiRequester(pool_maxsize=0)
+        with self.assertRaises(ValueError):
+            ApiRequester(keep_alive=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+import unittest
+import websitecategorization
+
+HEAVY = ('requests', 'urllib3', 'asyncio', 'numpy', 'sqlite3')
+
+
+def _loaded(statement: str) -> set:
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.dirname(websitecategorization.__file__)))
+    output = subprocess.check_output(
+        [sys.executable, '-c',
+         statement + '\nimport sys\nprint(" ".join(sys.modules))'],
+        env=environment, universal_newlines=True)
+    return set(output.split())
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_exports(self):
+        for name in websitecategorization.__all__:
+            self.assertIs(getattr(websitecategorization, name),
+                          getattr(websitecategorization, name))
+        self.assertTrue(set(websitecategorization.__all__)
+                        <= set(dir(websitecategorization)))
+        with self.assertRaises(AttributeError):
+            websitecategorization.NotExported
+
+        namespace = {}
+        exec('from websitecategorization import *', namespace)
+        self.assertIs(namespace['Client'], websitecategorization.Client)
+
+    def test_cold_start(self):
+        for statement in (
+                'import websitecategorization',
+                'from websitecategorization import validate_domains, '
+                'DomainNormalizer, Response, ParameterError, Hooks, '
+                'MemoryCache',
+                'import websitecategorization.cli'):
+            loaded = _loaded(statement)
+            self.assertEqual([name for name in HEAVY if name in loaded], [],
+                             statement)
+
+    def test_client(self):
+        # requests and urllib3 load with the first request, asyncio only
+        # with the async client
+        loaded = _loaded('from websitecategorization import Client\n'
+                         'Client("at_" + "0" * 29)')
+        for name in ('requests', 'urllib3', 'asyncio'):
+            self.assertNotIn(name, loaded)
+
+        loaded = _loaded(
+            'from websitecategorization import Client\n'
+            'from websitecategorization.testing import StubApiServer\n'
+            'with StubApiServer() as server:\n'
+            '    Client("at_" + "0" * 29, base_url=server.url)'
+            '.data("example.com")')
+        self.assertTrue({'requests', 'urllib3'} <= loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import unittest
+from websitecategorization import Client, AsyncClient, Hooks, \
+    MetricsCollector, MemoryCache, RetryPolicy, HttpApiError
+from websitecategorization.testing import StubApiServer, AsyncStubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAIN = 'whoisxmlapi.com'
+
+
+class TestHooks(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+        self.client = Client(API_KEY, base_url=self.server.url)
+        self.events = []
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def record(self, event):
+        self.client.add_hook(event, lambda info: self.events.append(
+            (event, info)))
+
+    def test_timings(self):
+        for event in Hooks.EVENTS:
+            self.record(event)
+        self.client.data(DOMAIN)
+        self.client.data(DOMAIN)
+
+        self.assertEqual([e for e, _ in self.events],
+                         [Hooks.BEFORE_REQUEST, Hooks.AFTER_RESPONSE] * 2)
+        first, second = self.events[1][1], self.events[3][1]
+        self.assertEqual(first.status_code, 200)
+        self.assertGreater(first.response_size, 0)
+        self.assertIsNotNone(first.connect)
+        self.assertIsNone(second.connect)
+        self.assertGreater(first.total, first.ttfb)
+        self.assertIsNone(first.queue_wait)
+        self.assertIsNone(first.cache)
+
+    def test_retries_and_errors(self):
+        self.record(Hooks.AFTER_RESPONSE)
+        self.record(Hooks.ON_ERROR)
+        self.client.api_requester.retry_policy = RetryPolicy(
+            backoff_base=0.01)
+        self.server.failures['down.com'] = 503
+        with self.assertRaises(HttpApiError):
+            self.client.data('down.com')
+        self.assertEqual([info.retries for _, info in self.events],
+                         [0, 1, 2])
+
+        self.events.clear()
+        self.server.stop()
+        self.client.close()
+        with self.assertRaises(Exception):
+            self.client.data('example.com')
+        self.assertEqual(self.events[0][0], Hooks.ON_ERROR)
+        self.assertIsNotNone(self.events[0][1].error)
+
+    def test_cache(self):
+        self.client.cache = MemoryCache()
+        self.record(Hooks.AFTER_RESPONSE)
+        self.client.data(DOMAIN)
+        self.client.data(DOMAIN)
+        self.assertEqual([info.cache for _, info in self.events],
+                         ['miss', 'hit'])
+        self.assertIsNone(self.events[1][1].status_code)
+
+    def test_failing_hook_is_ignored(self):
+        def fail(info):
+            raise RuntimeError()
+        self.client.add_hook(Hooks.AFTER_RESPONSE, fail)
+        with self.assertLogs(level='ERROR'):
+            self.assertEqual(self.client.data(DOMAIN).domain_name, DOMAIN)
+        self.client.remove_hook(Hooks.AFTER_RESPONSE, fail)
+        self.assertFalse(self.client.hooks.enabled)
+
+    def test_invalid_event(self):
+        with self.assertRaises(ValueError):
+            self.client.add_hook('after', print)
+
+
+class TestMetricsCollector(unittest.TestCase):
+
+    def test_collect(self):
+        metrics = MetricsCollector()
+        with StubApiServer(api_key=API_KEY) as server, \
+                Client(API_KEY, base_url=server.url,
+                       cache=MemoryCache()) as client:
+            metrics.attach(client)
+            server.failures['rejected.com'] = 400
+            client.data(DOMAIN)
+            client.data(DOMAIN)
+            with self.assertRaises(Exception):
+                client.data('rejected.com')
+
+        snapshot = metrics.as_dict()
+        self.assertEqual(snapshot['responses'], {200: 1, 400: 1})
+        self.assertEqual(snapshot['cache'], {'hit': 1, 'miss': 2})
+        self.assertEqual(snapshot['latency']['total']['count'], 2)
+        self.assertEqual(snapshot['latency']['connect']['count'], 1)
+        self.assertEqual(
+            snapshot['latency']['total']['buckets'][float('inf')], 2)
+
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE website_categorization_responses_total '
+                      'counter', text)
+        self.assertIn('website_categorization_responses_total'
+                      '{status="200"} 1', text)
+        self.assertIn('website_categorization_request_duration_seconds_'
+                      'bucket{phase="total",le="+Inf"} 2', text)
+
+        metrics.reset()
+        self.assertEqual(metrics.as_dict()['responses'], {})
+
+    def test_async(self):
+        metrics = MetricsCollector()
+
+        async def scenario():
+            async with AsyncStubApiServer(api_key=API_KEY) as server, \
+                    AsyncClient(API_KEY, base_url=server.url) as client:
+                metrics.attach(client)
+                await client.data(DOMAIN)
+                await client.data(DOMAIN)
+
+        asyncio.run(scenario())
+        snapshot = metrics.as_dict()
+        self.assertEqual(snapshot['responses'], {200: 2})
+        self.assertEqual(snapshot['latency']['connect']['count'], 1)
+        self.assertEqual(snapshot['latency']['ttfb']['count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
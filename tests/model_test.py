@@ -1,6 +1,6 @@
 import unittest
 from json import loads
-from websitecategorization import Response, ErrorMessage
+from websitecategorization import Response, ErrorMessage, Category
 
 
 _json_response_ok = '''{
@@ -53,3 +53,44 @@ class TestModel(unittest.TestCase):
         parsed_error = ErrorMessage(error)
         self.assertEqual(parsed_error.code, error['code'])
         self.assertEqual(parsed_error.message, error['messages'])
+
+    def test_equality_and_hash(self):
+        first = Response(loads(_json_response_ok))
+        second = Response(loads(_json_response_ok))
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertIsNone(first._categories)
+        self.assertIsNone(second._categories)
+        self.assertNotEqual(first, first.filtered(0.9))
+
+        # Built categories compare and hash like the lazy ones
+        first.categories
+        self.assertEqual(first, second)
+        self.assertEqual(len({first, second}), 1)
+        self.assertEqual(hash(first.categories[0]),
+                         hash(second.categories[0]))
+        self.assertEqual(len({ErrorMessage({'code': 1}),
+                              ErrorMessage({'code': 1})}), 1)
+
+        second.categories[0].confidence = 0.5
+        self.assertNotEqual(first, second)
+        self.assertNotEqual(first.categories[0], Category(None))
+        self.assertNotEqual(first, first.as_field)
+
+    def test_lazy_categories(self):
+        parsed = Response(loads(_json_response_ok))
+        self.assertIsNone(parsed._categories)
+        self.assertEqual(len(parsed.filtered(0.9).categories), 0)
+        self.assertIsNone(parsed._categories)
+        self.assertIs(parsed.categories, parsed.categories)
+        self.assertIsInstance(parsed.categories[0], Category)
+
+    def test_slots(self):
+        parsed = Response(loads(_json_response_ok))
+        for model in (parsed, parsed.as_field, parsed.categories[0]):
+            self.assertFalse(hasattr(model, '__dict__'))
+        self.assertEqual(parsed['domain_name'], 'whoisxmlapi.com')
+        self.assertEqual(len(parsed['categories']), 1)
+        with self.assertRaises(KeyError):
+            parsed['_categories']
+        self.assertIn("'categories'", str(parsed))
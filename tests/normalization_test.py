@@ -0,0 +1,103 @@
+import io
+import unittest
+from websitecategorization import Client, DomainNormalizer, Pipeline, \
+    ParameterError, MemoryCache
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+class TestDomainNormalizer(unittest.TestCase):
+
+    def setUp(self):
+        self.normalizer = DomainNormalizer()
+
+    def test_registrable_domain(self):
+        # Test vectors of the Public Suffix List
+        for host, expected in (
+                ('com', None),
+                ('example.com', 'example.com'),
+                ('www.example.com', 'example.com'),
+                ('example.local', 'example.local'),
+                ('b.example.local', 'example.local'),
+                ('a.b.example.co.uk', 'example.co.uk'),
+                ('c.kobe.jp', None),
+                ('b.c.kobe.jp', 'b.c.kobe.jp'),
+                ('city.kobe.jp', 'city.kobe.jp'),
+                ('www.city.kobe.jp', 'city.kobe.jp'),
+                ('test.ck', None),
+                ('www.ck', 'www.ck'),
+                ('www.www.ck', 'www.ck'),
+                ('xn--85x722f.com.cn', 'xn--85x722f.com.cn'),
+                ('1.2.3.4', None)):
+            self.assertEqual(self.normalizer.registrable_domain(host),
+                             expected, host)
+        self.assertEqual(self.normalizer.public_suffix('a.example.co.uk'),
+                         'co.uk')
+
+    def test_private_suffixes(self):
+        self.assertEqual(self.normalizer.normalize('a.user.github.io'),
+                         'user.github.io')
+        self.assertEqual(
+            DomainNormalizer(private_suffixes=False).normalize(
+                'a.user.github.io'), 'github.io')
+
+    def test_normalize(self):
+        for value, expected in (
+                ('  WWW.Example.COM.  ', 'example.com'),
+                ('https://user@www.example.co.uk:8443/a?b#c',
+                 'example.co.uk'),
+                ('example.com/path', 'example.com'),
+                ('www.食狮.公司.cn', 'xn--85x722f.xn--55qx5d.cn'),
+                ('co.uk', 'co.uk')):
+            self.assertEqual(self.normalizer.normalize(value), expected)
+
+        keep = DomainNormalizer(collapse=False)
+        self.assertEqual(keep.normalize('HTTP://WWW.Example.COM/'),
+                         'www.example.com')
+
+        for value in ('https:///path', 'http://[::1', 'a..bé.com'):
+            with self.assertRaises(ParameterError):
+                self.normalizer.normalize(value)
+
+    def test_version(self):
+        self.assertTrue(DomainNormalizer.version())
+
+
+class TestNormalizedLookups(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+        self.client = Client(API_KEY, base_url=self.server.url,
+                             cache=MemoryCache(),
+                             normalizer=DomainNormalizer())
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_client(self):
+        self.assertEqual(
+            self.client.data('https://www.example.com/').domain_name,
+            'example.com')
+        self.client.raw_data('a.example.com')
+        results = list(self.client.data_many(
+            ['b.example.com', 'WWW.EXAMPLE.COM.', 'bad domain']))
+        self.assertEqual([d for d, _ in results],
+                         ['b.example.com', 'WWW.EXAMPLE.COM.', 'bad domain'])
+        self.assertEqual(results[0][1].domain_name, 'example.com')
+        self.assertIsInstance(results[2][1], ParameterError)
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_pipeline(self):
+        output = io.BytesIO()
+        stats = Pipeline(self.client, output).run(
+            ['www.example.com', 'a.example.com', 'example.org'])
+        self.assertEqual(stats.duplicates, 1)
+        self.assertEqual(stats.succeeded, 2)
+        self.assertEqual(self.server.request_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from websitecategorization import Client, Pipeline, ApiAuthError
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAINS = ['whoisxmlapi.com', '', 'Example.com.', 'bad domain',
+           'rejected.com', 'example.com', 'example.org']
+
+
+class TestPipeline(unittest.TestCase):
+    """
+    Streaming pipeline tests against a local stub server.
+    """
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, 'results.jsonl')
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.failures['rejected.com'] = 400
+        self.server.start()
+        self.client = Client(API_KEY, base_url=self.server.url)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def records(self) -> list:
+        with open(self.output, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_run(self):
+        stats = Pipeline(self.client, self.output, max_workers=2).run(
+            iter(DOMAINS))
+        self.assertEqual(stats.read, 7)
+        self.assertEqual(stats.duplicates, 1)
+        self.assertEqual(stats.invalid, 1)
+        self.assertEqual(stats.failed, 1)
+        self.assertEqual(stats.succeeded, 3)
+
+        records = self.records()
+        self.assertEqual([r['domainName'] for r in records],
+                         ['whoisxmlapi.com', 'example.com', 'bad domain',
+                          'rejected.com', 'example.org'])
+        self.assertIn('categories', records[0])
+        self.assertEqual(records[2]['error']['type'], 'ParameterError')
+        self.assertEqual(records[3]['error']['type'], 'BadRequestError')
+        self.assertEqual(self.server.request_count, 4)
+
+    def test_read_from_file(self):
+        source = os.path.join(self.directory, 'domains.txt')
+        with open(source, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(DOMAINS))
+        Pipeline(self.client, self.output).run(source)
+        self.assertEqual(len(self.records()), 5)
+
+    def test_resume(self):
+        domains = ['d{}.com'.format(i) for i in range(20)]
+        self.server.failures['d12.com'] = 401
+        pipeline = Pipeline(self.client, self.output, max_workers=1,
+                            checkpoint_interval=3)
+        with self.assertRaises(ApiAuthError):
+            pipeline.run(domains)
+        self.assertEqual(len(self.records()), 12)
+
+        del self.server.failures['d12.com']
+        self.server.reset_counters()
+        stats = pipeline.run(domains)
+        self.assertEqual(stats.resumed, 12)
+        self.assertEqual(self.server.request_count, 8)
+        self.assertEqual([r['domainName'] for r in self.records()], domains)
+
+        stats = pipeline.run(domains)
+        self.assertEqual(stats.read, 0)
+        self.assertEqual(len(self.records()), 20)
+
+    def test_partial_output_is_discarded(self):
+        pipeline = Pipeline(self.client, self.output)
+        pipeline.run(['example.com'])
+        with open(self.output, 'a', encoding='utf-8') as file:
+            file.write('{"domainName": "trunc')
+        pipeline.run(['example.com', 'example.org'])
+        self.assertEqual([r['domainName'] for r in self.records()],
+                         ['example.com', 'example.org'])
+
+
+if __name__ == '__main__':
+    unittest.main()
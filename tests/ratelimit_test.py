@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from websitecategorization import Client, AsyncClient, HttpApiError
+from websitecategorization.net.ratelimit import RateLimiter
+from websitecategorization.testing import StubApiServer, AsyncStubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_rate(self):
+        limiter = RateLimiter(50, burst=1)
+        start = time.monotonic()
+        for _ in range(11):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_burst(self):
+        limiter = RateLimiter(1, burst=5)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_backoff_and_recovery(self):
+        limiter = RateLimiter(100, recovery_time=0.5)
+        limiter.feedback(429)
+        limiter.feedback(429)
+        self.assertAlmostEqual(limiter.rate, 50, delta=5)
+        limiter.feedback(200)
+        self.assertAlmostEqual(limiter.rate, 50, delta=5)
+        time.sleep(0.3)
+        self.assertGreater(limiter.rate, 75)
+        time.sleep(0.3)
+        self.assertEqual(limiter.rate, 100)
+
+    def test_min_rate(self):
+        limiter = RateLimiter(10, min_rate=4)
+        for _ in range(3):
+            limiter.feedback(503)
+            limiter._last_backoff = float('-inf')
+        self.assertAlmostEqual(limiter.rate, 4, delta=0.1)
+
+    def test_retry_after_pauses(self):
+        limiter = RateLimiter(1000)
+        limiter.feedback(429, '1')
+        start = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+    def test_queue_depth(self):
+        limiter = RateLimiter(10, burst=1)
+        limiter.acquire()
+        threads = [threading.Thread(target=limiter.acquire)
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        self.assertEqual(limiter.queue_depth, 3)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(limiter.queue_depth, 0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(RateLimiter.parse_retry_after('7'), 7)
+        self.assertIsNone(RateLimiter.parse_retry_after('soon'))
+        self.assertIsNone(RateLimiter.parse_retry_after(None))
+        delay = RateLimiter.parse_retry_after(
+            formatdate(time.time() + 30, usegmt=True))
+        self.assertAlmostEqual(delay, 30, delta=2)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+        with self.assertRaises(ValueError):
+            RateLimiter(10, burst=0)
+
+
+class TestClientRateLimit(unittest.TestCase):
+
+    def test_throttling_feedback(self):
+        with StubApiServer(api_key=API_KEY, retry_after='1') as server:
+            server.failures['limited.com'] = 429
+            with Client(API_KEY, base_url=server.url, rate_limit=100,
+                        coalesce_requests=False) as client:
+                with self.assertRaises(HttpApiError):
+                    client.data('limited.com')
+                limiter = client.api_requester.rate_limiter
+                self.assertLess(limiter.rate, 100)
+                start = time.monotonic()
+                client.data('whoisxmlapi.com')
+                self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+    def test_stays_below_quota(self):
+        with StubApiServer(api_key=API_KEY, quota=40) as server:
+            with Client(API_KEY, base_url=server.url, rate_limit=30,
+                        burst=1) as client:
+                domains = ['d{}.com'.format(i) for i in range(30)]
+                results = list(client.data_many(domains, max_workers=8))
+        self.assertFalse(any(isinstance(r, Exception) for _, r in results))
+
+    def test_shared_with_async_client(self):
+        limiter = RateLimiter(20, burst=1)
+
+        async def scenario():
+            async with AsyncStubApiServer(api_key=API_KEY) as server:
+                async with AsyncClient(API_KEY, base_url=server.url,
+                                       rate_limiter=limiter) as client:
+                    await asyncio.gather(*[client.data('d{}.com'.format(i))
+                                           for i in range(5)])
+
+        with StubApiServer(api_key=API_KEY) as server:
+            client = Client(API_KEY, base_url=server.url,
+                            rate_limiter=limiter)
+            start = time.monotonic()
+            thread = threading.Thread(
+                target=lambda: [client.data('x{}.com'.format(i))
+                                for i in range(5)])
+            thread.start()
+            asyncio.run(scenario())
+            thread.join()
+            client.close()
+        self.assertGreaterEqual(time.monotonic() - start, 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from websitecategorization import Client, Hooks
+from websitecategorization.cache import MemoryCache, SqliteCache, \
+    RefreshAhead
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAIN = 'whoisxmlapi.com'
+
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out")
+        time.sleep(0.005)
+
+
+class TestCacheEntries(unittest.TestCase):
+
+    def test_memory(self):
+        cache = MemoryCache(ttl=0.02)
+        cache.set(('a',), 'A')
+        cache.set(('b',), 'B', ttl=60)
+        (value, expires_in), = cache.get_entries([('a',)]).values()
+        self.assertEqual(value, 'A')
+        self.assertTrue(0 < expires_in <= 0.02)
+
+        time.sleep(0.04)
+        entries = cache.get_entries([('a',), ('b',), ('c',)], grace=60)
+        self.assertEqual(sorted(entries), [('a',), ('b',)])
+        self.assertLess(entries[('a',)][1], 0)
+        self.assertGreater(entries[('b',)][1], 59)
+        # Plain reads drop expired entries
+        self.assertIsNone(cache.get(('a',)))
+        self.assertEqual(cache.get_entries([('a',)], grace=60), {})
+
+    def test_sqlite(self):
+        directory = tempfile.mkdtemp()
+        cache = SqliteCache(os.path.join(directory, 'cache.db'), ttl=0.02,
+                            purge_batch=10)
+        try:
+            cache.set(('a',), 'A')
+            time.sleep(0.04)
+            self.assertEqual(cache.get_many([('a',)]), {})
+            entries = cache.get_entries([('a',)], grace=60)
+            self.assertLess(entries[('a',)][1], 0)
+            # Kept for stale reads
+            self.assertEqual(cache.purge_expired(), 0)
+            self.assertEqual(cache.get_entries([('a',)], grace=60)
+                             [('a',)][0], 'A')
+        finally:
+            cache.close()
+            shutil.rmtree(directory)
+
+
+class TestRefreshAhead(unittest.TestCase):
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            RefreshAhead(grace=-1)
+        with self.assertRaises(ValueError):
+            RefreshAhead(refresh_before=None)
+        with self.assertRaises(ValueError):
+            RefreshAhead(max_workers=0)
+        with self.assertRaises(ValueError):
+            RefreshAhead(max_queue=0)
+
+    def test_observe(self):
+        refresher = RefreshAhead(refresh_before=10, max_workers=1,
+                                 max_queue=2)
+        release = threading.Event()
+        done = []
+
+        def refresh(key):
+            release.wait(5)
+            done.append(key)
+
+        self.assertFalse(refresher.observe(('fresh',), 11, refresh))
+        self.assertFalse(refresher.observe(('unknown',), None, refresh))
+        self.assertEqual(refresher.queue_depth, 0)
+
+        self.assertFalse(refresher.observe(('a',), 5, refresh))
+        _wait_for(lambda: refresher.queue_depth == 0)
+        # Running refreshes are not queued again
+        self.assertTrue(refresher.observe(('a',), -1, refresh))
+        self.assertEqual(refresher.queue_depth, 0)
+
+        refresher.observe(('b',), 5, refresh)
+        refresher.observe(('c',), 5, refresh)
+        refresher.observe(('c',), 5, refresh)
+        refresher.observe(('d',), 5, refresh)
+        self.assertEqual(refresher.as_dict(), {
+            'stale_serves': 1, 'refreshes': 0, 'refresh_errors': 0,
+            'dropped': 1, 'queue_depth': 2})
+
+        release.set()
+        _wait_for(lambda: refresher.refreshes == 3)
+        # Most read first
+        self.assertEqual(done, [('a',), ('c',), ('b',)])
+        refresher.close()
+
+    def test_errors(self):
+        refresher = RefreshAhead()
+
+        def refresh(key):
+            raise ValueError(key)
+
+        refresher.observe(('a',), 1, refresh)
+        _wait_for(lambda: refresher.refresh_errors == 1)
+        self.assertEqual(refresher.refreshes, 0)
+        refresher.close()
+
+
+class TestClientRefreshAhead(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+        self.statuses = []
+        hooks = Hooks()
+        hooks.add(Hooks.AFTER_RESPONSE,
+                  lambda info: self.statuses.append(info.cache))
+        self.refresher = RefreshAhead(refresh_before=0.1, grace=60)
+        self.client = Client(API_KEY, base_url=self.server.url, hooks=hooks,
+                             cache=MemoryCache(ttl=0.2),
+                             refresh_ahead=self.refresher)
+
+    def tearDown(self):
+        self.client.close()
+        self.refresher.close()
+        self.server.stop()
+
+    def test_refresh_before_expiry(self):
+        expected = self.client.data(DOMAIN)
+        self.client.data(DOMAIN)
+        self.assertEqual(self.refresher.queue_depth, 0)
+
+        time.sleep(0.15)
+        self.assertEqual(self.client.data(DOMAIN), expected)
+        _wait_for(lambda: self.refresher.refreshes == 1)
+        self.assertEqual(self.server.request_count, 2)
+        self.assertEqual(self.statuses, ['miss', 'hit', 'hit', 'refresh'])
+
+        # Fresh again
+        self.client.data(DOMAIN)
+        self.assertEqual(self.refresher.queue_depth, 0)
+        self.assertEqual(self.refresher.stale_serves, 0)
+
+    def test_stale_while_revalidate(self):
+        expected = self.client.data(DOMAIN)
+        time.sleep(0.25)
+        self.server.latency = 0.5
+
+        start = time.monotonic()
+        self.assertEqual(self.client.data(DOMAIN), expected)
+        self.assertEqual(dict(self.client.data_many([DOMAIN]))[DOMAIN],
+                         expected)
+        self.assertLess(time.monotonic() - start, 0.3)
+        self.assertEqual(self.refresher.stale_serves, 2)
+        self.assertEqual(self.statuses, ['miss', 'stale', 'stale'])
+
+        _wait_for(lambda: self.refresher.refreshes == 1)
+        self.assertEqual(self.server.request_count, 2)
+        self.client.raw_data(DOMAIN)
+        self.assertEqual(self.statuses[-1], 'hit')
+
+    def test_refresh_failure_keeps_stale_result(self):
+        self.client.data(DOMAIN)
+        time.sleep(0.25)
+        self.server.failures[DOMAIN] = 500
+        self.client.data(DOMAIN)
+        _wait_for(lambda: self.refresher.refresh_errors == 1)
+        self.assertEqual(self.client.data(DOMAIN).domain_name, DOMAIN)
+        self.assertEqual(self.refresher.stale_serves, 2)
+
+    def test_shared_refresher_outlives_client(self):
+        refresher = RefreshAhead(refresh_before=0.1, grace=60,
+                                 max_workers=1)
+        clients = [Client(API_KEY, base_url=self.server.url,
+                          cache=MemoryCache(ttl=0.2),
+                          refresh_ahead=refresher) for _ in range(2)]
+        domains = [DOMAIN, 'example.com']
+        for client, domain in zip(clients, domains):
+            client.data(domain)
+        time.sleep(0.15)
+
+        # Keep the only worker busy while both clients queue a refresh
+        release = threading.Event()
+        refresher.observe(('busy',), 0, lambda key: release.wait())
+        _wait_for(lambda: refresher.queue_depth == 0)
+        for client, domain in zip(clients, domains):
+            client.data(domain)
+        self.assertEqual(refresher.queue_depth, 2)
+
+        clients[0].close()
+        self.assertEqual(refresher.queue_depth, 1)
+        release.set()
+        _wait_for(lambda: refresher.refreshes == 2)
+        self.assertEqual(self.server.request_count, 3)
+        clients[1].close()
+        refresher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
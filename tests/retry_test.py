@@ -0,0 +1,215 @@
+import asyncio
+import time
+import unittest
+from requests.exceptions import ConnectionError as RequestsConnectionError, \
+    ChunkedEncodingError
+from websitecategorization import Client, AsyncClient, HttpApiError, \
+    BadRequestError, ApiAuthError, CircuitOpenError, RetryPolicy, \
+    CircuitBreaker, ApiRequester, AsyncApiRequester, Transport, \
+    TransportResponse
+from websitecategorization.testing import StubApiServer, AsyncStubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+class _FailOnce(dict):
+    """Stub failures that clear themselves after the first response"""
+
+    def __getitem__(self, domain):
+        return self.pop(domain)
+
+
+class _FlakyTransport(Transport):
+    """Raises the given errors in turn, then answers with an empty body"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def request(self, method, url, params=None, headers=None, body=None,
+                timeout=(5, 30)):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return TransportResponse(200, {}, b'{}')
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+        with self.assertRaises(ValueError):
+            RetryPolicy(retry_statuses=(403, 503))
+        with self.assertRaises(ValueError):
+            RetryPolicy(deadline=0)
+
+    def test_retry_delay(self):
+        policy = RetryPolicy(max_attempts=3, backoff_base=1, backoff_max=1.5)
+        started = time.monotonic()
+        for _ in range(20):
+            self.assertLessEqual(policy.retry_delay(2, started, 503), 1.5)
+        self.assertIsNone(policy.retry_delay(3, started, 503))
+        self.assertIsNone(policy.retry_delay(1, started, 404))
+        self.assertIsNone(policy.retry_delay(1, started, None, ValueError()))
+        self.assertIsNotNone(
+            policy.retry_delay(1, started, None, ConnectionError()))
+        self.assertEqual(policy.retry_delay(1, started, 429, None, '2'), 2)
+
+    def test_deadline(self):
+        policy = RetryPolicy(max_attempts=5, deadline=1)
+        started = time.monotonic()
+        self.assertIsNone(policy.retry_delay(1, started, 429, None, '5'))
+        self.assertIsNone(policy.retry_delay(1, started - 2, 503))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.1)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        time.sleep(0.15)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record(True)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.failures, 0)
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.1)
+        breaker.before_call()
+        breaker.record(False)
+        time.sleep(0.15)
+        breaker.before_call()
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class TestClientRetries(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+        self.client = Client(
+            API_KEY, base_url=self.server.url,
+            retry_policy=RetryPolicy(max_attempts=3, backoff_base=0.01))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_transient_failure_is_retried(self):
+        self.server.failures = _FailOnce({'flaky.com': 503})
+        self.assertEqual(self.client.data('flaky.com').domain_name,
+                         'flaky.com')
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_attempts_are_bounded(self):
+        self.server.failures['down.com'] = 500
+        with self.assertRaises(HttpApiError):
+            self.client.data('down.com')
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.failures['rejected.com'] = 400
+        with self.assertRaises(BadRequestError):
+            self.client.data('rejected.com')
+        self.client.api_key = 'at_' + '1' * 29
+        with self.assertRaises(ApiAuthError):
+            self.client.data('whoisxmlapi.com')
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_connection_errors_are_retried(self):
+        self.server.stop()
+        start = time.monotonic()
+        with self.assertRaises(RequestsConnectionError):
+            self.client.data('whoisxmlapi.com')
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_circuit_breaker(self):
+        self.client.api_requester.retry_policy = None
+        self.client.api_requester.circuit_breaker = CircuitBreaker(
+            failure_threshold=2, recovery_timeout=60)
+        self.server.failures['down.com'] = 503
+        for _ in range(2):
+            with self.assertRaises(HttpApiError):
+                self.client.data('down.com')
+        with self.assertRaises(CircuitOpenError):
+            self.client.data('whoisxmlapi.com')
+        self.assertEqual(self.server.request_count, 2)
+
+
+class TestRetriedExceptions(unittest.TestCase):
+
+    def test_truncated_body_is_retried(self):
+        transport = _FlakyTransport(ChunkedEncodingError('Truncated'))
+        with ApiRequester(transport=transport,
+                          retry_policy=RetryPolicy(backoff_base=0)) \
+                as requester:
+            self.assertEqual(requester.get({}), '{}')
+        self.assertEqual(transport.calls, 2)
+
+    def test_custom_retry_exceptions(self):
+        breaker = CircuitBreaker()
+        transport = _FlakyTransport(OSError('Reset'))
+        with ApiRequester(transport=transport, circuit_breaker=breaker,
+                          retry_policy=RetryPolicy(
+                              retry_exceptions=(OSError,),
+                              backoff_base=0)) as requester:
+            self.assertEqual(requester.get({}), '{}')
+            self.assertEqual(transport.calls, 2)
+
+            # Neither transient nor listed: raised at once
+            transport.errors = [ValueError('Bug')]
+            with self.assertRaises(ValueError):
+                requester.get({})
+            self.assertEqual(transport.calls, 3)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_async_custom_retry_exceptions(self):
+        async def scenario():
+            async with AsyncApiRequester(
+                    base_url='http://127.0.0.1:9',
+                    retry_policy=RetryPolicy(retry_exceptions=(OSError,),
+                                             backoff_base=0)) as requester:
+                errors = [OSError('Reset')]
+
+                async def request(*args):
+                    if errors:
+                        raise errors.pop()
+                    return 200, {}, b'{}'
+
+                requester._request = request
+                self.assertEqual(await requester.get({}), '{}')
+                self.assertEqual(errors, [])
+
+        asyncio.run(scenario())
+
+
+class TestAsyncClientRetries(unittest.TestCase):
+
+    def test_transient_failure_is_retried(self):
+        async def scenario():
+            async with AsyncStubApiServer(api_key=API_KEY) as server:
+                server.failures = _FailOnce({'flaky.com': 503})
+                async with AsyncClient(
+                        API_KEY, base_url=server.url,
+                        retry_policy=RetryPolicy(backoff_base=0.01)) \
+                        as client:
+                    response = await client.data('flaky.com')
+                self.assertEqual(response.domain_name, 'flaky.com')
+                self.assertEqual(server.request_count, 2)
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import contextlib
+import functools
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from websitecategorization import Client, Pipeline, ShardedRunner, \
+    DomainNormalizer, MemoryCache, ApiAuthError, ParameterError, cli
+from websitecategorization.sharding import shard_of, parse_shard
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+def _caching_client(base_url: str) -> Client:
+    # Built in the worker, since caches do not pickle
+    return Client(API_KEY, base_url=base_url, cache=MemoryCache(),
+                  normalizer=DomainNormalizer(collapse=False))
+
+
+class TestShards(unittest.TestCase):
+
+    def test_shard_of(self):
+        # Pinned, since machines splitting a job must agree
+        self.assertEqual([shard_of(d, 4) for d in (
+            'example.com', 'whoisxmlapi.com', 'a.com', 'b.com')],
+            [2, 1, 1, 3])
+        self.assertEqual(shard_of('example.com', 1000), 470)
+
+        counts = Counter(shard_of('d{}.com'.format(i), 4)
+                         for i in range(4000))
+        self.assertEqual(sorted(counts), [0, 1, 2, 3])
+        self.assertTrue(all(900 < count < 1100
+                            for count in counts.values()))
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('0/4'), (0, 4))
+        self.assertEqual(parse_shard('3/4'), (3, 4))
+        for value in ('4/4', '-1/4', '1', 'a/b', '0/0'):
+            with self.assertRaises(ParameterError):
+                parse_shard(value)
+        with self.assertRaises(ParameterError):
+            ShardedRunner(Client, processes=0)
+
+
+class TestShardedRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+        self.factory = functools.partial(Client, API_KEY,
+                                         base_url=self.server.url)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def test_run(self):
+        domains = ['d{}.com'.format(i) for i in range(40)] + ['bad domain']
+        runner = ShardedRunner(self.factory, processes=2, batch_size=4)
+        results = list(runner.run(domains, output_format='xml'))
+        self.assertEqual([d for d, _ in results], domains)
+        for domain, body in results[:-1]:
+            self.assertIsInstance(body, bytes)
+            self.assertIn('<domainName>{}</domainName>'.format(domain),
+                          body.decode('utf-8'))
+        self.assertIsInstance(results[-1][1], ParameterError)
+        self.assertEqual(self.server.request_count, 40)
+
+    def test_routing_by_normalized_name(self):
+        # Spread over the 4 workers by a hash of the raw strings
+        domains = ['example.com', 'Example.COM', 'https://example.com/x']
+        runner = ShardedRunner(
+            functools.partial(_caching_client, self.server.url), processes=4)
+        results = list(runner.run(domains))
+        self.assertEqual([d for d, _ in results], domains)
+        self.assertTrue(all(isinstance(body, bytes) for _, body in results))
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_auth_error(self):
+        self.server.api_key = 'at_' + '1' * 29
+        runner = ShardedRunner(self.factory, processes=1)
+        with self.assertRaises(ApiAuthError):
+            list(runner.run(['example.com']))
+
+    def test_pipeline(self):
+        domains = ['d{}.com'.format(i % 30) for i in range(60)]
+        outputs = []
+        for runner in (None, ShardedRunner(self.factory, processes=2)):
+            output = io.BytesIO()
+            with self.factory() as client:
+                stats = Pipeline(client, output, runner=runner).run(domains)
+            self.assertEqual((stats.duplicates, stats.succeeded), (30, 30))
+            outputs.append(output.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_pipeline_shards(self):
+        domains = ['d{}.com'.format(i) for i in range(50)]
+        seen = []
+        with self.factory() as client:
+            for index in range(3):
+                output = io.BytesIO()
+                stats = Pipeline(client, output, shard=(index, 3)).run(
+                    domains)
+                records = [json.loads(line) for line in
+                           output.getvalue().splitlines()]
+                self.assertEqual(stats.read, len(records))
+                self.assertTrue(all(shard_of(r['domainName'], 3) == index
+                                    for r in records))
+                seen.extend(r['domainName'] for r in records)
+        self.assertEqual(sorted(seen), sorted(domains))
+
+        with self.assertRaises(ParameterError):
+            Pipeline(client, io.BytesIO(), shard=(3, 3))
+
+    def test_pipeline_shard_resume(self):
+        domains = ['d{}.com'.format(i) for i in range(40)]
+        output = os.path.join(self.directory, 'shard0.jsonl')
+        with self.factory() as client:
+            pipeline = Pipeline(client, output, shard=(0, 2))
+            stats = pipeline.run(domains)
+            with open(output, 'rb') as file:
+                content = file.read()
+            self.assertEqual(self.server.request_count, stats.succeeded)
+
+            # A finished job is not redone
+            self.server.reset_counters()
+            stats = pipeline.run(domains)
+        self.assertEqual((stats.resumed, stats.read), (40, 0))
+        self.assertEqual(self.server.request_count, 0)
+        with open(output, 'rb') as file:
+            self.assertEqual(file.read(), content)
+
+    def test_cli(self):
+        path = os.path.join(self.directory, 'domains.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join('d{}.com'.format(i) for i in range(20)))
+
+        lines = []
+        for index in range(2):
+            output = os.path.join(self.directory, 'out{}'.format(index))
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(cli.main([
+                    '--api-key', API_KEY, '--base-url', self.server.url,
+                    '--output', output, '--processes', '2', '-q',
+                    '--shard', '{}/2'.format(index), path]), 0)
+            with open(output, encoding='utf-8') as file:
+                lines.extend(json.loads(line)['domainName']
+                             for line in file)
+        self.assertEqual(sorted(lines),
+                         sorted('d{}.com'.format(i) for i in range(20)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import unittest
+from websitecategorization import Client, AsyncClient, Response, \
+    BadRequestError
+from websitecategorization.net.singleflight import SingleFlight
+from websitecategorization.testing import StubApiServer, AsyncStubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAIN = 'whoisxmlapi.com'
+CALLERS = 10
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Concurrent identical lookups must result in one API call.
+    """
+    def setUp(self) -> None:
+        self.server = StubApiServer(api_key=API_KEY, latency=0.2)
+        self.server.failures['rejected.com'] = 400
+        self.server.start()
+        self.client = Client(API_KEY, base_url=self.server.url)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+
+    def _concurrently(self, function) -> list:
+        barrier = threading.Barrier(CALLERS)
+        results = [None] * CALLERS
+
+        def work(n):
+            barrier.wait()
+            try:
+                results[n] = function()
+            except Exception as error:
+                results[n] = error
+
+        threads = [threading.Thread(target=work, args=(n,))
+                   for n in range(CALLERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_one_request(self):
+        results = self._concurrently(lambda: self.client.data(DOMAIN))
+        self.assertEqual(self.server.request_count, 1)
+        self.assertTrue(all(isinstance(r, Response) for r in results))
+
+    def test_shared_exception(self):
+        results = self._concurrently(lambda: self.client.data('rejected.com'))
+        self.assertEqual(self.server.request_count, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertIsInstance(results[0], BadRequestError)
+
+    def test_different_payloads(self):
+        self._concurrently(lambda: self.client.data(DOMAIN))
+        self._concurrently(lambda: self.client.data(DOMAIN, 0.9))
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_bulk(self):
+        results = list(self.client.data_many([DOMAIN] * CALLERS,
+                                             max_workers=CALLERS))
+        self.assertEqual(len(results), CALLERS)
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_disabled(self):
+        self.client.coalesce_requests = False
+        self.server.latency = 0.05
+        self._concurrently(lambda: self.client.data(DOMAIN))
+        self.assertEqual(self.server.request_count, CALLERS)
+
+    def test_released_after_call(self):
+        flights = SingleFlight()
+        self.assertEqual(flights.do('key', lambda: 1), 1)
+        self.assertEqual(flights.do('key', lambda: 2), 2)
+        self.assertEqual(flights.in_flight, 0)
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+
+    def test_one_request(self):
+        async def scenario():
+            async with AsyncStubApiServer(api_key=API_KEY,
+                                          latency=0.1) as server:
+                async with AsyncClient(API_KEY,
+                                       base_url=server.url) as client:
+                    results = await asyncio.gather(
+                        *[client.data(DOMAIN) for _ in range(CALLERS)])
+                return server.request_count, results
+
+        count, results = asyncio.run(scenario())
+        self.assertEqual(count, 1)
+        self.assertTrue(all(isinstance(r, Response) for r in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from websitecategorization import Client, HttpApiError
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+class TestStubApiServer(unittest.TestCase):
+
+    def test_payload_size(self):
+        with StubApiServer(payload_size=25) as server, \
+                Client(API_KEY, base_url=server.url) as client:
+            self.assertEqual(len(client.data('example.com').categories), 25)
+            server.payload_size = 0
+            self.assertEqual(client.data('example.com').categories, [])
+
+    def test_error_rate(self):
+        with StubApiServer(error_rate=0.5, seed=7) as server, \
+                Client(API_KEY, base_url=server.url) as client:
+            errors = 0
+            for i in range(100):
+                try:
+                    client.data('d{}.com'.format(i))
+                except HttpApiError:
+                    errors += 1
+        self.assertTrue(20 < errors < 80)
+
+    def test_categories_list(self):
+        with StubApiServer() as server, \
+                Client(API_KEY, base_url=server.url) as client:
+            self.assertIn('"tier"', client.list_categories())
+
+
+if __name__ == '__main__':
+    unittest.main()
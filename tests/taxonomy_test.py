@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from websitecategorization import Client, CategoryTaxonomy, \
+    TaxonomyCategory, ParameterError, UnparsableApiResponseError
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+
+
+class TestCategoryTaxonomy(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+        self.client = Client(API_KEY, base_url=self.server.url)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'categories.json')
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        self.directory.cleanup()
+
+    def test_indexes(self):
+        taxonomy = CategoryTaxonomy(self.client)
+        self.assertEqual(len(taxonomy), 4)
+        self.assertEqual(taxonomy[61].name, 'Technology')
+        self.assertEqual(taxonomy['technology'].id, 61)
+        self.assertIn(5, taxonomy)
+        self.assertIn('Business', taxonomy)
+        self.assertNotIn(999, taxonomy)
+        self.assertNotIn('Sports', taxonomy)
+        self.assertIsNone(taxonomy.get(999))
+        with self.assertRaises(KeyError):
+            taxonomy[999]
+        self.assertEqual([c.id for c in taxonomy], [5, 12, 40, 61])
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_hierarchy(self):
+        taxonomy = CategoryTaxonomy(self.client)
+        self.assertEqual(taxonomy.parent(61).id, 5)
+        self.assertIsNone(taxonomy.parent(5))
+        self.assertEqual([c.id for c in taxonomy.children(5)], [61])
+        self.assertEqual([c.id for c in taxonomy.ancestors(61)], [5])
+        self.assertEqual(taxonomy.ancestors(taxonomy[5]), [])
+        self.assertEqual(taxonomy[61].tier, 2)
+
+    def test_resolve_shares_names(self):
+        taxonomy = CategoryTaxonomy(self.client)
+        categories = self.client.data('a.com').categories
+        for category in categories:
+            entry = category.resolve(taxonomy)
+            self.assertIsInstance(entry, TaxonomyCategory)
+            self.assertIs(entry.name, category.name)
+
+    def test_ttl(self):
+        taxonomy = CategoryTaxonomy(self.client, ttl=0.05)
+        taxonomy.get(5)
+        taxonomy.get(5)
+        self.assertEqual(self.server.request_count, 1)
+        time.sleep(0.06)
+        self.server.taxonomy.append(
+            {'id': 70, 'name': 'Sports', 'parent': None, 'tier': 1})
+        self.assertIn('sports', taxonomy)
+        self.assertEqual(self.server.request_count, 2)
+        taxonomy.refresh()
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_persistence(self):
+        CategoryTaxonomy(self.client, path=self.path).get(5)
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual(len(json.load(file)['categories']), 4)
+
+        reloaded = CategoryTaxonomy(self.client, path=self.path)
+        self.assertEqual(reloaded[61].name, 'Technology')
+        self.assertEqual(self.server.request_count, 1)
+
+        # Stale or corrupt files are refetched and rewritten
+        expired = CategoryTaxonomy(self.client, path=self.path, ttl=1e-6)
+        expired.get(5)
+        self.assertEqual(self.server.request_count, 2)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write('{')
+        CategoryTaxonomy(self.client, path=self.path).get(5)
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_errors(self):
+        with self.assertRaises(ParameterError):
+            CategoryTaxonomy(self.client, ttl=0)
+        self.server.taxonomy = {'unexpected': True}
+        with self.assertRaises(UnparsableApiResponseError):
+            CategoryTaxonomy(self.client).get(5)
+
+
+if __name__ == '__main__':
+    unittest.main()
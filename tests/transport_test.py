@@ -0,0 +1,228 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from urllib3.exceptions import HTTPError as Urllib3Error
+from websitecategorization import Client, ApiRequester, Hooks, \
+    RetryPolicy, Urllib3Transport, ReplayTransport, RecordingTransport, \
+    RequestsTransport, ApiAuthError, HttpApiError, cli
+from websitecategorization.testing import StubApiServer
+
+API_KEY = 'at_' + '0' * 29
+DOMAIN = 'whoisxmlapi.com'
+
+
+class TestUrllib3Transport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubApiServer(api_key=API_KEY)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_client(self):
+        infos = []
+        hooks = Hooks()
+        hooks.add(Hooks.AFTER_RESPONSE, infos.append)
+        with Client(API_KEY, base_url=self.server.url, hooks=hooks,
+                    transport=Urllib3Transport()) as client:
+            for _ in range(5):
+                self.assertEqual(client.data(DOMAIN).domain_name, DOMAIN)
+            self.assertTrue(client.list_categories())
+            with self.assertRaises(ApiAuthError):
+                client.api_key = 'at_' + '1' * 29
+                client.data(DOMAIN)
+        self.assertEqual(self.server.request_count, 7)
+        self.assertEqual(self.server.connection_count, 1)
+        self.assertIsNotNone(infos[0].connect)
+        self.assertIsNone(infos[1].connect)
+        self.assertTrue(all(info.status_code == 200 for info in infos[:6]))
+
+    def test_post(self):
+        with ApiRequester(base_url=self.server.url,
+                          transport=Urllib3Transport()) as requester:
+            self.assertIn(DOMAIN, requester.post(
+                {'apiKey': API_KEY, 'domainName': DOMAIN}))
+
+    def test_connection_errors_are_retried(self):
+        self.server.stop()
+        start = time.monotonic()
+        with Client(API_KEY, base_url=self.server.url,
+                    transport=Urllib3Transport(),
+                    retry_policy=RetryPolicy(max_attempts=3,
+                                             backoff_base=0.01)) as client:
+            with self.assertRaises(Urllib3Error):
+                client.data(DOMAIN)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_idle_connections_dropped(self):
+        transport = Urllib3Transport(keep_alive=0.01)
+        with ApiRequester(base_url=self.server.url,
+                          transport=transport) as requester:
+            requester.get({'apiKey': API_KEY, 'domainName': DOMAIN})
+            time.sleep(0.05)
+            requester.get({'apiKey': API_KEY, 'domainName': DOMAIN})
+        self.assertEqual(self.server.connection_count, 2)
+
+    def test_busy_pool_kept(self):
+        payload = {'apiKey': API_KEY, 'domainName': DOMAIN}
+        for transport in (RequestsTransport(keep_alive=0.05),
+                          Urllib3Transport(keep_alive=0.05)):
+            with ApiRequester(base_url=self.server.url,
+                              transport=transport) as requester:
+                self.server.latency = 0.3
+                slow = threading.Thread(target=requester.get,
+                                        args=(payload,))
+                slow.start()
+                time.sleep(0.1)
+                pool = transport._pool
+                # Idle for longer than keep_alive, but a request is running
+                requester.get(payload)
+                self.assertIs(transport._pool, pool)
+                slow.join()
+
+                self.server.latency = 0
+                time.sleep(0.1)
+                requester.get(payload)
+                self.assertIsNot(transport._pool, pool)
+
+    def test_idle_connections_closed_under_load(self):
+        payload = {'apiKey': API_KEY, 'domainName': DOMAIN}
+        for transport in (RequestsTransport(keep_alive=0.1),
+                          Urllib3Transport(keep_alive=0.1)):
+            with ApiRequester(base_url=self.server.url,
+                              transport=transport) as requester:
+                # Two connections, then steady load on the last used one
+                self.server.latency = 0.05
+                slow = threading.Thread(target=requester.get,
+                                        args=(payload,))
+                slow.start()
+                requester.get(payload)
+                slow.join()
+                self.server.latency = 0
+                for _ in range(10):
+                    requester.get(payload)
+                    time.sleep(0.03)
+
+                manager = transport._pool.get_adapter(
+                    self.server.url).poolmanager \
+                    if isinstance(transport, RequestsTransport) \
+                    else transport._pool
+                connections = [c for key in manager.pools.keys()
+                               for c in manager.pools[key].pool.queue
+                               if c is not None]
+                self.assertEqual(len(connections), 2)
+                self.assertEqual(
+                    [c.sock is not None for c in connections].count(True), 1)
+
+    def test_pool_block(self):
+        transport = Urllib3Transport(pool_maxsize=1, pool_block=True)
+        self.server.latency = 0.05
+        with ApiRequester(base_url=self.server.url,
+                          transport=transport) as requester:
+            threads = [threading.Thread(
+                target=requester.get,
+                args=({'apiKey': API_KEY, 'domainName': DOMAIN},))
+                for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_invalid_pool_settings(self):
+        with self.assertRaises(ValueError):
+            Urllib3Transport(pool_maxsize=0)
+        with self.assertRaises(ValueError):
+            Urllib3Transport(keep_alive=0)
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'recording.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_record_and_replay(self):
+        with StubApiServer(api_key=API_KEY) as server:
+            with Client(API_KEY, base_url=server.url,
+                        transport=RecordingTransport(self.path)) as client:
+                expected = [client.data(DOMAIN),
+                            client.data(DOMAIN, output_format='xml'),
+                            client.list_categories()]
+                with self.assertRaises(ApiAuthError):
+                    client.api_key = 'at_' + '1' * 29
+                    client.data('example.com')
+            url = server.url
+
+        with open(self.path, encoding='utf-8') as file:
+            recording = file.read()
+        self.assertEqual(len(recording.splitlines()), 4)
+        self.assertNotIn('at_', recording)
+
+        # Replayed with any API key, without the server
+        with Client('at_' + '2' * 29, base_url=url,
+                    transport=ReplayTransport(self.path)) as client:
+            self.assertEqual([client.data(DOMAIN),
+                              client.data(DOMAIN, output_format='xml'),
+                              client.list_categories()], expected)
+            # Later identical requests get the last response again
+            self.assertEqual(client.data(DOMAIN), expected[0])
+            with self.assertRaises(ApiAuthError):
+                client.data('example.com')
+            with self.assertRaises(HttpApiError):
+                client.data('example.org')
+
+    def test_responses_in_order(self):
+        transport = ReplayTransport()
+        url = 'http://localhost/api'
+        transport.add('GET', url, {'domainName': DOMAIN}, status_code=503,
+                      headers={'Retry-After': '0'}, content=b'unavailable')
+        transport.add('GET', url, {'domainName': DOMAIN},
+                      content=b'{"domainName": "whoisxmlapi.com"}')
+        with ApiRequester(base_url=url, transport=transport,
+                          retry_policy=RetryPolicy(backoff_base=0.01)) \
+                as requester:
+            self.assertIn(DOMAIN, requester.get(
+                {'apiKey': API_KEY, 'domainName': DOMAIN}))
+
+        response = transport.request('GET', url, {'domainName': DOMAIN})
+        self.assertEqual((response.status_code, response.elapsed),
+                         (200, 0.0))
+
+    def test_cli(self):
+        input_path = os.path.join(self.directory, 'domains.txt')
+        with open(input_path, 'w', encoding='utf-8') as file:
+            file.write('whoisxmlapi.com\nexample.com\n')
+
+        outputs = []
+        with StubApiServer(api_key=API_KEY) as server:
+            for index, options in enumerate((
+                    ['--api-key', API_KEY, '--transport', 'urllib3',
+                     '--record', self.path],
+                    ['--replay', self.path])):
+                output = os.path.join(self.directory, 'out{}'.format(index))
+                with contextlib.redirect_stderr(io.StringIO()):
+                    self.assertEqual(cli.main(
+                        options + ['--base-url', server.url, '-q',
+                                   '--output', output, input_path]), 0)
+                with open(output, encoding='utf-8') as file:
+                    outputs.append([json.loads(line) for line in file])
+                if index == 0:
+                    self.assertEqual(server.request_count, 2)
+                    server.stop()
+        self.assertEqual(outputs[0], outputs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
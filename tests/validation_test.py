@@ -0,0 +1,96 @@
+import itertools
+import random
+import unittest
+from websitecategorization import Client, DomainNormalizer, ParameterError, \
+    validate_domains
+from websitecategorization.validation import problem, EMPTY, \
+    INVALID_CHARACTER, NO_TOP_LEVEL_DOMAIN, EMPTY_LABEL, HYPHEN, \
+    INVALID_TOP_LEVEL_DOMAIN, LABEL_TOO_LONG
+
+# Characters around the edges of the pattern's character classes
+ALPHABET = 'aZ09-_.\nİıſKé `/:'
+
+
+def _reference(name: str) -> bool:
+    return Client._re_domain_name.search(name) is not None
+
+
+def _random_name(generator: random.Random) -> str:
+    # Mostly plausible labels, so that both outcomes are common
+    labels = []
+    for _ in range(generator.choice((1, 2, 2, 3, 4))):
+        length = generator.choice((0, 1, 2, 3, 8, 62, 63, 64, 65))
+        characters = generator.choice(('az09', 'az09-', 'az09-_', ALPHABET))
+        labels.append(''.join(generator.choice(characters)
+                              for _ in range(length)))
+    name = '.'.join(labels)
+    if generator.random() < 0.1:
+        name += generator.choice(ALPHABET)
+    return name
+
+
+class TestProblem(unittest.TestCase):
+
+    def test_equivalence_exhaustive(self):
+        for length in range(5):
+            for characters in itertools.product(ALPHABET, repeat=length):
+                name = ''.join(characters)
+                self.assertEqual(problem(name) is None, _reference(name),
+                                 repr(name))
+
+    def test_equivalence_random(self):
+        generator = random.Random(20)
+        accepted = 0
+        for _ in range(50000):
+            name = _random_name(generator)
+            expected = _reference(name)
+            self.assertEqual(problem(name) is None, expected, repr(name))
+            accepted += expected
+        # The generated names exercise both outcomes
+        self.assertGreater(accepted, 2500)
+        self.assertLess(accepted, 47500)
+
+    def test_reasons(self):
+        for name, reason in (
+                ('', EMPTY),
+                ('exa mple.com', INVALID_CHARACTER),
+                ('localhost', NO_TOP_LEVEL_DOMAIN),
+                ('a..com', EMPTY_LABEL),
+                ('example.com.', EMPTY_LABEL),
+                ('-a.com', HYPHEN),
+                ('a.com-', HYPHEN),
+                ('a.c', INVALID_TOP_LEVEL_DOMAIN),
+                ('a.c_m', INVALID_TOP_LEVEL_DOMAIN),
+                ('a' * 65 + '.com', LABEL_TOO_LONG),
+                ('a.com\n\n', INVALID_CHARACTER),
+                ('\n', EMPTY),
+                ('a.com\n', None),
+                ('_dmarc.example.com', None),
+                ('a' * 64 + '.com', None)):
+            self.assertEqual(problem(name), reason, name)
+
+
+class TestValidateDomains(unittest.TestCase):
+
+    def test_validate_domains(self):
+        result = validate_domains(['example.com', 'bad domain', 42,
+                                   'WWW.Example.ORG'])
+        self.assertEqual(result.valid, ['example.com', 'WWW.Example.ORG'])
+        self.assertEqual(result.invalid, [('bad domain', INVALID_CHARACTER),
+                                          (42, NO_TOP_LEVEL_DOMAIN)])
+
+        result = validate_domains(['https://www.example.com/', 'https:///'],
+                                  normalizer=DomainNormalizer())
+        self.assertEqual(result.valid, ['example.com'])
+        self.assertEqual(result.invalid,
+                         [('https:///', 'Invalid domain name')])
+
+    def test_client(self):
+        self.assertEqual(Client._validate_domain_name('example.com'),
+                         'example.com')
+        with self.assertRaises(ParameterError):
+            Client._validate_domain_name('example')
+
+
+if __name__ == '__main__':
+    unittest.main()
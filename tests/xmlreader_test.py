@@ -0,0 +1,127 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from websitecategorization import Client, AsyncClient, Pipeline, Response, \
+    ResponseError, UnparsableApiResponseError
+from websitecategorization.testing import StubApiServer, AsyncStubApiServer
+from websitecategorization.xmlreader import loads, iterparse
+
+API_KEY = 'at_' + '0' * 29
+
+_XML = '<?xml version="1.0" encoding="utf-8"?>\n' \
+       '<root><as><asn>13335</asn><name>CLOUDFLARENET</name></as>' \
+       '<domainName>a.com</domainName><categories>' \
+       '<category><confidence>0.92</confidence><id>5</id>' \
+       '<name>News &amp; Media</name></category>' \
+       '<category><confidence>0.58</confidence><id>12</id>' \
+       '<name>Business</name></category></categories>' \
+       '<createdDate>2009-03-19T21:47:17+00:00</createdDate>' \
+       '<websiteResponded>false</websiteResponded></root>'
+
+_JSON = '{"as": {"asn": 13335, "name": "CLOUDFLARENET"}, ' \
+        '"domainName": "a.com", "categories": [' \
+        '{"confidence": 0.92, "id": 5, "name": "News & Media"}, ' \
+        '{"confidence": 0.58, "id": 12, "name": "Business"}], ' \
+        '"createdDate": "2009-03-19T21:47:17+00:00", ' \
+        '"websiteResponded": false}'
+
+
+class TestXmlParsing(unittest.TestCase):
+
+    def test_same_as_json(self):
+        for document in (_XML, _XML.encode('utf-8')):
+            self.assertEqual(
+                Client._parse_response(document, Client.XML_FORMAT),
+                Client._parse_response(_JSON))
+        self.assertFalse(loads(_XML)['websiteResponded'])
+
+    def test_empty_elements(self):
+        response = Client._parse_response(
+            '<root><as/><domainName>a.com</domainName><categories/>'
+            '<websiteResponded>true</websiteResponded></root>',
+            Client.XML_FORMAT)
+        self.assertIsNone(response.as_field)
+        self.assertEqual(response.categories, [])
+        self.assertTrue(response.website_responded)
+
+    def test_unparsable(self):
+        for document in ('<root><domainName>a.com</root>', '',
+                         '<root><code>1</code></root>', 'plain text',
+                         '<!DOCTYPE root [<!ENTITY a "b">]>'
+                         '<root><domainName>&a;</domainName></root>'):
+            with self.assertRaises(UnparsableApiResponseError):
+                Client._parse_response(document, Client.XML_FORMAT)
+
+
+class TestIterparse(unittest.TestCase):
+
+    def test_concatenated(self):
+        dump = (_XML + '\n' + _XML.replace('a.com', 'b.com') +
+                '<error domainName="c.com" type="HttpApiError">'
+                'Server &lt;error&gt;</error>\n\n' +
+                _XML.replace('a.com', 'd.com') + '\n').encode('utf-8')
+        expected = Client._parse_response(_JSON)
+
+        for chunk_size in (1, 5, 100, 65536):
+            results = list(iterparse(io.BytesIO(dump), chunk_size))
+            self.assertEqual([domain for domain, _ in results],
+                             ['a.com', 'b.com', 'c.com', 'd.com'])
+            self.assertEqual(results[0][1], expected)
+            self.assertIsInstance(results[1][1], Response)
+            self.assertIsInstance(results[2][1], ResponseError)
+            self.assertEqual(results[2][1].message, 'Server <error>')
+
+    def test_malformed(self):
+        results = iterparse(io.BytesIO(
+            (_XML + '<root><domainName>').encode('utf-8')))
+        self.assertEqual(next(results)[0], 'a.com')
+        with self.assertRaises(UnparsableApiResponseError):
+            next(results)
+
+    def test_empty(self):
+        self.assertEqual(list(iterparse(io.BytesIO(b''))), [])
+        self.assertEqual(list(iterparse(io.BytesIO(b' \n'))), [])
+
+    def test_pipeline_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.xml')
+            with StubApiServer(api_key=API_KEY) as server:
+                server.failures['bad.com'] = 500
+                with Client(API_KEY, base_url=server.url) as client:
+                    Pipeline(client, path, output_format='xml').run(
+                        ['a.com', 'bad.com', 'b.com'])
+                    expected = client.data('a.com')
+            results = list(iterparse(path))
+
+        self.assertEqual([domain for domain, _ in results],
+                         ['a.com', 'bad.com', 'b.com'])
+        self.assertEqual(results[0][1], expected)
+        self.assertIsInstance(results[1][1], ResponseError)
+
+
+class TestClientXml(unittest.TestCase):
+
+    def test_sync(self):
+        with StubApiServer(api_key=API_KEY) as server:
+            with Client(API_KEY, base_url=server.url) as client:
+                self.assertEqual(
+                    client.data('a.com', 0.6, output_format='XML'),
+                    client.data('a.com', 0.6))
+
+    def test_async(self):
+        async def run():
+            async with AsyncStubApiServer(api_key=API_KEY) as server:
+                async with AsyncClient(API_KEY,
+                                       base_url=server.url) as client:
+                    return await asyncio.gather(
+                        client.data('a.com', output_format='xml'),
+                        client.data('a.com'))
+
+        from_xml, from_json = asyncio.run(run())
+        self.assertEqual(from_xml, from_json)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Compile the Public Suffix List into the trie bundled with the package.
+
+Rules are converted to IDNA ASCII and stored as a preorder dump of the
+trie of their reversed labels, gzip-compressed, which
+`websitecategorization.normalization` loads without parsing the list.
+
+Usage::
+
+    curl -O https://publicsuffix.org/list/public_suffix_list.dat
+    python tools/build_public_suffix.py public_suffix_list.dat
+
+Format, after a ``# VERSION`` comment line: one line per trie node,
+depth-first, made of the node depth as one character starting at '0',
+its flag and its label. Flags: '-' no rule, 'i' ICANN rule, 'p' private
+rule, '!' ICANN exception, '?' private exception.
+"""
+import argparse
+import gzip
+import os
+
+OUTPUT = os.path.join(os.path.dirname(__file__), os.pardir, 'src',
+                      'websitecategorization', 'data', 'public_suffix.gz')
+
+
+def ascii_label(label: str) -> str:
+    if label.isascii():
+        return label.lower()
+    try:
+        return label.encode('idna').decode('ascii')
+    except UnicodeError:
+        return 'xn--' + label.lower().encode('punycode').decode('ascii')
+
+
+def parse(lines) -> (dict, str):
+    root = {}
+    version = ''
+    private = False
+    for line in lines:
+        line = line.strip()
+        if line.startswith('// VERSION:'):
+            version = line[len('// VERSION:'):].strip()
+        if line.startswith('// ===BEGIN PRIVATE DOMAINS==='):
+            private = True
+        if not line or line.startswith('//'):
+            continue
+
+        rule = line.split()[0]
+        exception = rule.startswith('!')
+        if exception:
+            rule = rule[1:]
+        children = root
+        for label in reversed(rule.split('.')):
+            node = children.setdefault(ascii_label(label), ['-', {}])
+            children = node[1]
+        node[0] = ('?' if private else '!') if exception \
+            else ('p' if private else 'i')
+    return root, version
+
+
+def dump(node: dict, depth: int, out: list):
+    for label in sorted(node):
+        flag, children = node[label]
+        out.append('{}{}{}'.format(chr(ord('0') + depth), flag, label))
+        dump(children, depth + 1, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('source', help='public_suffix_list.dat')
+    parser.add_argument('--output', default=OUTPUT)
+    args = parser.parse_args()
+
+    with open(args.source, encoding='utf-8') as file:
+        root, version = parse(file)
+    lines = ['# VERSION {}'.format(version)]
+    dump(root, 0, lines)
+    with gzip.open(args.output, 'wt', encoding='ascii',
+                   compresslevel=9) as file:
+        file.write('\n'.join(lines) + '\n')
+    print("{} nodes, {} bytes".format(len(lines) - 1,
+                                       os.path.getsize(args.output)))
+
+
+if __name__ == '__main__':
+    main()